@@ -6,30 +6,45 @@ Master Version: Fixed Indentations, Fully Integrated Fund Expenses & Net IRR
 import streamlit as st
 import hashlib
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 import json
+import orjson
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import io
+import queue
+import threading
+import time
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, date, timedelta
-from collections import defaultdict
-from supabase import create_client, Client
+from datetime import datetime, date
+from collections import Counter, defaultdict
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from supabase import create_client, Client, ClientOptions
 from pe_vc_metrics import (
     format_report_currency,
     format_report_multiple,
     format_report_percent,
     normalize_quarterly_report_metrics,
 )
+from report_text import frame_report_text, head_tail_pages_text
 
 OPENROUTER_API_KEY = st.secrets.get("OPENROUTER_API_KEY", "")
+OPENROUTER_MODEL = "anthropic/claude-sonnet-4"
 HARDCODED_ALLOWED_EMAILS = set()
 
-def get_allowed_emails() -> set[str]:
+@st.cache_resource(show_spinner=False)
+def get_allowed_emails() -> frozenset[str]:
+    """Normalized login allowlist, built once per process from code and secrets."""
     allowed_emails = set(HARDCODED_ALLOWED_EMAILS)
     auth_secrets = st.secrets.get("auth", {})
     secret_emails = auth_secrets.get("allowed_emails", []) if auth_secrets else []
     allowed_emails.update(str(email).strip().lower() for email in secret_emails if str(email).strip())
-    return allowed_emails
+    return frozenset(allowed_emails)
 
 def is_email_allowed(email: str) -> bool:
     return email.strip().lower() in get_allowed_emails()
@@ -54,6 +69,7 @@ def investor_commitment_value(inv) -> float:
     """
     return normalize_commitment_amount(inv.get("commitment"))
 
+@lru_cache(maxsize=4096)
 def format_currency(amount: float, currency_sym: str = "$") -> str:
     if amount is None or amount == 0:
         return "—"
@@ -103,26 +119,38 @@ def calculate_xirr(cash_flows):
     return None
 
 def extract_pdf_text(pdf_bytes: bytes) -> str:
+    """Extract (truncated) text from a PDF, reusing the disk cache for identical files."""
+    pdf_sha = hashlib.sha256(pdf_bytes).hexdigest()
+    return extract_pdf_text_cached(pdf_sha, pdf_bytes)
+
+@st.cache_data(persist="disk", max_entries=200, show_spinner=False)
+def extract_pdf_text_cached(pdf_sha: str, _pdf_bytes: bytes) -> str:
+    # Keyed on the content hash only; the raw bytes are excluded from hashing.
     import fitz
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    pages_text = []
-    for i, page in enumerate(doc):
-        text = page.get_text().strip()
-        if text:
-            pages_text.append(f"--- Page {i+1} ---\n{text}")
-    doc.close()
-    full_text = "\n".join(pages_text)
-    if len(full_text) <= 12000:
-        return full_text
-    return full_text[:4000] + "\n\n[...]\n\n" + full_text[-8000:]
+    doc = fitz.open(stream=_pdf_bytes, filetype="pdf")
+    try:
+        return head_tail_pages_text(doc, text_of=lambda page: page.get_text())
+    finally:
+        doc.close()
+
+def extract_report_text(uploaded_file) -> str:
+    """Turn an uploaded PDF/Excel/CSV quarterly report into (truncated) text for the AI."""
+    file_name = uploaded_file.name.lower()
+    if file_name.endswith('.pdf'):
+        return extract_pdf_text(uploaded_file.getvalue())
+    # UploadedFile is file-like, so pandas parses it in place instead of a BytesIO copy.
+    uploaded_file.seek(0)
+    if file_name.endswith('.csv'):
+        df = pd.read_csv(uploaded_file)
+    else:
+        df = pd.read_excel(uploaded_file)
+    return frame_report_text(df)
 
-def analyze_pdf_with_ai(pdf_bytes: bytes) -> dict:
-    pdf_text = extract_pdf_text(pdf_bytes)
-    prompt = f"""You are an expert private equity analyst. Carefully analyze this fund presentation and extract ALL available information.
+FUND_DECK_PROMPT = """You are an expert private equity analyst. Carefully analyze this fund presentation and extract ALL available information.
 Be thorough - search the entire text for financial terms, fees, returns, geography, and strategy details.
 
 Return ONLY a valid JSON object with these exact keys (use null only if truly not found anywhere):
-{{
+{
 "fund_name": "full fund name including fund number",
 "manager": "management company name",
 "strategy": "one of: Growth, VC, Tech, Niche, Special Situations, Mid-Market Buyout",
@@ -145,33 +173,71 @@ Return ONLY a valid JSON object with these exact keys (use null only if truly no
 "max_single_investment_pct": number (e.g. 15) or null,
 "aum_manager": number in billions (e.g. 33.3) or null,
 "key_highlights": "3-4 sentence summary of the fund investment thesis and differentiators"
-}}
+}
 
 IMPORTANT: Fund size in billions -> convert to millions. E.g. $2.5B = 2500.
-Return ONLY the JSON, no markdown, no extra text.
+Return ONLY the JSON, no markdown, no extra text."""
+
+@st.cache_resource(show_spinner=False)
+def get_openrouter_adapter() -> HTTPAdapter:
+    """Process-wide keep-alive pool, so back-to-back AI calls skip a fresh TLS handshake."""
+    return HTTPAdapter(pool_connections=4, pool_maxsize=8)
+
+def get_openrouter_session() -> requests.Session:
+    # urllib3's pool is thread-safe but requests.Session is not, so each call gets
+    # its own Session on the shared adapter. Never close it: that would close the pool.
+    session = requests.Session()
+    session.mount("https://", get_openrouter_adapter())
+    session.headers.update({
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://octo-dashboard.streamlit.app"
+    })
+    return session
 
-FUND PRESENTATION TEXT:
-{pdf_text}"""
+def call_openrouter_json(system_prompt: str, user_text: str, max_tokens: int, model: str = OPENROUTER_MODEL) -> str:
+    """Send one JSON-mode chat completion and return the raw message content.
 
+    The static instructions go in a system block marked for prompt caching, so
+    repeat uploads only pay full price for the document text in the user turn.
+    """
     payload = {
-        "model": "anthropic/claude-sonnet-4",
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 2000
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://octo-dashboard.streamlit.app"
+        "model": model,
+        "messages": [
+            {"role": "system", "content": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]},
+            {"role": "user", "content": user_text},
+        ],
+        "max_tokens": max_tokens,
+        "response_format": {"type": "json_object"}
     }
-    resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=90)
+    resp = get_openrouter_session().post(
+        "https://openrouter.ai/api/v1/chat/completions",
+        json=payload,
+        headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+        timeout=90,
+    )
     if resp.status_code != 200:
         raise Exception(f"OpenRouter error {resp.status_code}: {resp.text[:300]}")
-    content = resp.json()["choices"][0]["message"]["content"].strip()
-    if "```" in content:
-        content = content.split("```")[1]
-        if content.startswith("json"):
-            content = content[4:]
-    return json.loads(content.strip())
+    return orjson.loads(resp.content)["choices"][0]["message"]["content"]
+
+def evict_if_incomplete(result, cached_fn, required_keys, *args):
+    """Drop a disk-cached AI result missing the fields the forms rely on, so it is re-analyzed next time."""
+    if not isinstance(result, dict) or any(key not in result for key in required_keys):
+        cached_fn.clear(*args)
+    return result
+
+FUND_DECK_REQUIRED_KEYS = ("fund_name", "strategy")
+
+def analyze_pdf_with_ai(pdf_bytes: bytes) -> dict:
+    """Analyze a fund deck, reusing the result for a file that was already analyzed."""
+    args = (hashlib.sha256(pdf_bytes).hexdigest(), OPENROUTER_MODEL, FUND_DECK_PROMPT, pdf_bytes)
+    return evict_if_incomplete(analyze_pdf_cached(*args), analyze_pdf_cached, FUND_DECK_REQUIRED_KEYS, *args)
+
+@st.cache_data(persist="disk", max_entries=100, show_spinner=False)
+def analyze_pdf_cached(pdf_sha: str, model: str, system_prompt: str, _pdf_bytes: bytes) -> dict:
+    # model and system_prompt are part of the key, so editing either re-runs the analysis.
+    pdf_text = extract_pdf_text_cached(pdf_sha, _pdf_bytes)
+    user_text = f"FUND PRESENTATION TEXT:\n{pdf_text}"
+    return orjson.loads(call_openrouter_json(system_prompt, user_text, max_tokens=1200, model=model))
 
 def calculate_fund_metrics(fund, calls, dists):
     commitment = float(fund.get("commitment") or 0)
@@ -218,6 +284,14 @@ def calculate_fund_metrics(fund, calls, dists):
         "equalisation_interest": total_equalisation_interest
     }
 
+STRATEGY_OPTS = ("Growth", "VC", "Tech", "Niche", "Special Situations", "Mid-Market Buyout")
+STRATEGY_IDX = {opt: i for i, opt in enumerate(STRATEGY_OPTS)}
+FUND_STATUS_OPTS = ("active", "closed", "exited")
+FUND_STATUS_IDX = {opt: i for i, opt in enumerate(FUND_STATUS_OPTS)}
+PRIORITY_OPTS = ("High", "Medium", "Low")
+PRIORITY_IDX = {opt: i for i, opt in enumerate(PRIORITY_OPTS)}
+CURRENCY_OPTS = ("USD", "EUR")
+
 CAPITAL_CALL_COMPONENT_TYPES = [
     "Gross capital call",
     "Recallable repayment",
@@ -246,6 +320,16 @@ def parse_ai_date(value):
     except Exception:
         return None
 
+@lru_cache(maxsize=256)
+def parse_iso_date(value):
+    """Parse an ISO date string as stored by Supabase; None when missing or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date()
+    except (TypeError, ValueError):
+        return None
+
 def normalize_ai_notice_type(value: str) -> str:
     notice_type = str(value or "simple_capital_call").strip().lower().replace("-", "_").replace(" ", "_")
     if notice_type in ["net_capital_call", "equalisation_bundle", "net_capital_call_equalisation_bundle"]:
@@ -418,9 +502,7 @@ def apply_capital_call_ai_prefill(fund, calls, ai_result: dict) -> list[str]:
     }
     return warnings
 
-def analyze_capital_call_pdf_with_ai(pdf_bytes: bytes) -> dict:
-    pdf_text = extract_pdf_text(pdf_bytes)
-    prompt = f"""You are an expert private equity fund accountant. Carefully analyze this capital call, distribution, or net capital call/equalisation notice.
+CAPITAL_CALL_NOTICE_PROMPT = """You are an expert private equity fund accountant. Carefully analyze this capital call, distribution, or net capital call/equalisation notice.
 
 Classify the notice as exactly one of:
 1. simple_capital_call
@@ -428,7 +510,7 @@ Classify the notice as exactly one of:
 3. net_capital_call_bundle
 
 Return ONLY a valid JSON object using this exact root schema. Use null for missing dates or unknown scalar values, [] for no rows, and 0 for missing amounts:
-{{
+{
     "notice_type": "simple_capital_call | distribution | net_capital_call_bundle",
     "confidence": number from 0 to 1,
     "call_number": number or null,
@@ -437,7 +519,7 @@ Return ONLY a valid JSON object using this exact root schema. Use null for missi
     "currency": "USD | EUR | GBP | other" or null,
     "final_wire_amount": number,
     "wire_direction": "pay_to_fund | receive_from_fund | netted",
-    "simple": {{
+    "simple": {
         "amount": number,
         "investments": number,
         "mgmt_fee": number,
@@ -454,26 +536,26 @@ Return ONLY a valid JSON object using this exact root schema. Use null for missi
         "reduces_called_capital": boolean,
         "restores_unfunded_commitment": boolean,
         "notes": string
-    }},
+    },
     "components": [
-        {{
+        {
             "component_type": "Gross capital call | Recallable repayment | Non-recallable distribution | Realised gain distribution | Equalisation interest outside commitment",
             "description": string,
             "cash_amount": number,
             "commitment_impact": number,
             "equalisation_interest": number
-        }}
+        }
     ],
-    "reconciliation": {{
+    "reconciliation": {
         "gross_calls": number,
         "repayments": number,
         "distributions": number,
         "equalisation_interest": number,
         "calculated_net_wire": number,
         "difference_to_final_wire": number
-    }},
+    },
     "warnings": [string]
-}}
+}
 
 For net_capital_call_bundle components, use ONLY these exact component_type labels:
 - Gross capital call
@@ -513,33 +595,23 @@ Simple capital call extraction rules:
 - If a GP Deemed Contribution is present, mention it in simple.notes.
 
 Amounts must be positive numbers without commas. Component type determines whether the amount adds to or subtracts from the net wire.
-IMPORTANT: Return ONLY the JSON, no markdown, no extra text.
+IMPORTANT: Return ONLY the JSON, no markdown, no extra text."""
 
-NOTICE TEXT:
-{pdf_text}"""
-
-    payload = {
-        "model": "anthropic/claude-sonnet-4",
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 2000
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://octo-dashboard.streamlit.app"
-    }
-    resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=90)
-    if resp.status_code != 200:
-        raise Exception(f"OpenRouter error {resp.status_code}: {resp.text[:300]}")
-    content = resp.json()["choices"][0]["message"]["content"].strip()
-    if "```" in content:
-        content = content.split("```")[1]
-        if content.startswith("json"):
-            content = content[4:]
-    return json.loads(content.strip())
+CAPITAL_CALL_REQUIRED_KEYS = ("notice_type", "final_wire_amount", "simple")
 
-def analyze_quarterly_report_with_ai(report_text: str) -> dict:
-    prompt = f"""You are an expert private equity fund accountant. Carefully analyze this quarterly report, financial statement, or capital account statement and extract the financial performance metrics.
+def analyze_capital_call_pdf_with_ai(pdf_bytes: bytes) -> dict:
+    """Analyze a notice, reusing the result for a file that was already analyzed."""
+    args = (hashlib.sha256(pdf_bytes).hexdigest(), OPENROUTER_MODEL, CAPITAL_CALL_NOTICE_PROMPT, pdf_bytes)
+    return evict_if_incomplete(analyze_capital_call_pdf_cached(*args), analyze_capital_call_pdf_cached, CAPITAL_CALL_REQUIRED_KEYS, *args)
+
+@st.cache_data(persist="disk", max_entries=100, show_spinner=False)
+def analyze_capital_call_pdf_cached(pdf_sha: str, model: str, system_prompt: str, _pdf_bytes: bytes) -> dict:
+    # model and system_prompt are part of the key, so editing either re-runs the analysis.
+    pdf_text = extract_pdf_text_cached(pdf_sha, _pdf_bytes)
+    user_text = f"NOTICE TEXT:\n{pdf_text}"
+    return orjson.loads(call_openrouter_json(system_prompt, user_text, max_tokens=2000, model=model))
+
+QUARTERLY_REPORT_PROMPT = """You are an expert private equity fund accountant. Carefully analyze this quarterly report, financial statement, or capital account statement and extract the financial performance metrics.
 Pay special attention to tables like "Fund Performance: Investments" or "Gross returns" which have columns such as "Capital invested", "Realised", "Unrealised", "Total", "Multiple", "IRR".
 For capital account statements:
 - Treat "Ending Capital Account Balance" as NAV.
@@ -555,7 +627,7 @@ For capital account statements:
 - If explicit TVPI/MOIC/IRR fields are missing, return null, not 0. The app will derive valid multiples from NAV, paid-in capital, and distributions.
 
 Return ONLY a valid JSON object with these exact keys (use null if a specific metric is not found):
-{{
+{
     "year": number (e.g., 2025, derived from the report date),
     "quarter": number (1, 2, 3, or 4),
     "report_date": "YYYY-MM-DD",
@@ -588,49 +660,24 @@ Return ONLY a valid JSON object with these exact keys (use null if a specific me
     "net_irr": number or null,
     "investments_vs_expenses": "detailed breakdown of investment vs expense components",
     "special_reallocations": "any special reallocations or adjustments mentioned"
-}}
+}
 
-CRITICAL: Return ONLY the JSON object. No markdown code blocks, no backticks, no explanation text before or after. Just the raw JSON starting with {{ and ending with }}.
+CRITICAL: Return ONLY the JSON object. No markdown code blocks, no backticks, no explanation text before or after. Just the raw JSON starting with { and ending with }."""
 
-REPORT TEXT:
-{report_text}"""
+QUARTERLY_REPORT_REQUIRED_KEYS = ("year", "quarter")
 
-    payload = {
-        "model": "anthropic/claude-sonnet-4",
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 1000
-    }
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://octo-dashboard.streamlit.app"
-    }
-    
+def analyze_quarterly_report_with_ai(report_text: str) -> dict:
+    """Analyze report text, reusing the result for text that was already analyzed."""
+    args = (report_text, OPENROUTER_MODEL, QUARTERLY_REPORT_PROMPT)
+    return evict_if_incomplete(analyze_quarterly_report_cached(*args), analyze_quarterly_report_cached, QUARTERLY_REPORT_REQUIRED_KEYS, *args)
+
+@st.cache_data(persist="disk", max_entries=100, show_spinner=False)
+def analyze_quarterly_report_cached(report_text: str, model: str, system_prompt: str) -> dict:
+    # model and system_prompt are part of the key, so editing either re-runs the analysis.
+    user_text = f"REPORT TEXT:\n{report_text}"
     try:
-        resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=90)
-        if resp.status_code != 200:
-            raise Exception(f"OpenRouter error {resp.status_code}: {resp.text[:300]}")
-        
-        content = resp.json()["choices"][0]["message"]["content"].strip()
-        
-        if "```" in content:
-            parts = content.split("```")
-            for part in parts:
-                part = part.strip()
-                if part.startswith("json"):
-                    part = part[4:].strip()
-                if part.startswith("{") and part.endswith("}"):
-                    content = part
-                    break
-        
-        content = content.strip()
-        
-        start = content.find("{")
-        end = content.rfind("}") + 1
-        if start != -1 and end > start:
-            content = content[start:end]
-        
-        result = normalize_quarterly_report_metrics(json.loads(content))
+        content = call_openrouter_json(system_prompt, user_text, max_tokens=1000, model=model)
+        result = normalize_quarterly_report_metrics(orjson.loads(content))
         return result
         
     except json.JSONDecodeError as e:
@@ -645,90 +692,42 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""
+@st.cache_resource(show_spinner=False)
+def load_app_css() -> str:
+    """Read the global stylesheet from assets/ once per process."""
+    return (Path(__file__).parent / "assets" / "app.css").read_text(encoding="utf-8")
+
+st.markdown(f"""
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;700&display=swap">
 <style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;700&display=swap');
-    * { font-family: 'Inter', sans-serif; }
-    h1 { font-size: 24px !important; margin-bottom: 0.5rem !important; }
-    h2 { font-size: 20px !important; }
-    h3 { font-size: 18px !important; }
-    p, label, h1, h2, h3, h4, h5, h6, a, li, input, textarea, button, [data-testid="stMetricValue"] {
-        font-family: 'Inter', sans-serif !important;
-    }
-    [data-testid="stExpander"] summary p { font-family: 'Inter', sans-serif !important; }
-    [data-testid="stExpanderToggleIcon"], [data-testid="stExpanderToggleIcon"] *,
-    [data-testid="stIconMaterial"], .material-symbols-rounded, .material-icons, i, svg {
-        font-family: 'Material Symbols Rounded', 'Material Icons' !important;
-        font-feature-settings: 'liga' !important;
-        -webkit-font-feature-settings: 'liga' !important;
-        text-transform: none !important; letter-spacing: normal !important;
-    }
-    [data-testid="stExpanderToggleIcon"] { max-width: 24px !important; overflow: hidden !important; white-space: nowrap !important; }
-    .stApp, [data-testid="stAppViewContainer"], [data-testid="stHeader"], section[data-testid="stSidebar"] + div { 
-        background-color: #0f1117 !important; color: #e2e8f0 !important;
-    }
-    p, span, label, div { color: #e2e8f0; }
-    [data-testid="stExpander"] summary { 
-        color: #e2e8f0 !important; display: flex !important;
-        align-items: center !important; gap: 8px !important;
-    }
-    [data-testid="stExpander"] { 
-        background: #1a1a2e !important; border: 1px solid #0f3460 !important;
-        border-radius: 10px !important; margin-bottom: 8px !important;
-    }
-    [data-testid="stSelectbox"] > div > div, [data-testid="stSelectbox"] > div > div > div,
-    [data-testid="stSelectbox"] span:not(.material-symbols-rounded) { 
-        background-color: #1e293b !important; color: #e2e8f0 !important; border-color: #334155 !important;
-    }
-    [data-baseweb="popover"], [data-baseweb="popover"] > div, [data-baseweb="popover"] > div > div { background-color: #1e293b !important; }
-    [data-baseweb="select"] > div, [data-baseweb="menu"], [data-baseweb="menu"] > div, [data-baseweb="menu"] ul {
-        background-color: #1e293b !important; border: 1px solid #334155 !important;
-    }
-    [data-baseweb="menu"] * { color: #e2e8f0 !important; }
-    ul[data-testid="stSelectboxVirtualDropdown"], [role="listbox"], [role="listbox"] > div, [role="listbox"] li { 
-        background-color: #1e293b !important; border-color: #334155 !important;
-    }
-    [role="option"] { background-color: #1e293b !important; color: #e2e8f0 !important; }
-    [role="option"]:hover, [role="option"][aria-selected="true"] { background-color: #0f3460 !important; }
-    [role="option"] * { color: #e2e8f0 !important; background-color: transparent !important; }
-    li[class*="option"], div[class*="option"] { background-color: #1e293b !important; color: #e2e8f0 !important; }
-    [data-testid="metric-container"] {
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-        border: 1px solid #0f3460; border-radius: 12px; padding: 12px; overflow: hidden;
-    }
-    [data-testid="metric-container"] label, [data-testid="metric-container"] div { 
-        color: #94a3b8 !important; font-size: 13px !important;
-    }
-    [data-testid="metric-container"] [data-testid="stMetricValue"] { 
-        font-size: 0.95rem !important; 
-    }
-    [data-testid="stMetricValue"] {
-        color: #ffffff !important; font-weight: 700 !important; 
-        white-space: nowrap !important;
-        overflow: visible !important;
-        line-height: 1.2 !important;
-    }
-    [data-testid="stSidebar"] { background: #0f1117 !important; }
-    [data-testid="stTabs"] [role="tab"] { color: #94a3b8 !important; }
-    [data-testid="stTabs"] [role="tab"][aria-selected="true"] { color: #ffffff !important; border-bottom-color: #3b82f6 !important; }
-    [data-testid="stTextInput"] input, [data-testid="stNumberInput"] input,
-    [data-testid="stTextArea"] textarea, [data-testid="stDateInput"] input { 
-        background: #1e293b !important; color: #e2e8f0 !important; border-color: #334155 !important;
-    }
-    [data-testid="stDataFrame"] { color: #e2e8f0 !important; }
-    [data-testid="stCaptionContainer"] { color: #94a3b8 !important; }
-    hr { border-color: #1e293b !important; }
-    .dashboard-header {
-        background: linear-gradient(90deg, #1a1a2e, #0f3460); padding: 20px 30px; border-radius: 12px; margin-bottom: 24px;
-    }
+{load_app_css()}
 </style>
 """, unsafe_allow_html=True)
 
+SUPABASE_TIMEOUT_SEC = 10
+
 def get_supabase() -> Client:
+    # One client per browser session, not st.cache_resource: sign_in_with_password
+    # stores the user's auth session on the client, so a process-wide client would
+    # share one user's JWT with every session. Auth, PostgREST and storage share a
+    # single HTTP/2 keep-alive httpx pool, so reruns reuse the connection.
     if "sb_client" not in st.session_state:
         url = st.secrets["supabase"]["url"]
         key = st.secrets["supabase"]["key"]
-        st.session_state.sb_client = create_client(url, key)
+        http_client = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            timeout=SUPABASE_TIMEOUT_SEC,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        options = ClientOptions(
+            postgrest_client_timeout=SUPABASE_TIMEOUT_SEC,
+            storage_client_timeout=SUPABASE_TIMEOUT_SEC,
+            httpx_client=http_client,
+        )
+        st.session_state.sb_client = create_client(url, key, options=options)
     return st.session_state.sb_client
 
 def get_saved_fx_rate():
@@ -746,9 +745,22 @@ def update_saved_fx_rate(new_rate):
     except Exception as e:
         st.error(f"Failed to save FX rate: {e}")
 
-def clear_cache_and_rerun():
-    st.cache_data.clear()
-    st.rerun()
+def clear_cache_and_rerun(*fetchers, scope="app"):
+    """Drop cached data and rerun; with fetchers given, only those caches are cleared.
+
+    Pass scope="fragment" from inside an @st.fragment to rerun just that fragment.
+    """
+    if fetchers:
+        for fetcher in fetchers:
+            fetcher.clear()
+        if DEADLINE_SOURCE_FETCHERS.intersection(fetchers):
+            fetch_upcoming_deadlines.clear()
+        if LP_SUMMARY_SOURCE_FETCHERS.intersection(fetchers):
+            fetch_lp_call_summary.clear()
+    else:
+        clear_data_caches()
+    reset_session_memo()
+    st.rerun(scope=scope)
 
 def convert_df_to_excel(df: pd.DataFrame) -> bytes:
     output = io.BytesIO()
@@ -881,8 +893,8 @@ def generate_master_excel_bytes() -> bytes:
                 rate = st.session_state.eur_usd_rate if f.get("currency") == "EUR" else 1.0
                 c_val = commitment_value(f)
                 total_commit_usd += c_val * rate
-                f_calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-                f_dists = [d for d in all_dists if d["fund_id"] == f["id"]]
+                f_calls = get_capital_calls(f["id"])
+                f_dists = get_distributions(f["id"])
                 metrics = calculate_fund_metrics(f, f_calls, f_dists)
                 called = metrics["total_called"]
                 total_called_basis_usd += called * rate
@@ -1019,8 +1031,8 @@ def generate_master_excel_bytes() -> bytes:
 
         status_rows = []
         for f in funds:
-            f_calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-            f_dists = [d for d in all_dists if d["fund_id"] == f["id"]]
+            f_calls = get_capital_calls(f["id"])
+            f_dists = get_distributions(f["id"])
             f_metrics = calculate_fund_metrics(f, f_calls, f_dists)
             total_called = f_metrics["total_called"]
             c_val = commitment_value(f)
@@ -1089,9 +1101,9 @@ def generate_master_excel_bytes() -> bytes:
             sheet_name = safe_sheet_name(f.get("name"), used_sheet_names)
             ws = writer.book.create_sheet(sheet_name)
             writer.sheets[sheet_name] = ws
-            f_calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-            f_dists = [d for d in all_dists if d["fund_id"] == f["id"]]
-            f_reports = [r for r in all_reports if r["fund_id"] == f["id"]]
+            f_calls = get_capital_calls(f["id"])
+            f_dists = get_distributions(f["id"])
+            f_reports = get_quarterly_reports(f["id"])
             f_metrics = calculate_fund_metrics(f, f_calls, f_dists)
             c_val = f_metrics["commitment"]
             total_called = f_metrics["total_called"]
@@ -1175,8 +1187,8 @@ def generate_master_excel_bytes() -> bytes:
         if funds:
             funds_list = []
             for f in funds:
-                calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-                dists = [d for d in all_dists if d["fund_id"] == f["id"]]
+                calls = get_capital_calls(f["id"])
+                dists = get_distributions(f["id"])
                 metrics = calculate_fund_metrics(f, calls, dists)
                 total_called = metrics["total_called"]
                 funds_list.append({
@@ -1196,7 +1208,7 @@ def generate_master_excel_bytes() -> bytes:
         
         investors = get_investors()
         lp_calls = get_lp_calls()
-        payments = get_lp_payments()
+        payments_by_key = get_lp_payments_by_key()
         if investors:
             data = []
             for inv in investors:
@@ -1206,7 +1218,7 @@ def generate_master_excel_bytes() -> bytes:
                 }
                 for c in lp_calls:
                     col_name = f"{c['call_date']} ({c['call_pct']}%)"
-                    payment = next((p for p in payments if p["lp_call_id"] == c["id"] and p["investor_id"] == inv["id"]), None)
+                    payment = payments_by_key.get((c["id"], inv["id"]))
                     row[col_name] = "Paid" if (payment and payment["is_paid"]) else "Unpaid"
                 data.append(row)
             pd.DataFrame(data).to_excel(writer, index=False, sheet_name='Investors & Calls')
@@ -1236,119 +1248,291 @@ def generate_master_excel_bytes() -> bytes:
             
     return output.getvalue()
 
+AUDIT_FLUSH_INTERVAL_SEC = 0.5
+AUDIT_QUEUE_MAXSIZE = 1000
+
+def write_audit_batches(audit_queue: queue.Queue):
+    """Drain queued audit rows forever, one bulk insert per client every flush interval."""
+    while True:
+        batch = [audit_queue.get()]
+        # The thread is started once per process, so no failure may end the loop.
+        try:
+            time.sleep(AUDIT_FLUSH_INTERVAL_SEC)
+            while True:
+                try:
+                    batch.append(audit_queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Rows keep the writer's own client so inserts run under that user's auth.
+            rows_by_client = defaultdict(list)
+            clients = {}
+            for sb, row in batch:
+                rows_by_client[id(sb)].append(row)
+                clients[id(sb)] = sb
+            for client_id, rows in rows_by_client.items():
+                sb = clients[client_id]
+                try:
+                    sb.table("audit_logs").insert(rows).execute()
+                except Exception:
+                    # Retry one by one so a single bad row only loses itself.
+                    for row in rows:
+                        try:
+                            sb.table("audit_logs").insert(row).execute()
+                        except Exception:
+                            pass
+            # Callers rerun before this flush, so the writer owns the audit cache clear.
+            fetch_all_audit_logs.clear()
+        except Exception:
+            pass
+
+@st.cache_resource(show_spinner=False)
+def get_audit_queue() -> queue.Queue:
+    """Process-wide audit queue and its daemon writer thread, started once."""
+    audit_queue = queue.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+    threading.Thread(target=write_audit_batches, args=(audit_queue,), name="audit-log-writer", daemon=True).start()
+    return audit_queue
+
 def log_action(action: str, table_name: str, details: str, old_data: dict = None):
     try:
-        sb = get_supabase()
-        username = st.session_state.get("username", "system")
-        sb.table("audit_logs").insert({
-            "username": username,
+        get_audit_queue().put_nowait((get_supabase(), {
+            "username": st.session_state.get("username", "system"),
             "action": action,
             "table_name": table_name,
             "details": details,
-            "old_data": old_data or {}
-        }).execute()
+            "old_data": dict(old_data or {})
+        }))
     except Exception:
         pass
 
 def current_cache_user_key():
     return st.session_state.get("user_email") or st.session_state.get("username") or "anonymous"
 
-@st.cache_data(ttl=600)
+def session_memo(name, loader):
+    """Reuse a getter result for the rest of the current rerun (reset in main())."""
+    memo = st.session_state.setdefault("_data_memo", {})
+    if name not in memo:
+        memo[name] = loader()
+    return memo[name]
+
+def reset_session_memo():
+    st.session_state["_data_memo"] = {}
+
+def ui_flags() -> dict:
+    """Confirm/edit toggles for list rows, keyed by (flag, row id) in one dict."""
+    return st.session_state.setdefault("ui_flags", {})
+
+def set_ui_flag(flag: str, row_id):
+    """Button callback: raise a row toggle before the rerun that the click triggers."""
+    ui_flags()[(flag, row_id)] = True
+
+def clear_ui_flag(flag: str, row_id):
+    """Button callback: drop a row toggle, so cancel needs no extra st.rerun()."""
+    ui_flags().pop((flag, row_id), None)
+
+def rows_by_key(name, rows, key):
+    """Bucket rows by a foreign key once per rerun so per-fund lookups are O(1)."""
+    def build():
+        buckets = defaultdict(list)
+        for row in rows:
+            buckets[row.get(key)].append(row)
+        return buckets
+    return session_memo(f"{name}_by_{key}", build)
+
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_funds(_sb, user_key):
     try: return _sb.table("funds").select("*").order("name").execute().data or []
     except Exception as e: st.error(f"Error loading funds: {e}"); return []
 
 def get_funds():
-    return fetch_all_funds(get_supabase(), current_cache_user_key())
+    return session_memo("funds", lambda: fetch_all_funds(get_supabase(), current_cache_user_key()))
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_capital_calls(_sb, user_key):
     try: return _sb.table("capital_calls").select("*").order("call_number").execute().data or []
     except: return []
 
 def get_capital_calls(fund_id=None):
-    data = fetch_all_capital_calls(get_supabase(), current_cache_user_key())
-    if fund_id: return [d for d in data if d["fund_id"] == fund_id]
+    data = session_memo("capital_calls", lambda: fetch_all_capital_calls(get_supabase(), current_cache_user_key()))
+    if fund_id: return list(rows_by_key("capital_calls", data, "fund_id").get(fund_id, []))
     return data
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_distributions(_sb, user_key):
     try: return _sb.table("distributions").select("*").order("dist_date").execute().data or []
     except: return []
 
 def get_distributions(fund_id=None):
-    data = fetch_all_distributions(get_supabase(), current_cache_user_key())
-    if fund_id: return [d for d in data if d["fund_id"] == fund_id]
+    data = session_memo("distributions", lambda: fetch_all_distributions(get_supabase(), current_cache_user_key()))
+    if fund_id: return list(rows_by_key("distributions", data, "fund_id").get(fund_id, []))
     return data
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_quarterly_reports(_sb, user_key):
     try: return _sb.table("quarterly_reports").select("*").order("year,quarter").execute().data or []
     except: return []
 
 def get_quarterly_reports(fund_id=None):
-    data = fetch_all_quarterly_reports(get_supabase(), current_cache_user_key())
-    if fund_id: return [d for d in data if d["fund_id"] == fund_id]
+    data = session_memo("quarterly_reports", lambda: fetch_all_quarterly_reports(get_supabase(), current_cache_user_key()))
+    if fund_id: return list(rows_by_key("quarterly_reports", data, "fund_id").get(fund_id, []))
     return data
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_pipeline_funds(_sb, user_key):
     try: return _sb.table("pipeline_funds").select("*").order("target_close_date").execute().data or []
     except: return []
 
 def get_pipeline_funds():
-    return fetch_all_pipeline_funds(get_supabase(), current_cache_user_key())
+    return session_memo("pipeline_funds", lambda: fetch_all_pipeline_funds(get_supabase(), current_cache_user_key()))
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_gantt_tasks(_sb, user_key):
     try: return _sb.table("gantt_tasks").select("*").order("start_date").execute().data or []
     except: return []
 
 def get_gantt_tasks(pipeline_fund_id=None):
-    data = fetch_all_gantt_tasks(get_supabase(), current_cache_user_key())
-    if pipeline_fund_id: return [d for d in data if d["pipeline_fund_id"] == pipeline_fund_id]
+    data = session_memo("gantt_tasks", lambda: fetch_all_gantt_tasks(get_supabase(), current_cache_user_key()))
+    if pipeline_fund_id: return list(rows_by_key("gantt_tasks", data, "pipeline_fund_id").get(pipeline_fund_id, []))
     return data
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_investors(_sb, user_key):
     try: return _sb.table("investors").select("*").execute().data or []
     except: return []
 
 def get_investors():
-    return fetch_all_investors(get_supabase(), current_cache_user_key())
+    return session_memo("investors", lambda: fetch_all_investors(get_supabase(), current_cache_user_key()))
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_lp_calls(_sb, user_key):
     try: return _sb.table("lp_calls").select("*").order("call_date").execute().data or []
     except: return []
 
 def get_lp_calls():
-    return fetch_all_lp_calls(get_supabase(), current_cache_user_key())
+    return session_memo("lp_calls", lambda: fetch_all_lp_calls(get_supabase(), current_cache_user_key()))
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_lp_payments(_sb, user_key):
-    try: return _sb.table("lp_payments").select("*").execute().data or []
+    try: return _sb.table("lp_payments").select("lp_call_id,investor_id,is_paid").execute().data or []
     except: return []
 
 def get_lp_payments():
-    return fetch_all_lp_payments(get_supabase(), current_cache_user_key())
+    return session_memo("lp_payments", lambda: fetch_all_lp_payments(get_supabase(), current_cache_user_key()))
+
+def get_lp_payments_by_key():
+    """LP payments indexed by (lp_call_id, investor_id), built once per rerun."""
+    return session_memo("lp_payments_by_key", lambda: {(p["lp_call_id"], p["investor_id"]): p for p in get_lp_payments()})
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_lp_call_summary(_sb, user_key):
+    # Errors propagate so they are not cached; get_lp_call_summary_by_call() reports them.
+    return _sb.table("lp_call_summary").select("lp_call_id,total_called,total_paid").execute().data or []
+
+def load_lp_call_summary_by_call():
+    try:
+        rows = fetch_lp_call_summary(get_supabase(), current_cache_user_key())
+    except Exception as e:
+        # Usually a missing lp_call_summary view (rpc_functions.sql not applied).
+        if not st.session_state.get("lp_summary_error_shown"):
+            st.session_state.lp_summary_error_shown = True
+            st.warning(f"LP collection totals are unavailable: {e}")
+        rows = []
+    return {row["lp_call_id"]: row for row in rows}
+
+def get_lp_call_summary_by_call():
+    """Server-side collection totals from the lp_call_summary view, keyed by LP call id."""
+    return session_memo("lp_call_summary", load_lp_call_summary_by_call)
+
+def render_fof_collection_summary(lp_calls, total_fund_commitment, currency_sym="$"):
+    """KPI row and per-call table for LP collections, from the lp_call_summary view."""
+    summary_by_call = get_lp_call_summary_by_call()
+    call_totals = [summary_by_call.get(c["id"], {}) for c in lp_calls]
+    called_amounts = np.fromiter((float(t.get("total_called") or 0) for t in call_totals), dtype=np.float64, count=len(lp_calls))
+    paid_amounts = np.fromiter((float(t.get("total_paid") or 0) for t in call_totals), dtype=np.float64, count=len(lp_calls))
+    outstanding_amounts = called_amounts - paid_amounts
+
+    total_called_cum = float(called_amounts.sum())
+    total_received_cum = float(paid_amounts.sum())
+    total_outstanding_cum = total_called_cum - total_received_cum
+    called_pct_overall = (total_called_cum / total_fund_commitment * 100) if total_fund_commitment > 0 else 0.0
+    received_pct_overall = (total_received_cum / total_fund_commitment * 100) if total_fund_commitment > 0 else 0.0
+
+    col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
+    with col_sum1:
+        st.metric("Total LP Commitments", format_currency(total_fund_commitment, currency_sym))
+    with col_sum2:
+        st.metric("Total Called to Date", format_currency(total_called_cum, currency_sym), f"{called_pct_overall:.1f}% of commitments")
+    with col_sum3:
+        st.metric("Total Received to Date", format_currency(total_received_cum, currency_sym), f"{received_pct_overall:.1f}% of commitments")
+    with col_sum4:
+        st.metric("Outstanding", format_currency(total_outstanding_cum, currency_sym))
+
+    if lp_calls:
+        st.dataframe(pd.DataFrame({
+            "Call": [f"{c['call_date']} ({c['call_pct']}%)" for c in lp_calls],
+            "Total Required": [format_currency(float(v), currency_sym) for v in called_amounts],
+            "Total Received": [format_currency(float(v), currency_sym) for v in paid_amounts],
+            "Outstanding Balance": [format_currency(float(v), currency_sym) for v in outstanding_amounts],
+        }), use_container_width=True, hide_index=True)
+    else:
+        st.info("No active capital calls yet.")
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_audit_logs(_sb, user_key):
     try: return _sb.table("audit_logs").select("*").order("created_at", desc=True).limit(100).execute().data or []
     except: return []
 
 def get_audit_logs():
-    return fetch_all_audit_logs(get_supabase(), current_cache_user_key())
+    return session_memo("audit_logs", lambda: fetch_all_audit_logs(get_supabase(), current_cache_user_key()))
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=600, show_spinner=False)
 def fetch_all_operating_expenses(_sb, user_key):
     try: return _sb.table("fund_operating_expenses").select("*").order("expense_date", desc=True).execute().data or []
     except: return []
 
 def get_operating_expenses():
-    return fetch_all_operating_expenses(get_supabase(), current_cache_user_key())
+    return session_memo("operating_expenses", lambda: fetch_all_operating_expenses(get_supabase(), current_cache_user_key()))
+
+ALERT_HORIZON_DAYS = 14
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_upcoming_deadlines(_sb, user_key, today_iso):
+    # Errors propagate so they are not cached; get_upcoming_deadlines() reports them.
+    return _sb.rpc("get_upcoming_deadlines", {"p_today": today_iso, "horizon_days": ALERT_HORIZON_DAYS}).execute().data or []
+
+def get_upcoming_deadlines(today):
+    # Not session_memo'd: the alerts fragment reruns on its own timer, after main() last reset the memo.
+    try:
+        return fetch_upcoming_deadlines(get_supabase(), current_cache_user_key(), today.isoformat())
+    except Exception as e:
+        # Usually a missing get_upcoming_deadlines RPC (rpc_functions.sql not applied).
+        if not st.session_state.get("deadlines_error_shown"):
+            st.session_state.deadlines_error_shown = True
+            st.warning(f"Deadline alerts are unavailable: {e}")
+        return []
+
+# Every per-user Supabase fetch. Clearing these instead of st.cache_data.clear()
+# keeps the disk-persisted PDF text and AI extraction caches across logins.
+DATA_FETCHERS = (
+    fetch_all_funds, fetch_all_capital_calls, fetch_all_distributions, fetch_all_quarterly_reports,
+    fetch_all_pipeline_funds, fetch_all_gantt_tasks, fetch_all_investors, fetch_all_lp_calls,
+    fetch_all_lp_payments, fetch_lp_call_summary, fetch_all_audit_logs, fetch_all_operating_expenses,
+    fetch_upcoming_deadlines,
+)
+
+def clear_data_caches():
+    for fetcher in DATA_FETCHERS:
+        fetcher.clear()
 
+# clear_cache_and_rerun() also drops the LP collection summary when any of these change.
+LP_SUMMARY_SOURCE_FETCHERS = frozenset({fetch_all_investors, fetch_all_lp_calls, fetch_all_lp_payments})
+
+# clear_cache_and_rerun() also drops the deadlines cache when any of these change.
+DEADLINE_SOURCE_FETCHERS = frozenset({
+    fetch_all_funds, fetch_all_capital_calls, fetch_all_lp_calls,
+    fetch_all_pipeline_funds, fetch_all_gantt_tasks,
+})
+
+@st.fragment(run_every=300)
 def check_and_show_alerts():
     if "dismissed_banners" not in st.session_state:
         st.session_state.dismissed_banners = set()
@@ -1356,104 +1540,86 @@ def check_and_show_alerts():
         st.session_state.shown_toasts = set()
 
     today = date.today()
-    funds_dict = {f["id"]: f for f in get_funds()}
-    pipe_dict = {f["id"]: f["name"] for f in get_pipeline_funds()}
-
     upcoming_fund_events = {}
-    for cc in get_capital_calls():
-        if not cc.get("payment_date"): continue
-        try:
-            deadline = datetime.strptime(str(cc["payment_date"]).split("T")[0], "%Y-%m-%d").date()
-            if deadline >= today:
-                key = (cc["fund_id"], deadline)
-                if key not in upcoming_fund_events:
-                    upcoming_fund_events[key] = {
-                        "fund_name": funds_dict.get(cc["fund_id"], {}).get("name", "Unknown Fund"),
-                        "currency": funds_dict.get(cc["fund_id"], {}).get("currency", "USD"),
-                        "net_wire": 0.0,
-                        "days_left": (deadline - today).days
-                    }
-                
-                tx_type = cc.get("transaction_type", "call")
-                amt = float(cc.get("amount", 0))
-                interest = float(cc.get("equalisation_interest", 0))
-                
-                if tx_type == "call":
-                    upcoming_fund_events[key]["net_wire"] += (amt + interest)
-                else: 
-                    upcoming_fund_events[key]["net_wire"] -= amt
-        except: continue
+    lp_call_rows, task_rows = [], []
+    for row in get_upcoming_deadlines(today):
+        deadline = parse_iso_date(row.get("deadline"))
+        if deadline is None: continue
+        days_left = (deadline - today).days
+        source = row.get("source")
+        if source == "capital_call":
+            key = (row["owner_id"], deadline)
+            if key not in upcoming_fund_events:
+                upcoming_fund_events[key] = {
+                    "fund_name": row.get("owner_name") or "Unknown Fund",
+                    "currency": row.get("currency") or "USD",
+                    "net_wire": 0.0,
+                    "days_left": days_left
+                }
+            amt = float(row.get("amount") or 0)
+            interest = float(row.get("equalisation_interest") or 0)
+            if row.get("transaction_type", "call") == "call":
+                upcoming_fund_events[key]["net_wire"] += (amt + interest)
+            else:
+                upcoming_fund_events[key]["net_wire"] -= amt
+        elif source == "lp_call":
+            lp_call_rows.append((row, days_left))
+        elif source == "gantt_task":
+            task_rows.append((row, days_left))
 
     for key, data in upcoming_fund_events.items():
         days_left = data["days_left"]
-        if 0 <= days_left <= 14:
-            fname = data["fund_name"]
-            sym = "€" if data["currency"] == "EUR" else "$"
-            amt = format_currency(data["net_wire"], sym)
-            
-            if days_left in [0, 1]:
-                alert_id = f"net_banner_{key[0]}_{key[1]}"
-                if alert_id not in st.session_state.dismissed_banners:
-                    c1, c2 = st.columns([15, 1])
-                    with c1:
-                        if days_left == 0:
-                            st.error(f"🚨 **Today!** Capital Call deadline for **{fname}** amounting to **{amt}**.")
-                        else:
-                            st.warning(f"⚠️ **Tomorrow!** Capital Call deadline for **{fname}** amounting to **{amt}**.")
-                    with c2:
-                        if st.button("✖", key=f"btn_{alert_id}", help="Dismiss Alert"):
-                            st.session_state.dismissed_banners.add(alert_id)
-                            st.rerun()
-            else:
-                alert_id = f"net_toast_{key[0]}_{key[1]}_{days_left}"
-                if alert_id not in st.session_state.shown_toasts:
-                    st.toast(f"🔔 Upcoming: Capital Call for {fname} in {days_left} days. Wire: {amt}", icon="💸")
-                    st.session_state.shown_toasts.add(alert_id)
-
-    for lpc in get_lp_calls():
-        if not lpc.get("call_date"): continue
-        try:
-            deadline = datetime.strptime(str(lpc["call_date"]).split("T")[0], "%Y-%m-%d").date()
-            days_left = (deadline - today).days
-        except: continue
-
-        if 0 <= days_left <= 14:
-            if days_left in [0, 1]:
-                alert_id = f"lpc_banner_{lpc['id']}_{days_left}"
-                if alert_id not in st.session_state.dismissed_banners:
-                    c1, c2 = st.columns([15, 1])
-                    with c1:
-                        if days_left == 0:
-                            st.error(f"🚨 **Today!** Target date for LP capital collection ({lpc.get('call_pct')}% call).")
-                        else:
-                            st.warning(f"⚠️ **Tomorrow!** Target date for LP capital collection ({lpc.get('call_pct')}% call).")
-                    with c2:
-                        if st.button("✖", key=f"btn_{alert_id}", help="Dismiss Alert"):
-                            st.session_state.dismissed_banners.add(alert_id)
-                            st.rerun()
-            else:
-                alert_id = f"lpc_toast_{lpc['id']}_{days_left}"
-                if alert_id not in st.session_state.shown_toasts:
-                    st.toast(f"🔔 Upcoming: LP Collection target in {days_left} days.", icon="👥")
-                    st.session_state.shown_toasts.add(alert_id)
-
-    all_tasks = get_gantt_tasks()
-    active_tasks = [t for t in all_tasks if t.get("status") != "done"]
-    for t in active_tasks:
-        if not t.get("due_date"): continue
-        try:
-            deadline = datetime.strptime(str(t["due_date"]).split("T")[0], "%Y-%m-%d").date()
-            days_left = (deadline - today).days
-        except: continue
+        fname = data["fund_name"]
+        sym = "€" if data["currency"] == "EUR" else "$"
+        amt = format_currency(data["net_wire"], sym)
+
+        if days_left in [0, 1]:
+            alert_id = f"net_banner_{key[0]}_{key[1]}"
+            if alert_id not in st.session_state.dismissed_banners:
+                c1, c2 = st.columns([15, 1])
+                with c1:
+                    if days_left == 0:
+                        st.error(f"🚨 **Today!** Capital Call deadline for **{fname}** amounting to **{amt}**.")
+                    else:
+                        st.warning(f"⚠️ **Tomorrow!** Capital Call deadline for **{fname}** amounting to **{amt}**.")
+                with c2:
+                    if st.button("✖", key=f"btn_{alert_id}", help="Dismiss Alert"):
+                        st.session_state.dismissed_banners.add(alert_id)
+                        st.rerun(scope="fragment")
+        else:
+            alert_id = f"net_toast_{key[0]}_{key[1]}_{days_left}"
+            if alert_id not in st.session_state.shown_toasts:
+                st.toast(f"🔔 Upcoming: Capital Call for {fname} in {days_left} days. Wire: {amt}", icon="💸")
+                st.session_state.shown_toasts.add(alert_id)
 
-        if 0 <= days_left <= 14:
-            alert_id = f"gantt_toast_{t['id']}_{days_left}"
+    for lpc, days_left in lp_call_rows:
+        if days_left in [0, 1]:
+            alert_id = f"lpc_banner_{lpc['ref_id']}_{days_left}"
+            if alert_id not in st.session_state.dismissed_banners:
+                c1, c2 = st.columns([15, 1])
+                with c1:
+                    if days_left == 0:
+                        st.error(f"🚨 **Today!** Target date for LP capital collection ({lpc.get('call_pct')}% call).")
+                    else:
+                        st.warning(f"⚠️ **Tomorrow!** Target date for LP capital collection ({lpc.get('call_pct')}% call).")
+                with c2:
+                    if st.button("✖", key=f"btn_{alert_id}", help="Dismiss Alert"):
+                        st.session_state.dismissed_banners.add(alert_id)
+                        st.rerun(scope="fragment")
+        else:
+            alert_id = f"lpc_toast_{lpc['ref_id']}_{days_left}"
             if alert_id not in st.session_state.shown_toasts:
-                p_name = pipe_dict.get(t.get("pipeline_fund_id"), "Pipeline Fund")
-                day_str = "Today" if days_left == 0 else "Tomorrow" if days_left == 1 else f"in {days_left} days"
-                st.toast(f"🗓️ Task for {p_name}: {t['task_name']} is due {day_str}!", icon="🎯")
+                st.toast(f"🔔 Upcoming: LP Collection target in {days_left} days.", icon="👥")
                 st.session_state.shown_toasts.add(alert_id)
 
+    for t, days_left in task_rows:
+        alert_id = f"gantt_toast_{t['ref_id']}_{days_left}"
+        if alert_id not in st.session_state.shown_toasts:
+            p_name = t.get("owner_name") or "Pipeline Fund"
+            day_str = "Today" if days_left == 0 else "Tomorrow" if days_left == 1 else f"in {days_left} days"
+            st.toast(f"🗓️ Task for {p_name}: {t['task_name']} is due {day_str}!", icon="🎯")
+            st.session_state.shown_toasts.add(alert_id)
+
 def show_login():
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -1479,7 +1645,7 @@ def show_login():
                 st.session_state.logged_in = True
                 st.session_state.user_email = user_email
                 st.session_state.username = user_email.split("@")[0]
-                st.cache_data.clear()
+                clear_data_caches()
                 st.rerun()
             except Exception as e:
                 st.error(f"Login Error: {str(e)}")
@@ -1490,20 +1656,22 @@ def require_login():
         st.stop()
 
 def main():
+    reset_session_memo()
     require_login()
     with st.sidebar:
         st.markdown("## 📊 Octo Dashboard")
         st.markdown("**ALT Group** | Private Capital")
         st.divider()
-        page = st.radio("Navigation", [
-            "🏠 Overview",
-            "📁 Portfolio",
-            "👥 Investors",
-            "🔍 Pipeline",
-            "📈 Reports",
-            "💼 Fund Expenses",
-            "📋 Audit Logs"
-        ], label_visibility="collapsed")
+        pages = {
+            "🏠 Overview": show_overview,
+            "📁 Portfolio": show_portfolio,
+            "👥 Investors": show_investors,
+            "🔍 Pipeline": show_pipeline,
+            "📈 Reports": show_reports,
+            "💼 Fund Expenses": show_fund_expenses,
+            "📋 Audit Logs": show_audit_logs,
+        }
+        page = st.radio("Navigation", list(pages), label_visibility="collapsed")
         
         st.divider()
         st.markdown("### 💱 FX Rate")
@@ -1549,17 +1717,11 @@ def main():
                 get_supabase().auth.sign_out()
             except:
                 pass
-            st.cache_data.clear()
+            clear_data_caches()
             st.session_state.clear()
             st.rerun()
 
-    if "Overview" in page: show_overview()
-    elif "Portfolio" in page: show_portfolio()
-    elif "Investors" in page: show_investors()
-    elif "Pipeline" in page: show_pipeline()
-    elif "Reports" in page: show_reports()
-    elif "Fund Expenses" in page: show_fund_expenses()
-    elif "Audit Logs" in page: show_audit_logs()
+    pages[page]()
 
 def show_audit_logs():
     st.title("📋 System Audit Logs")
@@ -1599,6 +1761,9 @@ def show_overview():
     all_calls = get_capital_calls()
     all_dists = get_distributions()
     all_reports = get_quarterly_reports(None)
+    calls_by_fund = rows_by_key("capital_calls", all_calls, "fund_id")
+    dists_by_fund = rows_by_key("distributions", all_dists, "fund_id")
+    fund_metrics = {}
 
     latest_reports = {}
     if all_reports:
@@ -1629,10 +1794,11 @@ def show_overview():
             c_val *= 1_000_000
         total_commit_usd += c_val * rate
         
-        f_calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-        f_dists = [d for d in all_dists if d["fund_id"] == f["id"]]
+        f_calls = calls_by_fund.get(f["id"], [])
+        f_dists = dists_by_fund.get(f["id"], [])
         
         metrics = calculate_fund_metrics(f, f_calls, f_dists)
+        fund_metrics[f["id"]] = metrics
         called = metrics["total_called"]
         total_called_basis_usd += called * rate
         total_uncalled_usd += metrics["uncalled"] * rate
@@ -1826,16 +1992,10 @@ def show_overview():
         st.subheader("📋 Funds Status")
         if funds:
             fund_data = []
-            total_commitment_usd_sum = 0.0
-            total_called_usd_sum = 0.0
-            total_cash_paid_usd_sum = 0.0
-            total_nav_usd_sum = 0.0
-
             for f in funds:
-                f_calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-                f_dists = get_distributions(f["id"])
-                f_metrics = calculate_fund_metrics(f, f_calls, f_dists)
-                total_called = f_metrics["total_called"]
+                f_calls = calls_by_fund.get(f["id"], [])
+                f_dists = dists_by_fund.get(f["id"], [])
+                total_called = fund_metrics[f["id"]]["total_called"]
                 cash_paid = 0.0
                 for c in f_calls:
                     tx_type = c.get("transaction_type", "call")
@@ -1847,49 +2007,45 @@ def show_overview():
                         cash_paid -= amount
                 cash_paid -= sum(float(d.get("amount") or 0) for d in f_dists)
 
-                c_val = float(f.get("commitment") or 0)
-                if 0 < c_val <= 1000:
-                    c_val *= 1_000_000
-
-                pct = f"{total_called/c_val*100:.1f}%" if c_val > 0 else "—"
-                currency_sym = "€" if f.get("currency") == "EUR" else "$"
-                rate = st.session_state.eur_usd_rate if f.get("currency") == "EUR" else 1.0
-
-                octo_nav = f.get("calculated_nav_local", total_called)
-
-                total_commitment_usd_sum += c_val * rate
-                total_called_usd_sum += total_called * rate
-                total_cash_paid_usd_sum += cash_paid * rate
-                total_nav_usd_sum += octo_nav * rate
-
                 fund_data.append({
                     "Fund": f["name"],
                     "Currency": f.get("currency", "USD"),
-                    "Commitment": c_val,
+                    "Commitment": float(f.get("commitment") or 0),
                     "Total Called": total_called,
                     "Cash Paid": cash_paid,
-                    "Called %": pct,
-                    "Octo NAV": octo_nav,
-                    "currency_sym": currency_sym,
-                    "nav_usd": octo_nav * rate,
+                    "Octo NAV": f.get("calculated_nav_local", total_called),
                 })
 
-            rows = []
-            for fd in fund_data:
-                nav_pct = f"{fd['nav_usd']/total_nav_usd_sum*100:.1f}%" if total_nav_usd_sum > 0 else "—"
-                rows.append({
-                    "Fund": fd["Fund"],
-                    "Currency": fd["Currency"],
-                    "Commitment": format_currency(fd["Commitment"], fd["currency_sym"]),
-                    "Total Called": format_currency(fd["Total Called"], fd["currency_sym"]) if fd["Total Called"] > 0 else "—",
-                    "Cash Paid": format_currency(fd["Cash Paid"], fd["currency_sym"]) if abs(fd["Cash Paid"]) > 0 else "—",
-                    "Called %": fd["Called %"],
-                    "Octo NAV": format_currency(fd["Octo NAV"], fd["currency_sym"]) if fd["Octo NAV"] > 0 else "—",
-                    "% of NAV": nav_pct,
-                })
+            fund_df = pd.DataFrame(fund_data)
+            fund_df["Commitment"] = fund_df["Commitment"].map(normalize_commitment_amount)
+            is_eur = (fund_df["Currency"] == "EUR").to_numpy()
+            currency_syms = np.where(is_eur, "€", "$")
+            rates = np.where(is_eur, st.session_state.eur_usd_rate, 1.0)
+            nav_usd = fund_df["Octo NAV"].to_numpy(dtype=float) * rates
+
+            total_commitment_usd_sum = float((fund_df["Commitment"].to_numpy() * rates).sum())
+            total_called_usd_sum = float((fund_df["Total Called"].to_numpy() * rates).sum())
+            total_cash_paid_usd_sum = float((fund_df["Cash Paid"].to_numpy() * rates).sum())
+            total_nav_usd_sum = float(nav_usd.sum())
+
+            def format_money_column(values, keep):
+                return [format_currency(v, sym) if k else "—" for v, sym, k in zip(values, currency_syms, keep)]
+
+            called_pct = fund_df["Total Called"] / fund_df["Commitment"].where(fund_df["Commitment"] > 0) * 100
+            nav_pct = pd.Series(nav_usd / total_nav_usd_sum * 100 if total_nav_usd_sum > 0 else np.full(len(fund_df), np.nan))
+            display_df = pd.DataFrame({
+                "Fund": fund_df["Fund"],
+                "Currency": fund_df["Currency"],
+                "Commitment": format_money_column(fund_df["Commitment"], np.ones(len(fund_df), dtype=bool)),
+                "Total Called": format_money_column(fund_df["Total Called"], fund_df["Total Called"] > 0),
+                "Cash Paid": format_money_column(fund_df["Cash Paid"], fund_df["Cash Paid"].abs() > 0),
+                "Called %": called_pct.map("{:.1f}%".format).where(called_pct.notna(), "—"),
+                "Octo NAV": format_money_column(fund_df["Octo NAV"], fund_df["Octo NAV"] > 0),
+                "% of NAV": nav_pct.map("{:.1f}%".format).where(nav_pct.notna(), "—"),
+            })
 
             overall_called_pct = f"{total_called_usd_sum/total_commitment_usd_sum*100:.1f}%" if total_commitment_usd_sum > 0 else "—"
-            rows.append({
+            total_row = pd.DataFrame([{
                 "Fund": "TOTAL (USD Eqv)",
                 "Currency": "—",
                 "Commitment": format_currency(total_commitment_usd_sum, "$"),
@@ -1898,13 +2054,14 @@ def show_overview():
                 "Called %": overall_called_pct,
                 "Octo NAV": format_currency(total_nav_usd_sum, "$") if total_nav_usd_sum > 0 else "—",
                 "% of NAV": "100.0%" if total_nav_usd_sum > 0 else "—",
-            })
+            }])
+            rows = pd.concat([display_df, total_row], ignore_index=True)
 
             def _highlight_total(row):
                 is_total = row["Fund"] == "TOTAL (USD Eqv)"
                 return ["font-weight: bold; border-top: 2px solid #475569" if is_total else "" for _ in row]
 
-            styled = pd.DataFrame(rows).style.apply(_highlight_total, axis=1)
+            styled = rows.style.apply(_highlight_total, axis=1)
             st.dataframe(styled, width="stretch", hide_index=True)
         else:
             st.info("No funds in the system") 
@@ -1914,32 +2071,37 @@ def show_overview():
         today = date.today()
         upcoming_events = {}
         
-        for f in funds:
-            f_calls = [c for c in all_calls if c["fund_id"] == f["id"]]
-            for c in f_calls:
-                if not c.get("payment_date"): continue
+        # Parse every payment date in one pandas pass, then walk only future calls.
+        dated_calls = [(f, c) for f in funds for c in calls_by_fund.get(f["id"], []) if c.get("payment_date")]
+        if dated_calls:
+            pay_dates = pd.to_datetime(
+                pd.Series([c["payment_date"] for _, c in dated_calls]).astype(str).str.split("T").str[0],
+                format="%Y-%m-%d", errors="coerce",
+            )
+            is_upcoming = (pay_dates >= pd.Timestamp(today)).to_numpy()
+            for (f, c), p_ts, upcoming in zip(dated_calls, pay_dates, is_upcoming):
+                if not upcoming: continue
                 try:
-                    p_date = datetime.strptime(str(c.get("payment_date")).split("T")[0], "%Y-%m-%d").date()
-                    if p_date >= today:
-                        key = (f["id"], p_date)
-                        if key not in upcoming_events:
-                            upcoming_events[key] = {
-                                "fund_name": f["name"],
-                                "currency": f.get("currency", "USD"),
-                                "net_wire": 0.0,
-                                "calls_included": []
-                            }
-                        
-                        tx_type = c.get("transaction_type", "call")
-                        amt = float(c.get("amount", 0))
-                        interest = float(c.get("equalisation_interest", 0))
+                    p_date = p_ts.date()
+                    key = (f["id"], p_date)
+                    if key not in upcoming_events:
+                        upcoming_events[key] = {
+                            "fund_name": f["name"],
+                            "currency": f.get("currency", "USD"),
+                            "net_wire": 0.0,
+                            "calls_included": []
+                        }
+                    
+                    tx_type = c.get("transaction_type", "call")
+                    amt = float(c.get("amount", 0))
+                    interest = float(c.get("equalisation_interest", 0))
+                    
+                    if tx_type == "call":
+                        upcoming_events[key]["net_wire"] += (amt + interest)
+                    else:
+                        upcoming_events[key]["net_wire"] -= amt
                         
-                        if tx_type == "call":
-                            upcoming_events[key]["net_wire"] += (amt + interest)
-                        else:
-                            upcoming_events[key]["net_wire"] -= amt
-                            
-                        upcoming_events[key]["calls_included"].append(str(c.get("call_number")))
+                    upcoming_events[key]["calls_included"].append(str(c.get("call_number")))
                 except:
                     pass
         
@@ -1966,53 +2128,10 @@ def show_overview():
 
     investors = get_investors()
     lp_calls = get_lp_calls()
-    payments = get_lp_payments()
     currency_sym = "$" 
     total_fund_commitment = sum(investor_commitment_value(inv) for inv in investors)
 
-    summary_data = []
-    total_called_cum = 0.0
-    total_received_cum = 0.0
-    for c in lp_calls:
-        call_pct = c["call_pct"] / 100.0
-        total_called_amount = total_fund_commitment * call_pct
-
-        paid_commit = 0
-        for inv in investors:
-            payment = next((p for p in payments if p["lp_call_id"] == c["id"] and p["investor_id"] == inv["id"]), None)
-            if payment and payment["is_paid"]:
-                paid_commit += investor_commitment_value(inv)
-
-        total_paid_amount = paid_commit * call_pct
-        outstanding = total_called_amount - total_paid_amount
-        total_called_cum += total_called_amount
-        total_received_cum += total_paid_amount
-
-        summary_data.append({
-            "Call": f"{c['call_date']} ({c['call_pct']}%)",
-            "Total Required": format_currency(total_called_amount, currency_sym),
-            "Total Received": format_currency(total_paid_amount, currency_sym),
-            "Outstanding Balance": format_currency(outstanding, currency_sym)
-        })
-
-    total_outstanding_cum = total_called_cum - total_received_cum
-    called_pct_overall = (total_called_cum / total_fund_commitment * 100) if total_fund_commitment > 0 else 0.0
-    received_pct_overall = (total_received_cum / total_fund_commitment * 100) if total_fund_commitment > 0 else 0.0
-
-    col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
-    with col_sum1:
-        st.metric("Total LP Commitments", format_currency(total_fund_commitment, currency_sym))
-    with col_sum2:
-        st.metric("Total Called to Date", format_currency(total_called_cum, currency_sym), f"{called_pct_overall:.1f}% of commitments")
-    with col_sum3:
-        st.metric("Total Received to Date", format_currency(total_received_cum, currency_sym), f"{received_pct_overall:.1f}% of commitments")
-    with col_sum4:
-        st.metric("Outstanding", format_currency(total_outstanding_cum, currency_sym))
-
-    if lp_calls:
-        st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
-    else:
-        st.info("No active capital calls yet.")
+    render_fof_collection_summary(lp_calls, total_fund_commitment, currency_sym)
 
 def show_fund_expenses():
     st.title("💼 Fund Operating Expenses")
@@ -2087,7 +2206,7 @@ def show_fund_expenses():
                     }).execute()
                     log_action("INSERT", "fund_operating_expenses", f"Added expense: {category} - {description}", {})
                     st.success("✅ Expense added!")
-                    clear_cache_and_rerun()
+                    clear_cache_and_rerun(fetch_all_operating_expenses)
                 except Exception as e:
                     st.error(f"Error: {e}")
     
@@ -2129,31 +2248,27 @@ def show_fund_expenses():
         
         # Delete expenses
         st.markdown("#### ⚙️ Manage Expenses")
-        for idx, row in df.iterrows():
-            exp_id = row["id"]
+        for exp, row in zip(expenses, exp_data):
+            exp_id = exp["id"]
             with st.expander(f"{row['Category']} - {row['Date']} ({row['Amount']})", expanded=False):
                 col_del = st.columns([5, 1])
                 with col_del[1]:
-                    if st.button("🗑️ Delete", key=f"del_exp_{exp_id}"):
-                        st.session_state[f"confirm_del_exp_{exp_id}"] = True
+                    st.button("🗑️ Delete", key=f"del_exp_{exp_id}", on_click=set_ui_flag, args=("confirm_del_exp", exp_id))
                 
-                if st.session_state.get(f"confirm_del_exp_{exp_id}"):
+                if ui_flags().get(("confirm_del_exp", exp_id)):
                     st.warning("Delete this expense?")
                     c1, c2 = st.columns(2)
                     with c1:
                         if st.button("✅ Yes", key=f"yes_exp_{exp_id}"):
                             try:
-                                exp = next(e for e in expenses if e["id"] == exp_id)
                                 log_action("DELETE", "fund_operating_expenses", f"Deleted expense: {row['Category']}", exp)
                                 sb.table("fund_operating_expenses").delete().eq("id", exp_id).execute()
-                                st.session_state.pop(f"confirm_del_exp_{exp_id}", None)
-                                clear_cache_and_rerun()
+                                ui_flags().pop(("confirm_del_exp", exp_id), None)
+                                clear_cache_and_rerun(fetch_all_operating_expenses)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                     with c2:
-                        if st.button("❌ Cancel", key=f"no_exp_{exp_id}"):
-                            st.session_state.pop(f"confirm_del_exp_{exp_id}", None)
-                            st.rerun()
+                        st.button("❌ Cancel", key=f"no_exp_{exp_id}", on_click=clear_ui_flag, args=("confirm_del_exp", exp_id))
     else:
         st.info("No operating expenses recorded yet.")
     
@@ -2183,15 +2298,13 @@ def show_portfolio():
             with col1:
                 new_name = st.text_input("Fund Name")
                 new_manager = st.text_input("Manager")
-                strategy_opts = ["Growth", "VC", "Tech", "Niche", "Special Situations", "Mid-Market Buyout"]
-                new_strategy = st.selectbox("Strategy", strategy_opts)
+                new_strategy = st.selectbox("Strategy", STRATEGY_OPTS)
                 new_geo = st.text_input("Geographic Focus")
             with col2:
                 new_commitment = st.number_input("Commitment Amount", min_value=0.0, step=500000.0)
-                new_currency = st.selectbox("Currency", ["USD", "EUR"])
+                new_currency = st.selectbox("Currency", CURRENCY_OPTS)
                 new_date = st.date_input("Investment Date")
-                status_opts = ["active", "closed", "exited"]
-                new_status = st.selectbox("Status", status_opts)
+                new_status = st.selectbox("Status", FUND_STATUS_OPTS)
                 
             if st.form_submit_button("💾 Save New Fund", type="primary"):
                 try:
@@ -2207,7 +2320,7 @@ def show_portfolio():
                         "status": new_status
                     }).execute()
                     st.success("✅ New fund successfully added! It now appears in the tabs below.")
-                    clear_cache_and_rerun()
+                    clear_cache_and_rerun(fetch_all_funds)
                 except Exception as e:
                     st.error(f"Error: {e}")
 
@@ -2232,7 +2345,58 @@ def show_portfolio():
     st.session_state.portfolio_selected_fund_id = selected_fund["id"]
     show_fund_detail(selected_fund)
 
+@st.cache_data(max_entries=64, ttl=300, show_spinner=False)
+def build_calls_bar_figure(call_rows: tuple, currency: str):
+    """call_rows: tuple of (call_number, commitment_impact) pairs."""
+    labels = []
+    values = np.empty(len(call_rows))
+    for i, (call_number, value) in enumerate(call_rows):
+        labels.append(f"Call #{call_number}")
+        values[i] = value
+    fig = go.Figure(go.Bar(
+        x=labels,
+        y=values,
+        marker_color="#0f3460",
+        marker_line_width=0
+    ))
+    fig.update_layout(
+        title="Capital Calls History (Commitment Usage)",
+        xaxis_title="Call",
+        yaxis_title=f"Commitment Impact ({currency})",
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white',
+        transition={"duration": 0}
+    )
+    return fig
+
+@st.cache_data(max_entries=64, ttl=300, show_spinner=False)
+def build_performance_figure(report_rows: tuple):
+    """report_rows: tuple of (quarter, year, tvpi, dpi) rows."""
+    labels = []
+    tvpis = np.full(len(report_rows), np.nan)
+    dpis = np.full(len(report_rows), np.nan)
+    has_tvpi = has_dpi = False
+    for i, (quarter, year, tvpi, dpi) in enumerate(report_rows):
+        labels.append(f"Q{quarter}/{year}")
+        if tvpi is not None:
+            tvpis[i] = float(tvpi)
+            has_tvpi = has_tvpi or bool(tvpi)
+        if dpi is not None:
+            dpis[i] = float(dpi)
+            has_dpi = has_dpi or bool(dpi)
+    fig = go.Figure()
+    if has_tvpi:
+        fig.add_trace(go.Scatter(x=labels, y=tvpis, name="TVPI", line=dict(color="#4ade80")))
+    if has_dpi:
+        fig.add_trace(go.Scatter(x=labels, y=dpis, name="DPI", line=dict(color="#60a5fa")))
+    fig.update_layout(
+        title="Performance Over Time", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white',
+        showlegend=len(fig.data) > 1, transition={"duration": 0}
+    )
+    return fig
+
+@st.fragment
 def show_fund_detail(fund):
+    sb = get_supabase()
     calls = get_capital_calls(fund["id"])
     dists = get_distributions(fund["id"])
     reports = get_quarterly_reports(fund["id"])
@@ -2247,61 +2411,53 @@ def show_fund_detail(fund):
 
     col_spacer, col_edit, col_del = st.columns([9.2,0.4,0.4])
     with col_edit:
-        if st.button("✏️", key=f"edit_fund_{fund['id']}", help="Edit fund details"):
-            st.session_state[f"editing_fund_{fund['id']}"] = True
+        st.button("✏️", key=f"edit_fund_{fund['id']}", help="Edit fund details", on_click=set_ui_flag, args=("editing_fund", fund['id']))
     with col_del:
-        if st.button("🗑️", key=f"del_fund_{fund['id']}", help="Delete fund"):
-            st.session_state[f"confirm_del_fund_{fund['id']}"] = True
+        st.button("🗑️", key=f"del_fund_{fund['id']}", help="Delete fund", on_click=set_ui_flag, args=("confirm_del_fund", fund['id']))
 
-    if st.session_state.get(f"confirm_del_fund_{fund['id']}"):
+    if ui_flags().get(("confirm_del_fund", fund['id'])):
         st.warning(f"⚠️ Delete '{fund['name']}'? All associated Calls, Distributions, and Reports will also be deleted.")
         c1, c2 = st.columns(2)
         with c1:
             if st.button("✅ Yes, Delete All", key=f"yes_fund_{fund['id']}", type="primary"):
                 try:
-                    sb = get_supabase()
                     log_action("DELETE", "funds", f"Deleted fund '{fund['name']}' including all its data", fund)
-                    sb.table("capital_calls").delete().eq("fund_id", fund["id"]).execute()
-                    sb.table("distributions").delete().eq("fund_id", fund["id"]).execute()
-                    sb.table("quarterly_reports").delete().eq("fund_id", fund["id"]).execute()
-                    sb.table("funds").delete().eq("id", fund["id"]).execute()
+                    sb.rpc("delete_fund_cascade", {"p_fund_id": fund["id"]}).execute()
                     st.success("Deleted!")
-                    st.session_state.pop(f"confirm_del_fund_{fund['id']}", None)
-                    clear_cache_and_rerun()
+                    ui_flags().pop(("confirm_del_fund", fund['id']), None)
+                    clear_cache_and_rerun(fetch_all_funds, fetch_all_capital_calls, fetch_all_distributions, fetch_all_quarterly_reports)
                 except Exception as e:
                     st.error(f"Error: {e}")
         with c2:
-            if st.button("❌ Cancel", key=f"no_fund_{fund['id']}"):
-                st.session_state.pop(f"confirm_del_fund_{fund['id']}", None)
-                st.rerun()
+            st.button("❌ Cancel", key=f"no_fund_{fund['id']}", on_click=clear_ui_flag, args=("confirm_del_fund", fund['id']))
 
-    if st.session_state.get(f"editing_fund_{fund['id']}"):
+    if ui_flags().get(("editing_fund", fund['id'])):
         with st.form(f"edit_fund_form_{fund['id']}"):
             st.markdown("**✏️ Edit Fund Details**")
             col1, col2 = st.columns(2)
             with col1:
                 new_name = st.text_input("Fund Name", value=fund.get("name",""))
                 new_manager = st.text_input("Manager", value=fund.get("manager","") or "")
-                strategy_opts = ["Growth", "VC", "Tech", "Niche", "Special Situations", "Mid-Market Buyout"]
-                cur_s = fund.get("strategy","Growth")
-                new_strategy = st.selectbox("Strategy", strategy_opts,
-                    index=strategy_opts.index(cur_s) if cur_s in strategy_opts else 0)
+                new_strategy = st.selectbox("Strategy", STRATEGY_OPTS,
+                    index=STRATEGY_IDX.get(fund.get("strategy","Growth"), 0))
                 new_geo = st.text_input("Geographic Focus", value=fund.get("geographic_focus","") or "")
             with col2:
                 new_commitment = st.number_input("Commitment", value=float(commitment), min_value=0.0, step=500000.0)
                 
                 cur_cur = fund.get("currency","USD")
-                new_currency = st.selectbox("Currency", ["USD","EUR"], index=0 if cur_cur=="USD" else 1)
-                status_opts = ["active","closed","exited"]
-                cur_st = fund.get("status","active")
-                new_status = st.selectbox("Status", status_opts,
-                    index=status_opts.index(cur_st) if cur_st in status_opts else 0)
+                new_currency = st.selectbox("Currency", CURRENCY_OPTS, index=0 if cur_cur=="USD" else 1)
+                new_status = st.selectbox("Status", FUND_STATUS_OPTS,
+                    index=FUND_STATUS_IDX.get(fund.get("status","active"), 0))
                 
                 cur_date = fund.get("investment_date")
-                try:
-                    default_date = datetime.fromisoformat(str(cur_date)).date() if cur_date else date(int(fund.get("vintage_year") or 2020), 1, 1)
-                except:
-                    default_date = date.today()
+                default_date = date.today()
+                if cur_date:
+                    default_date = parse_iso_date(cur_date) or default_date
+                else:
+                    try:
+                        default_date = date(int(float(fund.get("vintage_year") or 2020)), 1, 1)
+                    except (TypeError, ValueError, OverflowError):
+                        pass
                 new_inv_date = st.date_input("Investment Date", value=default_date)
 
             c1, c2 = st.columns(2)
@@ -2309,7 +2465,7 @@ def show_fund_detail(fund):
                 if st.form_submit_button("💾 Save", type="primary"):
                     try:
                         log_action("UPDATE", "funds", f"Updated fund details: {fund['name']}", fund)
-                        get_supabase().table("funds").update({
+                        sb.table("funds").update({
                             "name": new_name, "manager": new_manager,
                             "strategy": new_strategy, "commitment": new_commitment,
                             "currency": new_currency, "status": new_status,
@@ -2318,14 +2474,12 @@ def show_fund_detail(fund):
                             "investment_date": str(new_inv_date)
                         }).eq("id", fund["id"]).execute()
                         st.success("✅ Updated!")
-                        st.session_state.pop(f"editing_fund_{fund['id']}", None)
-                        clear_cache_and_rerun()
+                        ui_flags().pop(("editing_fund", fund['id']), None)
+                        clear_cache_and_rerun(fetch_all_funds)
                     except Exception as e:
                         st.error(f"Error: {e}")
             with c2:
-                if st.form_submit_button("❌ Cancel"):
-                    st.session_state.pop(f"editing_fund_{fund['id']}", None)
-                    st.rerun()
+                st.form_submit_button("❌ Cancel", on_click=clear_ui_flag, args=("editing_fund", fund['id']))
 
     posted_calls = [c for c in calls if not c.get("is_future")]
     actual_cash_paid = 0.0
@@ -2419,712 +2573,676 @@ def show_fund_detail(fund):
     st.markdown(fund_metric_html, unsafe_allow_html=True)
 
     st.divider()
-    tab1, tab2, tab3 = st.tabs(["📞 Capital Calls", "💰 Distributions", "📊 Performance"])
+    tab1, tab2, tab3 = st.tabs(["📞 Capital Calls", "💰 Distributions", "📊 Performance"], key=f"fund_tabs_{fund['id']}", on_change="rerun")
 
     with tab1:
-        if calls:
-            st.markdown("**Capital Calls List**")
-            for c in calls:
-                tx_icons = {
-                    "call": "💰",
-                    "repayment": "🔄",
-                    "distribution": "📤"
-                }
-                tx_type = c.get("transaction_type", "call")
-                icon = "🔮" if c.get("is_future") else tx_icons.get(tx_type, "💰")
+        if tab1.open:
+            if calls:
+                st.markdown("**Capital Calls List**")
+                for c in calls:
+                    tx_icons = {
+                        "call": "💰",
+                        "repayment": "🔄",
+                        "distribution": "📤"
+                    }
+                    tx_type = c.get("transaction_type", "call")
+                    icon = "🔮" if c.get("is_future") else tx_icons.get(tx_type, "💰")
                 
-                total_cash = float(c.get("amount", 0)) + float(c.get("equalisation_interest", 0))
+                    total_cash = float(c.get("amount", 0)) + float(c.get("equalisation_interest", 0))
                 
-                with st.expander(
-                    f"{icon} Call #{c.get('call_number')} | {c.get('payment_date','')} | "
-                    f"Wire/Amount: {format_currency(total_cash, currency_sym)} "
-                    f"{'🔮' if c.get('is_future') else '✅'}", 
-                    expanded=False
-                ):
-                    col1, col2, col3 = st.columns([2,2,1])
-                    with col1:
-                        st.write(f"**Type:** {tx_type.capitalize()}")
-                        st.write(f"Call Date: {c.get('call_date','')}")
-                        st.write(f"Payment Date: {c.get('payment_date','')}")
-                        st.write(f"Cash Amount: {format_currency(float(c.get('amount',0)), currency_sym)}")
-                        inv_val = float(c.get('investments') or 0)
-                        if inv_val > 0:
-                            st.write(f"Commitment Impact: {format_currency(inv_val, currency_sym)}")
-                    with col2:
-                        mgmt = float(c.get('mgmt_fee', 0))
-                        exp = float(c.get('fund_expenses', 0))
-                        if mgmt > 0:
-                            st.write(f"Mgmt Fee: {format_currency(mgmt, currency_sym)}")
-                        if exp > 0:
-                            st.write(f"Fund Expenses / Other: {format_currency(exp, currency_sym)}")
+                    with st.expander(
+                        f"{icon} Call #{c.get('call_number')} | {c.get('payment_date','')} | "
+                        f"Wire/Amount: {format_currency(total_cash, currency_sym)} "
+                        f"{'🔮' if c.get('is_future') else '✅'}", 
+                        expanded=False
+                    ):
+                        col1, col2, col3 = st.columns([2,2,1])
+                        with col1:
+                            st.write(f"**Type:** {tx_type.capitalize()}")
+                            st.write(f"Call Date: {c.get('call_date','')}")
+                            st.write(f"Payment Date: {c.get('payment_date','')}")
+                            st.write(f"Cash Amount: {format_currency(float(c.get('amount',0)), currency_sym)}")
+                            inv_val = float(c.get('investments') or 0)
+                            if inv_val > 0:
+                                st.write(f"Commitment Impact: {format_currency(inv_val, currency_sym)}")
+                        with col2:
+                            mgmt = float(c.get('mgmt_fee', 0))
+                            exp = float(c.get('fund_expenses', 0))
+                            if mgmt > 0:
+                                st.write(f"Mgmt Fee: {format_currency(mgmt, currency_sym)}")
+                            if exp > 0:
+                                st.write(f"Fund Expenses / Other: {format_currency(exp, currency_sym)}")
                             
-                        affects = c.get("affects_called")
-                        affects_text = "Yes" if (affects or (affects is None and tx_type == "repayment")) else "No"
-                        st.write(f"Reduces Total Called: {affects_text}")
+                            affects = c.get("affects_called")
+                            affects_text = "Yes" if (affects or (affects is None and tx_type == "repayment")) else "No"
+                            st.write(f"Reduces Total Called: {affects_text}")
                         
-                        eq_interest = float(c.get('equalisation_interest', 0))
-                        if eq_interest > 0:
-                            st.write(f"⚠️ Equalisation Interest: {format_currency(eq_interest, currency_sym)}")
+                            eq_interest = float(c.get('equalisation_interest', 0))
+                            if eq_interest > 0:
+                                st.write(f"⚠️ Equalisation Interest: {format_currency(eq_interest, currency_sym)}")
                         
-                        if c.get('notes'):
-                            st.write(f"Notes: {c.get('notes')}")
-                    with col3:
-                        if st.button("🗑️", key=f"del_call_{c['id']}", help="Delete Call"):
-                            st.session_state[f"confirm_del_call_{c['id']}"] = True
+                            if c.get('notes'):
+                                st.write(f"Notes: {c.get('notes')}")
+                        with col3:
+                            st.button("🗑️", key=f"del_call_{c['id']}", help="Delete Call", on_click=set_ui_flag, args=("confirm_del_call", c['id']))
                         
-                    if st.session_state.get(f"confirm_del_call_{c['id']}"):
-                        st.warning("Delete this Call?")
-                        cc1, cc2 = st.columns(2)
-                        with cc1:
-                            if st.button("✅ Delete", key=f"yes_call_{c['id']}"):
-                                try:
-                                    log_action("DELETE", "capital_calls", f"Deleted Capital Call #{c.get('call_number')} from {fund['name']}", c)
-                                    get_supabase().table("capital_calls").delete().eq("id", c["id"]).execute()
-                                    clear_cache_and_rerun()
-                                except Exception as e:
-                                    st.error(f"Error: {e}")
-                        with cc2:
-                            if st.button("❌ Cancel", key=f"no_call_{c['id']}"):
-                                st.session_state.pop(f"confirm_del_call_{c['id']}", None)
-                                st.rerun()
-
-            chart_data = [c for c in calls if not c.get("is_future") and c.get("transaction_type") == "call" and (c.get("amount") or c.get("investments"))]
-            if chart_data:
-                fig = px.bar(
-                    x=[f"Call #{c['call_number']}" for c in chart_data],
-                    y=[float(c.get("investments") if float(c.get("investments",0)) > 0 else c.get("amount",0)) for c in chart_data],
-                    labels={"x": "Call", "y": f"Commitment Impact ({fund.get('currency','USD')})"},
-                    title="Capital Calls History (Commitment Usage)",
-                    color_discrete_sequence=["#0f3460"]
-                )
-                fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white')
-                st.plotly_chart(fig, use_container_width=True, key=f"calls_chart_{fund['id']}")
-        else:
-            st.info("No Capital Calls yet")
+                        if ui_flags().get(("confirm_del_call", c['id'])):
+                            st.warning("Delete this Call?")
+                            cc1, cc2 = st.columns(2)
+                            with cc1:
+                                if st.button("✅ Delete", key=f"yes_call_{c['id']}"):
+                                    try:
+                                        log_action("DELETE", "capital_calls", f"Deleted Capital Call #{c.get('call_number')} from {fund['name']}", c)
+                                        sb.table("capital_calls").delete().eq("id", c["id"]).execute()
+                                        clear_cache_and_rerun(fetch_all_capital_calls)
+                                    except Exception as e:
+                                        st.error(f"Error: {e}")
+                            with cc2:
+                                st.button("❌ Cancel", key=f"no_call_{c['id']}", on_click=clear_ui_flag, args=("confirm_del_call", c['id']))
+
+                chart_data = [c for c in calls if not c.get("is_future") and c.get("transaction_type") == "call" and (c.get("amount") or c.get("investments"))]
+                if chart_data:
+                    call_rows = tuple(
+                        (c["call_number"], float(c.get("investments") if float(c.get("investments",0)) > 0 else c.get("amount",0)))
+                        for c in chart_data
+                    )
+                    fig = build_calls_bar_figure(call_rows, fund.get("currency", "USD"))
+                    st.plotly_chart(fig, use_container_width=True, key=f"calls_chart_{fund['id']}")
+            else:
+                st.info("No Capital Calls yet")
 
-        st.divider()
-        st.markdown("**🤖 Add Capital Call from PDF (AI Extraction)**")
-        uploaded_cc_pdf = st.file_uploader("Upload Capital Call Notice (PDF)", type=["pdf"], key=f"cc_uploader_{fund['id']}")
+            st.divider()
+            st.markdown("**🤖 Add Capital Call from PDF (AI Extraction)**")
+            uploaded_cc_pdf = st.file_uploader("Upload Capital Call Notice (PDF)", type=["pdf"], key=f"cc_uploader_{fund['id']}")
         
-        if uploaded_cc_pdf:
-            if st.button("Analyze Document Now", type="primary", key=f"cc_analyze_btn_{fund['id']}"):
-                with st.spinner("Claude is analyzing the document..."):
-                    try:
-                        cc_bytes = uploaded_cc_pdf.read()
-                        ai_result = analyze_capital_call_pdf_with_ai(cc_bytes)
-                        prefill_warnings = apply_capital_call_ai_prefill(fund, calls, ai_result)
-                        st.session_state[f"cc_ai_prefill_warnings_{fund['id']}"] = prefill_warnings
-                        st.success("✅ Data extracted successfully! Please review and confirm in the form below.")
-                        for warning in prefill_warnings:
-                            st.warning(warning)
-                    except Exception as e:
-                        st.error(f"Error analyzing document: {e}")
+            if uploaded_cc_pdf:
+                if st.button("Analyze Document Now", type="primary", key=f"cc_analyze_btn_{fund['id']}"):
+                    with st.spinner("Claude is analyzing the document..."):
+                        try:
+                            cc_bytes = uploaded_cc_pdf.getvalue()
+                            ai_result = analyze_capital_call_pdf_with_ai(cc_bytes)
+                            prefill_warnings = apply_capital_call_ai_prefill(fund, calls, ai_result)
+                            st.session_state[f"cc_ai_prefill_warnings_{fund['id']}"] = prefill_warnings
+                            st.success("✅ Data extracted successfully! Please review and confirm in the form below.")
+                            for warning in prefill_warnings:
+                                st.warning(warning)
+                        except Exception as e:
+                            st.error(f"Error analyzing document: {e}")
         
-        st.divider()
-        st.markdown("**➕ Or Enter Details Manually**")
+            st.divider()
+            st.markdown("**➕ Or Enter Details Manually**")
         
-        entry_mode = st.radio(
-            "Entry Mode",
-            ["Simple Capital Call", "Net Capital Call / Equalisation Bundle"],
-            horizontal=True,
-            key=f"call_entry_mode_{fund['id']}"
-        )
+            entry_mode = st.radio(
+                "Entry Mode",
+                ["Simple Capital Call", "Net Capital Call / Equalisation Bundle"],
+                horizontal=True,
+                key=f"call_entry_mode_{fund['id']}"
+            )
 
-        for warning in st.session_state.get(f"cc_ai_prefill_warnings_{fund['id']}", []):
-            st.warning(warning)
+            for warning in st.session_state.get(f"cc_ai_prefill_warnings_{fund['id']}", []):
+                st.warning(warning)
 
-        if entry_mode == "Simple Capital Call":
-            ai_data = st.session_state.get(f"cc_ai_result_{fund['id']}", {})
+            if entry_mode == "Simple Capital Call":
+                ai_data = st.session_state.get(f"cc_ai_result_{fund['id']}", {})
         
-            def_call_date = parse_ai_date(ai_data.get("call_date")) or date.today()
-            def_pay_date = parse_ai_date(ai_data.get("payment_date")) or date.today()
-            def_call_num = int(normalize_amount(ai_data.get("call_number")) or (len(calls) + 1))
-            tx_options = ["call", "repayment", "distribution"]
-            def_tx_type = str(ai_data.get("transaction_type") or "call").strip().lower()
-            if def_tx_type not in tx_options:
-                def_tx_type = "call"
-
-            with st.form(f"add_call_{fund['id']}"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    call_num = st.number_input("Call Number", min_value=1, value=def_call_num)
-                    call_date = st.date_input("Call Date", value=def_call_date)
-                    payment_date = st.date_input("Payment Date", value=def_pay_date)
+                def_call_date = parse_ai_date(ai_data.get("call_date")) or date.today()
+                def_pay_date = parse_ai_date(ai_data.get("payment_date")) or date.today()
+                def_call_num = int(normalize_amount(ai_data.get("call_number")) or (len(calls) + 1))
+                tx_options = ["call", "repayment", "distribution"]
+                def_tx_type = str(ai_data.get("transaction_type") or "call").strip().lower()
+                if def_tx_type not in tx_options:
+                    def_tx_type = "call"
+
+                with st.form(f"add_call_{fund['id']}"):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        call_num = st.number_input("Call Number", min_value=1, value=def_call_num)
+                        call_date = st.date_input("Call Date", value=def_call_date)
+                        payment_date = st.date_input("Payment Date", value=def_pay_date)
                 
-                    tx_type = st.selectbox(
-                        "Transaction Type",
-                        tx_options,
-                        index=tx_options.index(def_tx_type),
-                        format_func=lambda x: {
-                            "call": "💰 Capital Call",
-                            "repayment": "🔄 Capital Repayment (Recallable)",
-                            "distribution": "📤 Capital Distribution (Non-recallable)"
-                        }[x]
-                    )
+                        tx_type = st.selectbox(
+                            "Transaction Type",
+                            tx_options,
+                            index=tx_options.index(def_tx_type),
+                            format_func=lambda x: {
+                                "call": "💰 Capital Call",
+                                "repayment": "🔄 Capital Repayment (Recallable)",
+                                "distribution": "📤 Capital Distribution (Non-recallable)"
+                            }[x]
+                        )
                 
-                with col2:
-                    amount = st.number_input("Cash Amount (Net Call)", min_value=0.0, value=normalize_amount(ai_data.get("amount")))
-                    investments = st.number_input("Investments (Commitment Impact)", min_value=0.0, value=normalize_amount(ai_data.get("investments")))
-                    mgmt_fee = st.number_input("Mgmt Fee", min_value=0.0, value=normalize_amount(ai_data.get("mgmt_fee")))
+                    with col2:
+                        amount = st.number_input("Cash Amount (Net Call)", min_value=0.0, value=normalize_amount(ai_data.get("amount")))
+                        investments = st.number_input("Investments (Commitment Impact)", min_value=0.0, value=normalize_amount(ai_data.get("investments")))
+                        mgmt_fee = st.number_input("Mgmt Fee", min_value=0.0, value=normalize_amount(ai_data.get("mgmt_fee")))
                 
-                with col3:
-                    fund_expenses = st.number_input("Fund Expenses & Other", min_value=0.0, value=normalize_amount(ai_data.get("fund_expenses")))
+                    with col3:
+                        fund_expenses = st.number_input("Fund Expenses & Other", min_value=0.0, value=normalize_amount(ai_data.get("fund_expenses")))
                 
-                    default_recall = bool(ai_data.get("affects_called", tx_type == "repayment"))
-                    is_recallable = st.checkbox(
-                        "Reduces Total Called", 
-                        value=default_recall,
-                        help="Check if this amount reduces the Total Called (usually True for Repayment, False for Distribution)"
-                    )
+                        default_recall = bool(ai_data.get("affects_called", tx_type == "repayment"))
+                        is_recallable = st.checkbox(
+                            "Reduces Total Called", 
+                            value=default_recall,
+                            help="Check if this amount reduces the Total Called (usually True for Repayment, False for Distribution)"
+                        )
                 
-                    equalisation_interest = st.number_input(
-                        "Equalisation Interest", 
-                        min_value=0.0, 
-                        value=normalize_amount(ai_data.get("equalisation_interest")),
-                        help="Interest paid by late entrants - does NOT count toward Total Called"
-                    )
+                        equalisation_interest = st.number_input(
+                            "Equalisation Interest", 
+                            min_value=0.0, 
+                            value=normalize_amount(ai_data.get("equalisation_interest")),
+                            help="Interest paid by late entrants - does NOT count toward Total Called"
+                        )
                 
-                    is_future = st.checkbox("Future Call (Show Alert)")
-                    notes = st.text_input("Notes", value=str(ai_data.get("notes") or ""))
+                        is_future = st.checkbox("Future Call (Show Alert)")
+                        notes = st.text_input("Notes", value=str(ai_data.get("notes") or ""))
                 
-                st.markdown("**Advanced PE/VC Parameters**")
-                adv_col1, adv_col2 = st.columns(2)
-                with adv_col1:
-                    inv_vs_exp = st.text_area("Investments vs Expenses (Breakdown)", value=str(ai_data.get("investments_vs_expenses") or ""))
-                with adv_col2:
-                    spec_realloc = st.text_area("Special Reallocations / Adjustments", value=str(ai_data.get("special_reallocations") or ""))
-
-                if st.form_submit_button("Save Call to System", type="primary"):
-                    try:
-                        meta_data = {
-                            "investments_vs_expenses": inv_vs_exp,
-                            "special_reallocations": spec_realloc
-                        }
-                        payload = {
-                            "fund_id": fund["id"], 
-                            "call_number": call_num,
-                            "call_date": str(call_date), 
-                            "payment_date": str(payment_date),
-                            "transaction_type": tx_type,
-                            "amount": amount, 
-                            "investments": investments,
-                            "mgmt_fee": mgmt_fee, 
-                            "fund_expenses": fund_expenses,
-                            "is_recallable": is_recallable,
-                            "affects_called": is_recallable,
-                            "equalisation_interest": equalisation_interest,
-                            "is_future": is_future, 
-                            "notes": notes,
-                            "meta_data": meta_data
-                        }
-                        response = get_supabase().table("capital_calls").insert(payload).execute()
+                    st.markdown("**Advanced PE/VC Parameters**")
+                    adv_col1, adv_col2 = st.columns(2)
+                    with adv_col1:
+                        inv_vs_exp = st.text_area("Investments vs Expenses (Breakdown)", value=str(ai_data.get("investments_vs_expenses") or ""))
+                    with adv_col2:
+                        spec_realloc = st.text_area("Special Reallocations / Adjustments", value=str(ai_data.get("special_reallocations") or ""))
+
+                    if st.form_submit_button("Save Call to System", type="primary"):
+                        try:
+                            meta_data = {
+                                "investments_vs_expenses": inv_vs_exp,
+                                "special_reallocations": spec_realloc
+                            }
+                            payload = {
+                                "fund_id": fund["id"], 
+                                "call_number": call_num,
+                                "call_date": str(call_date), 
+                                "payment_date": str(payment_date),
+                                "transaction_type": tx_type,
+                                "amount": amount, 
+                                "investments": investments,
+                                "mgmt_fee": mgmt_fee, 
+                                "fund_expenses": fund_expenses,
+                                "is_recallable": is_recallable,
+                                "affects_called": is_recallable,
+                                "equalisation_interest": equalisation_interest,
+                                "is_future": is_future, 
+                                "notes": notes,
+                                "meta_data": meta_data
+                            }
+                            response = sb.table("capital_calls").insert(payload).execute()
                                 
-                        st.session_state.pop(f"cc_ai_result_{fund['id']}", None)
-                        st.success("✅ Saved!")
-                        clear_cache_and_rerun()
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                            st.session_state.pop(f"cc_ai_result_{fund['id']}", None)
+                            st.success("✅ Saved!")
+                            clear_cache_and_rerun(fetch_all_capital_calls)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
 
-        else:
-            st.markdown("**Net Capital Call / Equalisation Bundle**")
-            fund_name_for_bundle = str(fund.get("name") or "").strip()
-            st.info(f"You are entering a bundle for: {fund_name_for_bundle or 'Unnamed fund'} ({fund.get('currency', 'USD')})")
-            valid_bundle_fund = bool(fund_name_for_bundle)
-            if not valid_bundle_fund:
-                st.error("Cannot save bundle for an unnamed fund. Please select a valid fund.")
-
-            b_col1, b_col2, b_col3 = st.columns(3)
-            with b_col1:
-                bundle_call_num = st.number_input(
-                    "Bundle Call Number",
-                    min_value=1,
-                    value=len(calls) + 1,
-                    key=f"bundle_call_num_{fund['id']}"
-                )
-                bundle_call_date = st.date_input(
-                    "Bundle Call Date",
-                    value=date.today(),
-                    key=f"bundle_call_date_{fund['id']}"
-                )
-            with b_col2:
-                bundle_payment_date = st.date_input(
-                    "Bundle Payment Date",
-                    value=date.today(),
-                    key=f"bundle_payment_date_{fund['id']}"
-                )
-                bundle_is_future = st.checkbox(
-                    "Bundle Future Call",
-                    key=f"bundle_future_{fund['id']}"
-                )
-            with b_col3:
-                bundle_note_prefix = st.text_input(
-                    "Shared Note Prefix",
-                    value="Net Capital Call / Equalisation Bundle",
-                    key=f"bundle_note_prefix_{fund['id']}"
-                )
-                expected_wire = st.number_input(
-                    "Optional Expected Wire Amount",
-                    value=0.0,
-                    key=f"bundle_expected_wire_{fund['id']}"
-                )
-
-            component_types = CAPITAL_CALL_COMPONENT_TYPES
-
-            component_rows = []
-            st.markdown("**Components**")
-            h_enabled, h_type, h_desc, h_cash, h_commit, h_eq = st.columns([0.7, 2.2, 2.6, 1.4, 1.4, 1.4])
-            h_enabled.markdown("Use")
-            h_type.markdown("Component Type")
-            h_desc.markdown("Description")
-            h_cash.markdown("Cash Amount")
-            h_commit.markdown("Commitment Impact")
-            h_eq.markdown("Equalisation Interest")
-            for row_idx in range(BUNDLE_COMPONENT_ROW_LIMIT):
-                c_enabled, c_type, c_desc, c_cash, c_commit, c_eq = st.columns([0.7, 2.2, 2.6, 1.4, 1.4, 1.4])
-                with c_enabled:
-                    enabled = st.checkbox("Use", key=f"bundle_enabled_{fund['id']}_{row_idx}")
-                with c_type:
-                    component_type = st.selectbox(
-                        "Component Type",
-                        component_types,
-                        key=f"bundle_type_{fund['id']}_{row_idx}",
-                        label_visibility="collapsed"
+            else:
+                st.markdown("**Net Capital Call / Equalisation Bundle**")
+                fund_name_for_bundle = str(fund.get("name") or "").strip()
+                st.info(f"You are entering a bundle for: {fund_name_for_bundle or 'Unnamed fund'} ({fund.get('currency', 'USD')})")
+                valid_bundle_fund = bool(fund_name_for_bundle)
+                if not valid_bundle_fund:
+                    st.error("Cannot save bundle for an unnamed fund. Please select a valid fund.")
+
+                b_col1, b_col2, b_col3 = st.columns(3)
+                with b_col1:
+                    bundle_call_num = st.number_input(
+                        "Bundle Call Number",
+                        min_value=1,
+                        value=len(calls) + 1,
+                        key=f"bundle_call_num_{fund['id']}"
                     )
-                with c_desc:
-                    description = st.text_input(
-                        "Description",
-                        key=f"bundle_desc_{fund['id']}_{row_idx}",
-                        label_visibility="collapsed"
+                    bundle_call_date = st.date_input(
+                        "Bundle Call Date",
+                        value=date.today(),
+                        key=f"bundle_call_date_{fund['id']}"
                     )
-                with c_cash:
-                    cash_amount = st.number_input(
-                        "Cash Amount",
-                        min_value=0.0,
-                        value=0.0,
-                        key=f"bundle_cash_{fund['id']}_{row_idx}",
-                        label_visibility="collapsed"
+                with b_col2:
+                    bundle_payment_date = st.date_input(
+                        "Bundle Payment Date",
+                        value=date.today(),
+                        key=f"bundle_payment_date_{fund['id']}"
                     )
-                with c_commit:
-                    commitment_impact = st.number_input(
-                        "Commitment Impact",
-                        min_value=0.0,
-                        value=0.0,
-                        key=f"bundle_commit_{fund['id']}_{row_idx}",
-                        label_visibility="collapsed"
+                    bundle_is_future = st.checkbox(
+                        "Bundle Future Call",
+                        key=f"bundle_future_{fund['id']}"
+                    )
+                with b_col3:
+                    bundle_note_prefix = st.text_input(
+                        "Shared Note Prefix",
+                        value="Net Capital Call / Equalisation Bundle",
+                        key=f"bundle_note_prefix_{fund['id']}"
                     )
-                with c_eq:
-                    row_eq_interest = st.number_input(
-                        "Equalisation Interest",
-                        min_value=0.0,
+                    expected_wire = st.number_input(
+                        "Optional Expected Wire Amount",
                         value=0.0,
-                        key=f"bundle_eq_{fund['id']}_{row_idx}",
-                        label_visibility="collapsed"
+                        key=f"bundle_expected_wire_{fund['id']}"
                     )
 
-                if enabled:
-                    component_rows.append({
-                        "component_type": component_type,
-                        "description": description,
-                        "cash_amount": cash_amount,
-                        "commitment_impact": commitment_impact,
-                        "equalisation_interest": row_eq_interest
-                    })
+                component_types = CAPITAL_CALL_COMPONENT_TYPES
+
+                component_rows = []
+                st.markdown("**Components**")
+                h_enabled, h_type, h_desc, h_cash, h_commit, h_eq = st.columns([0.7, 2.2, 2.6, 1.4, 1.4, 1.4])
+                h_enabled.markdown("Use")
+                h_type.markdown("Component Type")
+                h_desc.markdown("Description")
+                h_cash.markdown("Cash Amount")
+                h_commit.markdown("Commitment Impact")
+                h_eq.markdown("Equalisation Interest")
+                for row_idx in range(BUNDLE_COMPONENT_ROW_LIMIT):
+                    c_enabled, c_type, c_desc, c_cash, c_commit, c_eq = st.columns([0.7, 2.2, 2.6, 1.4, 1.4, 1.4])
+                    with c_enabled:
+                        enabled = st.checkbox("Use", key=f"bundle_enabled_{fund['id']}_{row_idx}")
+                    with c_type:
+                        component_type = st.selectbox(
+                            "Component Type",
+                            component_types,
+                            key=f"bundle_type_{fund['id']}_{row_idx}",
+                            label_visibility="collapsed"
+                        )
+                    with c_desc:
+                        description = st.text_input(
+                            "Description",
+                            key=f"bundle_desc_{fund['id']}_{row_idx}",
+                            label_visibility="collapsed"
+                        )
+                    with c_cash:
+                        cash_amount = st.number_input(
+                            "Cash Amount",
+                            min_value=0.0,
+                            value=0.0,
+                            key=f"bundle_cash_{fund['id']}_{row_idx}",
+                            label_visibility="collapsed"
+                        )
+                    with c_commit:
+                        commitment_impact = st.number_input(
+                            "Commitment Impact",
+                            min_value=0.0,
+                            value=0.0,
+                            key=f"bundle_commit_{fund['id']}_{row_idx}",
+                            label_visibility="collapsed"
+                        )
+                    with c_eq:
+                        row_eq_interest = st.number_input(
+                            "Equalisation Interest",
+                            min_value=0.0,
+                            value=0.0,
+                            key=f"bundle_eq_{fund['id']}_{row_idx}",
+                            label_visibility="collapsed"
+                        )
 
-            validation_errors = []
-            preview_rows = []
-            rows_to_insert = []
-            net_wire = 0.0
-
-            if not component_rows:
-                validation_errors.append("Add at least one enabled component.")
-
-            for idx, row in enumerate(component_rows, start=1):
-                component_type = row["component_type"]
-                cash_amount = float(row["cash_amount"] or 0)
-                commitment_impact = float(row["commitment_impact"] or 0)
-                row_eq_interest = float(row["equalisation_interest"] or 0)
-                description = row["description"].strip()
-
-                if cash_amount < 0 or commitment_impact < 0 or row_eq_interest < 0:
-                    validation_errors.append(f"Component {idx}: amounts cannot be negative.")
-
-                transaction_type = "call"
-                amount = cash_amount
-                investments = commitment_impact
-                affects_called = False
-                eq_interest = 0.0
-                component_note = description or component_type
-
-                if component_type == "Gross capital call":
-                    if row_eq_interest > 0:
-                        validation_errors.append(f"Component {idx}: use a separate equalisation interest component for interest outside commitment.")
-                    if cash_amount <= 0:
-                        validation_errors.append(f"Component {idx}: gross capital call requires a cash amount.")
-                    if commitment_impact <= 0:
-                        validation_errors.append(f"Component {idx}: gross capital call requires a commitment impact.")
-                elif component_type == "Recallable repayment":
-                    transaction_type = "repayment"
-                    amount = cash_amount
-                    investments = 0.0
-                    affects_called = True
-                    if commitment_impact > 0 or row_eq_interest > 0:
-                        validation_errors.append(f"Component {idx}: recallable repayment should only use cash amount.")
-                    if cash_amount <= 0:
-                        validation_errors.append(f"Component {idx}: recallable repayment requires a cash amount.")
-                elif component_type == "Non-recallable distribution":
-                    transaction_type = "distribution"
+                    if enabled:
+                        component_rows.append({
+                            "component_type": component_type,
+                            "description": description,
+                            "cash_amount": cash_amount,
+                            "commitment_impact": commitment_impact,
+                            "equalisation_interest": row_eq_interest
+                        })
+
+                validation_errors = []
+                preview_rows = []
+                rows_to_insert = []
+                net_wire = 0.0
+
+                if not component_rows:
+                    validation_errors.append("Add at least one enabled component.")
+
+                for idx, row in enumerate(component_rows, start=1):
+                    component_type = row["component_type"]
+                    cash_amount = float(row["cash_amount"] or 0)
+                    commitment_impact = float(row["commitment_impact"] or 0)
+                    row_eq_interest = float(row["equalisation_interest"] or 0)
+                    description = row["description"].strip()
+
+                    if cash_amount < 0 or commitment_impact < 0 or row_eq_interest < 0:
+                        validation_errors.append(f"Component {idx}: amounts cannot be negative.")
+
+                    transaction_type = "call"
                     amount = cash_amount
-                    investments = 0.0
-                    if commitment_impact > 0 or row_eq_interest > 0:
-                        validation_errors.append(f"Component {idx}: non-recallable distribution should only use cash amount.")
-                    if cash_amount <= 0:
-                        validation_errors.append(f"Component {idx}: non-recallable distribution requires a cash amount.")
-                elif component_type == "Realised gain distribution":
-                    transaction_type = "distribution"
-                    amount = cash_amount
-                    investments = 0.0
-                    if commitment_impact > 0 or row_eq_interest > 0:
-                        validation_errors.append(f"Component {idx}: realised gain distribution should only use cash amount.")
-                    if cash_amount <= 0:
-                        validation_errors.append(f"Component {idx}: realised gain distribution requires a cash amount.")
-                    if "realised gain" not in component_note.lower():
-                        component_note = f"Realised gain - {component_note}"
-                elif component_type == "Equalisation interest outside commitment":
-                    amount = 0.0
-                    investments = 0.0
-                    eq_interest = row_eq_interest
-                    if cash_amount > 0 or commitment_impact > 0:
-                        validation_errors.append(f"Component {idx}: equalisation interest outside commitment should only use equalisation interest.")
-                    if row_eq_interest <= 0:
-                        validation_errors.append(f"Component {idx}: equalisation interest component requires an interest amount.")
-
-                if transaction_type == "call":
-                    net_wire += amount + eq_interest
-                else:
-                    net_wire -= amount
-
-                note = f"{bundle_note_prefix}: {component_note}" if bundle_note_prefix else component_note
-                preview_rows.append({
-                    "Component": component_type,
-                    "Transaction Type": transaction_type,
-                    "Amount": amount,
-                    "Investments": investments,
-                    "Equalisation Interest": eq_interest,
-                    "Affects Called": affects_called,
-                    "Notes": note
-                })
-                rows_to_insert.append({
-                    "fund_id": fund["id"],
-                    "call_number": bundle_call_num,
-                    "call_date": str(bundle_call_date),
-                    "payment_date": str(bundle_payment_date),
-                    "transaction_type": transaction_type,
-                    "amount": amount,
-                    "investments": investments,
-                    "mgmt_fee": 0.0,
-                    "fund_expenses": 0.0,
-                    "is_recallable": affects_called,
-                    "affects_called": affects_called,
-                    "equalisation_interest": eq_interest,
-                    "is_future": bundle_is_future,
-                    "notes": note,
-                    "meta_data": {
-                        "investments_vs_expenses": "",
-                        "special_reallocations": "",
-                        "bundle_component_type": component_type,
-                        "bundle_component_description": description
-                    }
-                })
+                    investments = commitment_impact
+                    affects_called = False
+                    eq_interest = 0.0
+                    component_note = description or component_type
+
+                    if component_type == "Gross capital call":
+                        if row_eq_interest > 0:
+                            validation_errors.append(f"Component {idx}: use a separate equalisation interest component for interest outside commitment.")
+                        if cash_amount <= 0:
+                            validation_errors.append(f"Component {idx}: gross capital call requires a cash amount.")
+                        if commitment_impact <= 0:
+                            validation_errors.append(f"Component {idx}: gross capital call requires a commitment impact.")
+                    elif component_type == "Recallable repayment":
+                        transaction_type = "repayment"
+                        amount = cash_amount
+                        investments = 0.0
+                        affects_called = True
+                        if commitment_impact > 0 or row_eq_interest > 0:
+                            validation_errors.append(f"Component {idx}: recallable repayment should only use cash amount.")
+                        if cash_amount <= 0:
+                            validation_errors.append(f"Component {idx}: recallable repayment requires a cash amount.")
+                    elif component_type == "Non-recallable distribution":
+                        transaction_type = "distribution"
+                        amount = cash_amount
+                        investments = 0.0
+                        if commitment_impact > 0 or row_eq_interest > 0:
+                            validation_errors.append(f"Component {idx}: non-recallable distribution should only use cash amount.")
+                        if cash_amount <= 0:
+                            validation_errors.append(f"Component {idx}: non-recallable distribution requires a cash amount.")
+                    elif component_type == "Realised gain distribution":
+                        transaction_type = "distribution"
+                        amount = cash_amount
+                        investments = 0.0
+                        if commitment_impact > 0 or row_eq_interest > 0:
+                            validation_errors.append(f"Component {idx}: realised gain distribution should only use cash amount.")
+                        if cash_amount <= 0:
+                            validation_errors.append(f"Component {idx}: realised gain distribution requires a cash amount.")
+                        if "realised gain" not in component_note.lower():
+                            component_note = f"Realised gain - {component_note}"
+                    elif component_type == "Equalisation interest outside commitment":
+                        amount = 0.0
+                        investments = 0.0
+                        eq_interest = row_eq_interest
+                        if cash_amount > 0 or commitment_impact > 0:
+                            validation_errors.append(f"Component {idx}: equalisation interest outside commitment should only use equalisation interest.")
+                        if row_eq_interest <= 0:
+                            validation_errors.append(f"Component {idx}: equalisation interest component requires an interest amount.")
+
+                    if transaction_type == "call":
+                        net_wire += amount + eq_interest
+                    else:
+                        net_wire -= amount
+
+                    note = f"{bundle_note_prefix}: {component_note}" if bundle_note_prefix else component_note
+                    preview_rows.append({
+                        "Component": component_type,
+                        "Transaction Type": transaction_type,
+                        "Amount": amount,
+                        "Investments": investments,
+                        "Equalisation Interest": eq_interest,
+                        "Affects Called": affects_called,
+                        "Notes": note
+                    })
+                    rows_to_insert.append({
+                        "fund_id": fund["id"],
+                        "call_number": bundle_call_num,
+                        "call_date": str(bundle_call_date),
+                        "payment_date": str(bundle_payment_date),
+                        "transaction_type": transaction_type,
+                        "amount": amount,
+                        "investments": investments,
+                        "mgmt_fee": 0.0,
+                        "fund_expenses": 0.0,
+                        "is_recallable": affects_called,
+                        "affects_called": affects_called,
+                        "equalisation_interest": eq_interest,
+                        "is_future": bundle_is_future,
+                        "notes": note,
+                        "meta_data": {
+                            "investments_vs_expenses": "",
+                            "special_reallocations": "",
+                            "bundle_component_type": component_type,
+                            "bundle_component_description": description
+                        }
+                    })
 
-            if preview_rows:
-                st.markdown("**Preview Rows to Insert**")
-                st.dataframe(pd.DataFrame(preview_rows), use_container_width=True, hide_index=True)
-
-            st.metric("Calculated Net Wire Amount", format_currency(net_wire, currency_sym))
-            expected_wire_supplied = expected_wire != 0 or st.session_state.get(f"bundle_ai_expected_wire_set_{fund['id']}", False)
-            if expected_wire_supplied and abs(net_wire - expected_wire) > 0.01:
-                st.warning(
-                    f"Expected wire differs by {format_currency(abs(net_wire - expected_wire), currency_sym)}. "
-                    "Review the components before saving."
-                )
-
-            if validation_errors:
-                for err in validation_errors:
-                    st.error(err)
-
-            confirm_bundle_fund = False
-            if valid_bundle_fund:
-                confirm_bundle_fund = st.checkbox(
-                    "I confirm this notice belongs to the selected fund.",
-                    key=f"confirm_bundle_fund_{fund['id']}"
-                )
-
-            if valid_bundle_fund and st.button("Save Bundle Components", type="primary", key=f"save_bundle_{fund['id']}"):
-                if validation_errors or not confirm_bundle_fund:
-                    if not confirm_bundle_fund:
-                        st.error("Confirm this notice belongs to the selected fund before saving.")
-                    st.error("Bundle was not saved. Fix validation errors above and try again.")
-                else:
-                    try:
-                        payload = rows_to_insert
-                        response = get_supabase().table("capital_calls").insert(payload).execute()
-                        st.success("✅ Bundle components saved!")
-                        clear_cache_and_rerun()
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                if preview_rows:
+                    st.markdown("**Preview Rows to Insert**")
+                    st.dataframe(pd.DataFrame(preview_rows), use_container_width=True, hide_index=True)
+
+                st.metric("Calculated Net Wire Amount", format_currency(net_wire, currency_sym))
+                expected_wire_supplied = expected_wire != 0 or st.session_state.get(f"bundle_ai_expected_wire_set_{fund['id']}", False)
+                if expected_wire_supplied and abs(net_wire - expected_wire) > 0.01:
+                    st.warning(
+                        f"Expected wire differs by {format_currency(abs(net_wire - expected_wire), currency_sym)}. "
+                        "Review the components before saving."
+                    )
+
+                if validation_errors:
+                    for err in validation_errors:
+                        st.error(err)
+
+                confirm_bundle_fund = False
+                if valid_bundle_fund:
+                    confirm_bundle_fund = st.checkbox(
+                        "I confirm this notice belongs to the selected fund.",
+                        key=f"confirm_bundle_fund_{fund['id']}"
+                    )
+
+                if valid_bundle_fund and st.button("Save Bundle Components", type="primary", key=f"save_bundle_{fund['id']}"):
+                    if validation_errors or not confirm_bundle_fund:
+                        if not confirm_bundle_fund:
+                            st.error("Confirm this notice belongs to the selected fund before saving.")
+                        st.error("Bundle was not saved. Fix validation errors above and try again.")
+                    else:
+                        try:
+                            payload = rows_to_insert
+                            response = sb.table("capital_calls").insert(payload).execute()
+                            st.success("✅ Bundle components saved!")
+                            clear_cache_and_rerun(fetch_all_capital_calls)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
 
     with tab2:
-        if dists:
-            st.markdown("**Distributions List**")
-            for d in dists:
-                with st.expander(f"Dist #{d.get('dist_number')} | {d.get('dist_date','')} | {format_currency(float(d.get('amount',0)), currency_sym)}", expanded=False):
-                    col1, col2 = st.columns([4,1])
-                    with col1:
-                        st.write(f"Type: {d.get('dist_type','').capitalize()} | Amount: {format_currency(float(d.get('amount',0)), currency_sym)}")
-                    with col2:
-                        if st.button("🗑️", key=f"del_dist_{d['id']}", help="Delete Distribution"):
-                            st.session_state[f"confirm_del_dist_{d['id']}"] = True
-                    if st.session_state.get(f"confirm_del_dist_{d['id']}"):
-                        st.warning("Delete this Distribution?")
-                        dc1, dc2 = st.columns(2)
-                        with dc1:
-                            if st.button("✅ Delete", key=f"yes_dist_{d['id']}"):
-                                try:
-                                    log_action("DELETE", "distributions", f"Deleted distribution #{d.get('dist_number')} from {fund['name']}", d)
-                                    get_supabase().table("distributions").delete().eq("id", d["id"]).execute()
-                                    clear_cache_and_rerun()
-                                except Exception as e:
-                                    st.error(f"Error: {e}")
-                        with dc2:
-                            if st.button("❌ Cancel", key=f"no_dist_{d['id']}"):
-                                st.session_state.pop(f"confirm_del_dist_{d['id']}", None)
-                                st.rerun()
-        else:
-            st.info("No distributions yet")
+        if tab2.open:
+            if dists:
+                st.markdown("**Distributions List**")
+                for d in dists:
+                    with st.expander(f"Dist #{d.get('dist_number')} | {d.get('dist_date','')} | {format_currency(float(d.get('amount',0)), currency_sym)}", expanded=False):
+                        col1, col2 = st.columns([4,1])
+                        with col1:
+                            st.write(f"Type: {d.get('dist_type','').capitalize()} | Amount: {format_currency(float(d.get('amount',0)), currency_sym)}")
+                        with col2:
+                            st.button("🗑️", key=f"del_dist_{d['id']}", help="Delete Distribution", on_click=set_ui_flag, args=("confirm_del_dist", d['id']))
+                        if ui_flags().get(("confirm_del_dist", d['id'])):
+                            st.warning("Delete this Distribution?")
+                            dc1, dc2 = st.columns(2)
+                            with dc1:
+                                if st.button("✅ Delete", key=f"yes_dist_{d['id']}"):
+                                    try:
+                                        log_action("DELETE", "distributions", f"Deleted distribution #{d.get('dist_number')} from {fund['name']}", d)
+                                        sb.table("distributions").delete().eq("id", d["id"]).execute()
+                                        clear_cache_and_rerun(fetch_all_distributions)
+                                    except Exception as e:
+                                        st.error(f"Error: {e}")
+                            with dc2:
+                                st.button("❌ Cancel", key=f"no_dist_{d['id']}", on_click=clear_ui_flag, args=("confirm_del_dist", d['id']))
+            else:
+                st.info("No distributions yet")
 
-        st.divider()
-        st.markdown("**➕ Add Distribution**")
-        with st.form(f"add_dist_{fund['id']}"):
-            col1, col2 = st.columns(2)
-            with col1:
-                dist_num = st.number_input("Number", min_value=1, value=len(dists)+1)
-                dist_date = st.date_input("Date")
-            with col2:
-                dist_amount = st.number_input("Amount", min_value=0.0)
-                dist_type = st.selectbox("Type", ["income", "capital", "recycle"])
-            if st.form_submit_button("Save", type="primary"):
-                try:
-                    get_supabase().table("distributions").insert({
-                        "fund_id": fund["id"], "dist_number": dist_num,
-                        "dist_date": str(dist_date), "amount": dist_amount, "dist_type": dist_type.lower()
-                    }).execute()
-                    st.success("✅ Saved!")
-                    clear_cache_and_rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
+            st.divider()
+            st.markdown("**➕ Add Distribution**")
+            with st.form(f"add_dist_{fund['id']}"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    dist_num = st.number_input("Number", min_value=1, value=len(dists)+1)
+                    dist_date = st.date_input("Date")
+                with col2:
+                    dist_amount = st.number_input("Amount", min_value=0.0)
+                    dist_type = st.selectbox("Type", ["income", "capital", "recycle"])
+                if st.form_submit_button("Save", type="primary"):
+                    try:
+                        sb.table("distributions").insert({
+                            "fund_id": fund["id"], "dist_number": dist_num,
+                            "dist_date": str(dist_date), "amount": dist_amount, "dist_type": dist_type.lower()
+                        }).execute()
+                        st.success("✅ Saved!")
+                        clear_cache_and_rerun(fetch_all_distributions)
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
     with tab3:
-        if reports:
-            st.markdown("**Quarterly Reports**")
-            for r in reports:
-                report_tvpi = format_report_multiple(r.get("tvpi"))
-                report_irr = format_report_percent(r.get("irr"))
-                report_nav = format_report_currency(r.get("nav"), currency_sym=currency_sym)
-                report_dpi = format_report_multiple(r.get("dpi"))
-                report_rvpi = format_report_multiple(r.get("rvpi"))
-                with st.expander(f"Q{r['quarter']}/{r['year']} | TVPI: {report_tvpi} | IRR: {report_irr}", expanded=False):
-                    st.write(f"NAV: {report_nav} | DPI: {report_dpi} | RVPI: {report_rvpi}")
-                    if r.get('notes'):
-                        st.write(f"Notes: {r.get('notes')}")
-                    render_report_meta_data(r, currency_sym)
-
-                    st.divider()
-                    col_edit, col_del = st.columns([1, 1])
-                    with col_edit:
-                        if st.button("✏️ Edit", key=f"edit_rep_btn_{r['id']}"):
-                            st.session_state[f"editing_rep_{r['id']}"] = True
-                    with col_del:
-                        if st.button("🗑️ Delete", key=f"del_rep_btn_{r['id']}"):
-                            st.session_state[f"confirm_del_rep_{r['id']}"] = True
+        if tab3.open:
+            if reports:
+                st.markdown("**Quarterly Reports**")
+                for r in reports:
+                    report_tvpi = format_report_multiple(r.get("tvpi"))
+                    report_irr = format_report_percent(r.get("irr"))
+                    report_nav = format_report_currency(r.get("nav"), currency_sym=currency_sym)
+                    report_dpi = format_report_multiple(r.get("dpi"))
+                    report_rvpi = format_report_multiple(r.get("rvpi"))
+                    with st.expander(f"Q{r['quarter']}/{r['year']} | TVPI: {report_tvpi} | IRR: {report_irr}", expanded=False):
+                        st.write(f"NAV: {report_nav} | DPI: {report_dpi} | RVPI: {report_rvpi}")
+                        if r.get('notes'):
+                            st.write(f"Notes: {r.get('notes')}")
+                        render_report_meta_data(r, currency_sym)
+
+                        st.divider()
+                        col_edit, col_del = st.columns([1, 1])
+                        with col_edit:
+                            st.button("✏️ Edit", key=f"edit_rep_btn_{r['id']}", on_click=set_ui_flag, args=("editing_rep", r['id']))
+                        with col_del:
+                            st.button("🗑️ Delete", key=f"del_rep_btn_{r['id']}", on_click=set_ui_flag, args=("confirm_del_rep", r['id']))
                             
-                    if st.session_state.get(f"confirm_del_rep_{r['id']}"):
-                        st.warning("Delete this report?")
-                        rc1, rc2 = st.columns(2)
-                        with rc1:
-                            if st.button("✅ Yes, Delete", key=f"yes_rep_{r['id']}"):
-                                try:
-                                    log_action("DELETE", "quarterly_reports", f"Deleted report Q{r['quarter']}/{r['year']} of {fund['name']}", r)
-                                    get_supabase().table("quarterly_reports").delete().eq("id", r["id"]).execute()
-                                    st.session_state.pop(f"confirm_del_rep_{r['id']}", None)
-                                    clear_cache_and_rerun()
-                                except Exception as e:
-                                    st.error(f"Error: {e}")
-                        with rc2:
-                            if st.button("❌ Cancel", key=f"no_rep_{r['id']}"):
-                                st.session_state.pop(f"confirm_del_rep_{r['id']}", None)
-                                st.rerun()
-
-                    if st.session_state.get(f"editing_rep_{r['id']}"):
-                        with st.form(f"edit_rep_form_{r['id']}"):
-                            st.markdown("**✏️ Edit Report Details**")
-                            e_c1, e_c2, e_c3 = st.columns(3)
-                            with e_c1:
-                                edit_year = st.number_input("Year", value=int(r['year']), min_value=2020, max_value=2030)
-                                edit_quarter = st.selectbox("Quarter", [1, 2, 3, 4], index=[1,2,3,4].index(int(r['quarter'])))
-                                try:
-                                    def_rep_date = datetime.fromisoformat(str(r['report_date'])).date() if r.get('report_date') else date.today()
-                                except:
-                                    def_rep_date = date.today()
-                                edit_rep_date = st.date_input("Report Date", value=def_rep_date)
-                            with e_c2:
-                                edit_nav = st.number_input("NAV (Fund Level)", value=float(r.get('nav') or 0.0), min_value=0.0)
-                                edit_tvpi = st.number_input("TVPI", value=float(r.get('tvpi') or 0.0), step=0.01, format="%.2f")
-                                edit_dpi = st.number_input("DPI", value=float(r.get('dpi') or 0.0), step=0.01, format="%.2f")
-                            with e_c3:
-                                edit_rvpi = st.number_input("RVPI", value=float(r.get('rvpi') or 0.0), step=0.01, format="%.2f")
-                                edit_irr = st.number_input("IRR %", value=float(r.get('irr') or 0.0), step=0.1, format="%.1f")
-                                edit_notes = st.text_area("Notes", value=r.get('notes') or "")
-                            
-                            save_c1, save_c2 = st.columns(2)
-                            with save_c1:
-                                if st.form_submit_button("💾 Save Changes", type="primary"):
+                        if ui_flags().get(("confirm_del_rep", r['id'])):
+                            st.warning("Delete this report?")
+                            rc1, rc2 = st.columns(2)
+                            with rc1:
+                                if st.button("✅ Yes, Delete", key=f"yes_rep_{r['id']}"):
                                     try:
-                                        log_action("UPDATE", "quarterly_reports", f"Updated report Q{r['quarter']}/{r['year']}", r)
-                                        get_supabase().table("quarterly_reports").update({
-                                            "year": edit_year, "quarter": edit_quarter,
-                                            "report_date": str(edit_rep_date), "nav": edit_nav,
-                                            "tvpi": edit_tvpi, "dpi": edit_dpi, "rvpi": edit_rvpi, 
-                                            "irr": edit_irr, "notes": edit_notes
-                                        }).eq("id", r["id"]).execute()
-                                        st.session_state.pop(f"editing_rep_{r['id']}", None)
-                                        clear_cache_and_rerun()
+                                        log_action("DELETE", "quarterly_reports", f"Deleted report Q{r['quarter']}/{r['year']} of {fund['name']}", r)
+                                        sb.table("quarterly_reports").delete().eq("id", r["id"]).execute()
+                                        ui_flags().pop(("confirm_del_rep", r['id']), None)
+                                        clear_cache_and_rerun(fetch_all_quarterly_reports)
                                     except Exception as e:
                                         st.error(f"Error: {e}")
-                            with save_c2:
-                                if st.form_submit_button("❌ Close"):
-                                    st.session_state.pop(f"editing_rep_{r['id']}", None)
-                                    st.rerun()
-
-            if len(reports) > 1:
-                labels = [f"Q{r['quarter']}/{r['year']}" for r in reports]
-                fig = go.Figure()
-                if any(r.get("tvpi") for r in reports):
-                    fig.add_trace(go.Scatter(x=labels, y=[float(r.get("tvpi")) for r in reports], name="TVPI", line=dict(color="#4ade80")))
-                if any(r.get("dpi") for r in reports):
-                    fig.add_trace(go.Scatter(x=labels, y=[float(r.get("dpi")) for r in reports], name="DPI", line=dict(color="#60a5fa")))
-                fig.update_layout(title="Performance Over Time", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white')
-                st.plotly_chart(fig, use_container_width=True, key=f"perf_chart_{fund['id']}")
-        else:
-            st.info("No quarterly reports for this fund yet.")
+                            with rc2:
+                                st.button("❌ Cancel", key=f"no_rep_{r['id']}", on_click=clear_ui_flag, args=("confirm_del_rep", r['id']))
+
+                        if ui_flags().get(("editing_rep", r['id'])):
+                            with st.form(f"edit_rep_form_{r['id']}"):
+                                st.markdown("**✏️ Edit Report Details**")
+                                e_c1, e_c2, e_c3 = st.columns(3)
+                                with e_c1:
+                                    edit_year = st.number_input("Year", value=int(r['year']), min_value=2020, max_value=2030)
+                                    edit_quarter = st.selectbox("Quarter", [1, 2, 3, 4], index=[1,2,3,4].index(int(r['quarter'])))
+                                    def_rep_date = parse_iso_date(r.get('report_date')) or date.today()
+                                    edit_rep_date = st.date_input("Report Date", value=def_rep_date)
+                                with e_c2:
+                                    edit_nav = st.number_input("NAV (Fund Level)", value=float(r.get('nav') or 0.0), min_value=0.0)
+                                    edit_tvpi = st.number_input("TVPI", value=float(r.get('tvpi') or 0.0), step=0.01, format="%.2f")
+                                    edit_dpi = st.number_input("DPI", value=float(r.get('dpi') or 0.0), step=0.01, format="%.2f")
+                                with e_c3:
+                                    edit_rvpi = st.number_input("RVPI", value=float(r.get('rvpi') or 0.0), step=0.01, format="%.2f")
+                                    edit_irr = st.number_input("IRR %", value=float(r.get('irr') or 0.0), step=0.1, format="%.1f")
+                                    edit_notes = st.text_area("Notes", value=r.get('notes') or "")
+                            
+                                save_c1, save_c2 = st.columns(2)
+                                with save_c1:
+                                    if st.form_submit_button("💾 Save Changes", type="primary"):
+                                        try:
+                                            log_action("UPDATE", "quarterly_reports", f"Updated report Q{r['quarter']}/{r['year']}", r)
+                                            sb.table("quarterly_reports").update({
+                                                "year": edit_year, "quarter": edit_quarter,
+                                                "report_date": str(edit_rep_date), "nav": edit_nav,
+                                                "tvpi": edit_tvpi, "dpi": edit_dpi, "rvpi": edit_rvpi, 
+                                                "irr": edit_irr, "notes": edit_notes
+                                            }).eq("id", r["id"]).execute()
+                                            ui_flags().pop(("editing_rep", r['id']), None)
+                                            clear_cache_and_rerun(fetch_all_quarterly_reports)
+                                        except Exception as e:
+                                            st.error(f"Error: {e}")
+                                with save_c2:
+                                    st.form_submit_button("❌ Close", on_click=clear_ui_flag, args=("editing_rep", r['id']))
+
+                if len(reports) > 1:
+                    report_rows = tuple((r["quarter"], r["year"], r.get("tvpi"), r.get("dpi")) for r in reports)
+                    fig = build_performance_figure(report_rows)
+                    st.plotly_chart(fig, use_container_width=True, key=f"perf_chart_{fund['id']}")
+            else:
+                st.info("No quarterly reports for this fund yet.")
 
-        st.divider()
-        st.markdown("**🤖 Add Quarterly Report from File (AI Extraction)**")
-        uploaded_rep_file = st.file_uploader("Upload Quarterly Report (PDF / Excel / CSV)", type=["pdf", "xlsx", "xls", "csv"], key=f"rep_uploader_{fund['id']}")
+            st.divider()
+            st.markdown("**🤖 Add Quarterly Report from File (AI Extraction)**")
+            uploaded_rep_file = st.file_uploader("Upload Quarterly Report (PDF / Excel / CSV)", type=["pdf", "xlsx", "xls", "csv"], key=f"rep_uploader_{fund['id']}")
         
-        if uploaded_rep_file:
-            if st.button("Analyze Document Now", type="primary", key=f"rep_analyze_btn_{fund['id']}"):
-                with st.spinner("Claude is analyzing the report..."):
-                    try:
-                        file_bytes = uploaded_rep_file.read()
-                        file_name = uploaded_rep_file.name
-                        if file_name.lower().endswith('.pdf'):
-                            rep_text = extract_pdf_text(file_bytes)
-                        else:
-                            if file_name.lower().endswith('.csv'):
-                                df = pd.read_csv(io.BytesIO(file_bytes))
-                            else:
-                                df = pd.read_excel(io.BytesIO(file_bytes))
-                            rep_text = df.to_string(index=False)
-                            if len(rep_text) > 12000:
-                                rep_text = rep_text[:4000] + "\n[...]\n" + rep_text[-8000:]
+            if uploaded_rep_file:
+                if st.button("Analyze Document Now", type="primary", key=f"rep_analyze_btn_{fund['id']}"):
+                    with st.spinner("Claude is analyzing the report..."):
+                        try:
+                            rep_text = extract_report_text(uploaded_rep_file)
                         
-                        ai_result = analyze_quarterly_report_with_ai(rep_text)
-                        st.session_state[f"rep_ai_result_{fund['id']}"] = ai_result
-                        st.success("✅ Data extracted successfully! Please review and confirm in the form below.")
-                    except Exception as e:
-                        st.error(f"Error analyzing document: {e}. (If Excel, ensure openpyxl is in requirements.txt)")
+                            ai_result = analyze_quarterly_report_with_ai(rep_text)
+                            st.session_state[f"rep_ai_result_{fund['id']}"] = ai_result
+                            st.session_state[f"rep_defaults_{fund['id']}"] = quarterly_report_form_defaults(ai_result)
+                            st.success("✅ Data extracted successfully! Please review and confirm in the form below.")
+                        except Exception as e:
+                            st.error(f"Error analyzing document: {e}. (If Excel, ensure openpyxl is in requirements.txt)")
 
-        st.divider()
-        st.markdown("**➕ Or Enter Details Manually**")
-        
-        ai_rep = st.session_state.get(f"rep_ai_result_{fund['id']}", {})
-        
-        def_year = int(ai_rep.get("year")) if ai_rep.get("year") else 2025
-        def_quarter = int(ai_rep.get("quarter")) if ai_rep.get("quarter") in [1,2,3,4] else 1
+            st.divider()
+            st.markdown("**➕ Or Enter Details Manually**")
         
-        def_rep_date = date.today()
-        if ai_rep.get("report_date"):
-            try: def_rep_date = datetime.strptime(ai_rep["report_date"], "%Y-%m-%d").date()
-            except: pass
+            ai_rep = st.session_state.get(f"rep_ai_result_{fund['id']}", {})
+            rep_defaults = st.session_state.get(f"rep_defaults_{fund['id']}") or quarterly_report_form_defaults({})
 
-        with st.form(f"add_report_{fund['id']}"):
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                year = st.number_input("Year", value=def_year, min_value=2020, max_value=2030)
-                quarter = st.selectbox("Quarter", [1, 2, 3, 4], index=[1,2,3,4].index(def_quarter))
-                report_date = st.date_input("Report Date", value=def_rep_date)
-            with col2:
-                nav = st.number_input("NAV (Fund Level)", min_value=0.0, value=float(ai_rep.get("nav") or 0.0))
-                tvpi = st.number_input("TVPI", min_value=0.0, step=0.01, format="%.2f", value=float(ai_rep.get("tvpi") or 0.0))
-                dpi = st.number_input("DPI", min_value=0.0, step=0.01, format="%.2f", value=float(ai_rep.get("dpi") or 0.0))
-            with col3:
-                rvpi = st.number_input("RVPI", min_value=0.0, step=0.01, format="%.2f", value=float(ai_rep.get("rvpi") or 0.0))
-                irr = st.number_input("IRR %", step=0.1, format="%.1f", value=float(ai_rep.get("irr") or 0.0))
-                notes = st.text_area("Notes")
-
-            st.markdown("**Advanced PE/VC Parameters**")
-            adv_col1, adv_col2, adv_col3 = st.columns(3)
-            with adv_col1:
-                total_invested = st.number_input("Total Invested", value=float(ai_rep.get("total_invested") or 0.0))
-                total_realized = st.number_input("Total Realized", value=float(ai_rep.get("total_realized") or 0.0))
-                total_unrealized = st.number_input("Total Unrealized", value=float(ai_rep.get("total_unrealized") or 0.0))
-                total_value = st.number_input("Total Value (GP)", value=float(ai_rep.get("total_value") or 0.0))
-            with adv_col2:
-                gross_moic = st.number_input("Gross MOIC", value=float(ai_rep.get("gross_moic") or 0.0), step=0.01, format="%.2f")
-                gross_irr = st.number_input("Gross IRR %", value=float(ai_rep.get("gross_irr") or 0.0), step=0.1, format="%.1f")
-                net_moic = st.number_input("Net MOIC", value=float(ai_rep.get("net_moic") or 0.0), step=0.01, format="%.2f")
-                net_irr = st.number_input("Net IRR %", value=float(ai_rep.get("net_irr") or 0.0), step=0.1, format="%.1f")
-            with adv_col3:
-                inv_vs_exp = st.text_area("Investments vs Expenses", value=str(ai_rep.get("investments_vs_expenses") or ""))
-                spec_realloc = st.text_area("Special Reallocations", value=str(ai_rep.get("special_reallocations") or ""))
+            with st.form(f"add_report_{fund['id']}"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    year = st.number_input("Year", value=rep_defaults["year"], min_value=2020, max_value=2030)
+                    quarter = st.selectbox("Quarter", [1, 2, 3, 4], index=rep_defaults["quarter"] - 1)
+                    report_date = st.date_input("Report Date", value=rep_defaults["report_date"] or date.today())
+                with col2:
+                    nav = st.number_input("NAV (Fund Level)", min_value=0.0, value=rep_defaults["nav"])
+                    tvpi = st.number_input("TVPI", min_value=0.0, step=0.01, format="%.2f", value=rep_defaults["tvpi"])
+                    dpi = st.number_input("DPI", min_value=0.0, step=0.01, format="%.2f", value=rep_defaults["dpi"])
+                with col3:
+                    rvpi = st.number_input("RVPI", min_value=0.0, step=0.01, format="%.2f", value=rep_defaults["rvpi"])
+                    irr = st.number_input("IRR %", step=0.1, format="%.1f", value=rep_defaults["irr"])
+                    notes = st.text_area("Notes")
+
+                st.markdown("**Advanced PE/VC Parameters**")
+                adv_col1, adv_col2, adv_col3 = st.columns(3)
+                with adv_col1:
+                    total_invested = st.number_input("Total Invested", value=rep_defaults["total_invested"])
+                    total_realized = st.number_input("Total Realized", value=rep_defaults["total_realized"])
+                    total_unrealized = st.number_input("Total Unrealized", value=rep_defaults["total_unrealized"])
+                    total_value = st.number_input("Total Value (GP)", value=rep_defaults["total_value"])
+                with adv_col2:
+                    gross_moic = st.number_input("Gross MOIC", value=rep_defaults["gross_moic"], step=0.01, format="%.2f")
+                    gross_irr = st.number_input("Gross IRR %", value=rep_defaults["gross_irr"], step=0.1, format="%.1f")
+                    net_moic = st.number_input("Net MOIC", value=rep_defaults["net_moic"], step=0.01, format="%.2f")
+                    net_irr = st.number_input("Net IRR %", value=rep_defaults["net_irr"], step=0.1, format="%.1f")
+                with adv_col3:
+                    inv_vs_exp = st.text_area("Investments vs Expenses", value=rep_defaults["investments_vs_expenses"])
+                    spec_realloc = st.text_area("Special Reallocations", value=rep_defaults["special_reallocations"])
                 
-            if st.form_submit_button("Save Report", type="primary"):
-                try:
-                    meta_data = {
-                        "paid_in_capital": total_invested,
-                        "distributions": total_realized,
-                        "investment_contributions": ai_rep.get("investment_contributions"),
-                        "expense_contributions": ai_rep.get("expense_contributions"),
-                        "management_fee": ai_rep.get("management_fee"),
-                        "organizational_costs": ai_rep.get("organizational_costs"),
-                        "other_expenses": ai_rep.get("other_expenses"),
-                        "total_invested": total_invested,
-                        "total_realized": total_realized,
-                        "total_unrealized": total_unrealized,
-                        "total_value": total_value,
-                        "unrealized_gain_loss": ai_rep.get("unrealized_gain_loss"),
-                        "special_reallocation": ai_rep.get("special_reallocation"),
-                        "gross_moic": gross_moic,
-                        "gross_irr": gross_irr,
-                        "net_moic": net_moic,
-                        "net_irr": net_irr,
-                        "investments_vs_expenses": inv_vs_exp,
-                        "special_reallocations": spec_realloc
-                    }
-                    payload = {
-                        "fund_id": fund["id"], "year": year, "quarter": quarter,
-                        "report_date": str(report_date), "nav": nav,
-                        "tvpi": tvpi, "dpi": dpi, "rvpi": rvpi, "irr": irr, "notes": notes,
-                        "meta_data": meta_data
-                    }
-                    payload = normalize_quarterly_report_payload(payload)
-                    response = get_supabase().table("quarterly_reports").insert(payload).execute()
+                if st.form_submit_button("Save Report", type="primary"):
+                    try:
+                        meta_data = {
+                            "paid_in_capital": total_invested,
+                            "distributions": total_realized,
+                            "investment_contributions": ai_rep.get("investment_contributions"),
+                            "expense_contributions": ai_rep.get("expense_contributions"),
+                            "management_fee": ai_rep.get("management_fee"),
+                            "organizational_costs": ai_rep.get("organizational_costs"),
+                            "other_expenses": ai_rep.get("other_expenses"),
+                            "total_invested": total_invested,
+                            "total_realized": total_realized,
+                            "total_unrealized": total_unrealized,
+                            "total_value": total_value,
+                            "unrealized_gain_loss": ai_rep.get("unrealized_gain_loss"),
+                            "special_reallocation": ai_rep.get("special_reallocation"),
+                            "gross_moic": gross_moic,
+                            "gross_irr": gross_irr,
+                            "net_moic": net_moic,
+                            "net_irr": net_irr,
+                            "investments_vs_expenses": inv_vs_exp,
+                            "special_reallocations": spec_realloc
+                        }
+                        payload = {
+                            "fund_id": fund["id"], "year": year, "quarter": quarter,
+                            "report_date": str(report_date), "nav": nav,
+                            "tvpi": tvpi, "dpi": dpi, "rvpi": rvpi, "irr": irr, "notes": notes,
+                            "meta_data": meta_data
+                        }
+                        payload = normalize_quarterly_report_payload(payload)
+                        response = sb.table("quarterly_reports").insert(payload).execute()
                     
-                    st.session_state.pop(f"rep_ai_result_{fund['id']}", None)
-                    st.success("✅ Saved!")
-                    clear_cache_and_rerun()
-                except Exception as e:
-                    st.error(f"Error: {e}")
+                        st.session_state.pop(f"rep_ai_result_{fund['id']}", None)
+                        st.session_state.pop(f"rep_defaults_{fund['id']}", None)
+                        st.success("✅ Saved!")
+                        clear_cache_and_rerun(fetch_all_quarterly_reports)
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
 def show_investors():
     st.title("👥 Manage Investors & FOF Calls")
@@ -3134,7 +3252,7 @@ def show_investors():
 
     investors = get_investors()
     lp_calls = get_lp_calls()
-    payments = get_lp_payments()
+    payments_by_key = get_lp_payments_by_key()
 
     col_add_inv, col_manage_inv = st.columns(2)
     
@@ -3154,7 +3272,7 @@ def show_investors():
                             sb.table("investors").insert({"name": inv_name, "commitment": inv_commit_norm}).execute()
                             log_action("INSERT", "investors", f"Added new investor: {inv_name}", {"commitment": inv_commit_norm})
                             st.success("Investor added!")
-                            clear_cache_and_rerun()
+                            clear_cache_and_rerun(fetch_all_investors)
                         except Exception as e:
                             st.error(f"Error: {e}")
             with tab_bulk:
@@ -3170,25 +3288,21 @@ def show_investors():
                                     df = pd.read_excel(uploaded_inv_file)
                                 
                                 if len(df.columns) >= 2:
-                                    count = 0
-                                    for idx, row in df.iterrows():
-                                        name_val = str(row.iloc[0]).strip()
-                                        if name_val.lower() == 'nan' or not name_val:
-                                            continue
-                                        
-                                        commit_str = str(row.iloc[1]).replace(',', '').replace('$', '').replace('€', '').strip()
-                                        try:
-                                            commit_val = float(commit_str)
-                                        except:
-                                            commit_val = 0.0
-                                        commit_val = normalize_commitment_amount(commit_val)
-                                        
-                                        sb.table("investors").insert({"name": name_val, "commitment": commit_val}).execute()
-                                        count += 1
+                                    names = df.iloc[:, 0].fillna("").astype(str).str.strip()
+                                    commits = pd.to_numeric(
+                                        df.iloc[:, 1].fillna("").astype(str).str.replace(r"[,$€\s]", "", regex=True),
+                                        errors="coerce",
+                                    ).fillna(0.0)
+                                    commits = commits.map(normalize_commitment_amount)
+                                    keep = names.ne("") & names.str.lower().ne("nan")
+                                    new_investors = pd.DataFrame({"name": names[keep], "commitment": commits[keep]}).to_dict("records")
                                     
+                                    if new_investors:
+                                        sb.table("investors").insert(new_investors).execute()
+                                    count = len(new_investors)
                                     log_action("INSERT", "investors", f"Bulk uploaded {count} investors", {})
                                     st.success(f"✅ {count} investors successfully added!")
-                                    clear_cache_and_rerun()
+                                    clear_cache_and_rerun(fetch_all_investors)
                                 else:
                                     st.error("File must contain at least 2 columns.")
                             except Exception as e:
@@ -3198,56 +3312,53 @@ def show_investors():
         with st.expander("⚙️ Manage Existing Investors (Edit / Delete)"):
             if not investors:
                 st.write("No investors in the system.")
-            for inv in investors:
-                c1, c2, c3, c4 = st.columns([4, 3, 1, 1])
-                with c1:
-                    st.write(f"**{inv['name']}**")
-                with c2:
-                    st.write(format_currency(investor_commitment_value(inv), currency_sym))
-                with c3:
-                    if st.button("✏️", key=f"edit_inv_btn_{inv['id']}", help="Edit Investor"):
-                        st.session_state[f"editing_inv_{inv['id']}"] = True
-                with c4:
-                    if st.button("🗑️", key=f"del_inv_btn_{inv['id']}", help="Delete Investor"):
-                        st.session_state[f"confirm_del_inv_{inv['id']}"] = True
-                
-                if st.session_state.get(f"confirm_del_inv_{inv['id']}"):
-                    st.warning(f"Delete '{inv['name']}'?")
-                    cd1, cd2 = st.columns(2)
-                    with cd1:
-                        if st.button("✅ Yes", key=f"yes_del_inv_{inv['id']}"):
-                            try:
+            else:
+                pending_changes = []
+                pending_deletes = []
+                with st.form("investors_form", border=False):
+                    inv_df = pd.DataFrame({
+                        "id": [inv["id"] for inv in investors],
+                        "Investor Name": [inv["name"] for inv in investors],
+                        "Commitment": [investor_commitment_value(inv) for inv in investors],
+                        "Delete": [False] * len(investors),
+                    })
+                    edited_inv_df = st.data_editor(
+                        inv_df,
+                        key="inv_editor",
+                        hide_index=True,
+                        use_container_width=True,
+                        column_config={
+                            "id": None,
+                            "Investor Name": st.column_config.TextColumn(required=True, width="large"),
+                            "Commitment": st.column_config.NumberColumn(f"Commitment ({currency_sym})", format="localized", min_value=0.0, step=500000.0, required=True),
+                            "Delete": st.column_config.CheckboxColumn("🗑️", help="Delete investor on save", width="small"),
+                        },
+                    )
+
+                    for inv, row in zip(investors, edited_inv_df.to_dict("records")):
+                        if row["Delete"]:
+                            pending_deletes.append(inv)
+                            continue
+                        new_name = str(row["Investor Name"]).strip()
+                        new_commit_norm = normalize_commitment_amount(row["Commitment"])
+                        if new_name != inv["name"] or new_commit_norm != investor_commitment_value(inv):
+                            pending_changes.append((inv, {"id": inv["id"], "name": new_name, "commitment": new_commit_norm}))
+
+                    submitted = st.form_submit_button("💾 Save Investor Changes", type="primary")
+
+                if submitted and (pending_changes or pending_deletes):
+                    try:
+                        if pending_deletes:
+                            for inv in pending_deletes:
                                 log_action("DELETE", "investors", f"Deleted investor: {inv['name']}", inv)
-                                sb.table("investors").delete().eq("id", inv["id"]).execute()
-                                st.session_state.pop(f"confirm_del_inv_{inv['id']}", None)
-                                clear_cache_and_rerun()
-                            except Exception as e:
-                                st.error(f"Error: {e}")
-                    with cd2:
-                        if st.button("❌ Cancel", key=f"no_del_inv_{inv['id']}"):
-                            st.session_state.pop(f"confirm_del_inv_{inv['id']}", None)
-                            st.rerun()
-
-                if st.session_state.get(f"editing_inv_{inv['id']}"):
-                    with st.form(f"edit_inv_form_{inv['id']}"):
-                        new_name = st.text_input("Investor Name", value=inv["name"])
-                        new_commit = st.number_input("Commitment", value=investor_commitment_value(inv), step=500000.0)
-                        ce1, ce2 = st.columns(2)
-                        with ce1:
-                            if st.form_submit_button("💾 Save Changes"):
-                                try:
-                                    log_action("UPDATE", "investors", f"Updated investor: {inv['name']} to {new_name}", inv)
-                                    new_commit_norm = normalize_commitment_amount(new_commit)
-                                    sb.table("investors").update({"name": new_name, "commitment": new_commit_norm}).eq("id", inv["id"]).execute()
-                                    st.session_state.pop(f"editing_inv_{inv['id']}", None)
-                                    clear_cache_and_rerun()
-                                except Exception as e:
-                                    st.error(f"Error: {e}")
-                        with ce2:
-                            if st.form_submit_button("❌ Close"):
-                                st.session_state.pop(f"editing_inv_{inv['id']}", None)
-                                st.rerun()
-                    st.divider()
+                            sb.table("investors").delete().in_("id", [inv["id"] for inv in pending_deletes]).execute()
+                        if pending_changes:
+                            for inv, change in pending_changes:
+                                log_action("UPDATE", "investors", f"Updated investor: {inv['name']} to {change['name']}", inv)
+                            sb.table("investors").upsert([change for _, change in pending_changes], on_conflict="id").execute()
+                        clear_cache_and_rerun(fetch_all_investors, fetch_all_lp_payments)
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
     st.divider()
     
@@ -3259,26 +3370,21 @@ def show_investors():
         st.info("No investors defined. Add an investor above.")
         return
 
-    data = []
+    inv_commits = [investor_commitment_value(inv) for inv in investors]
+    total_fund_commitment = sum(inv_commits)
+    paid_keys = {key for key, p in payments_by_key.items() if p["is_paid"]}
+    columns = {
+        "id": [inv["id"] for inv in investors],
+        "Investor Name": [inv["name"] for inv in investors],
+        "Commitment": [format_currency(v, currency_sym) for v in inv_commits],
+    }
     col_mapping = {}
-    total_fund_commitment = 0
-    
-    for inv in investors:
-        inv_commit = investor_commitment_value(inv)
-        total_fund_commitment += inv_commit
-        row = {
-            "id": inv["id"],
-            "Investor Name": inv["name"],
-            "Commitment": format_currency(inv_commit, currency_sym)
-        }
-        for c in lp_calls:
-            col_name = f"{c['call_date']} ({c['call_pct']}%)"
-            col_mapping[col_name] = c
-            payment = next((p for p in payments if p["lp_call_id"] == c["id"] and p["investor_id"] == inv["id"]), None)
-            row[col_name] = payment["is_paid"] if payment else False
-        data.append(row)
-
-    df = pd.DataFrame(data)
+    for c in lp_calls:
+        col_name = f"{c['call_date']} ({c['call_pct']}%)"
+        col_mapping[col_name] = c
+        columns[col_name] = [(c["id"], inv_id) in paid_keys for inv_id in columns["id"]]
+
+    df = pd.DataFrame(columns)
     
     with col_t_export:
         excel_data = convert_df_to_excel(df.drop(columns=["id"], errors="ignore"))
@@ -3289,7 +3395,7 @@ def show_investors():
             use_container_width=True
         )
     
-    edited_df = st.data_editor(
+    st.data_editor(
         df,
         column_config={"id": None},
         disabled=["Investor Name", "Commitment"],
@@ -3300,72 +3406,34 @@ def show_investors():
 
     if st.button("💾 Save Payment Statuses", type="primary"):
         try:
-            for index, row in edited_df.iterrows():
-                inv_id = row["id"]
-                for col_name, c in col_mapping.items():
-                    if col_name in row:
-                        is_paid = bool(row[col_name])
-                        existing = [p for p in payments if p["lp_call_id"] == c["id"] and p["investor_id"] == inv_id]
-                        if existing:
-                            if existing[0]["is_paid"] != is_paid:
-                                sb.table("lp_payments").update({"is_paid": is_paid}).eq("id", existing[0]["id"]).execute()
-                        else:
-                            sb.table("lp_payments").insert({
-                                "lp_call_id": c["id"],
-                                "investor_id": inv_id,
-                                "is_paid": is_paid
-                            }).execute()
+            # Only the cells the user touched, as {row position: {column: new value}}.
+            edited_rows = st.session_state["lp_global_editor"]["edited_rows"]
+            to_upsert = []
+            for row_pos, changes in edited_rows.items():
+                inv_id = columns["id"][int(row_pos)]
+                for col_name, value in changes.items():
+                    c = col_mapping.get(col_name)
+                    if c is None:
+                        continue
+                    is_paid = bool(value)
+                    existing = payments_by_key.get((c["id"], inv_id))
+                    if existing is None or existing["is_paid"] != is_paid:
+                        to_upsert.append({
+                            "lp_call_id": c["id"],
+                            "investor_id": inv_id,
+                            "is_paid": is_paid
+                        })
+            if to_upsert:
+                sb.rpc("save_lp_payments", {"payload": to_upsert}).execute()
             st.success("✅ Payment statuses successfully updated!")
-            clear_cache_and_rerun()
+            clear_cache_and_rerun(fetch_all_lp_payments)
         except Exception as e:
             st.error(f"Update error: {e}")
 
     st.divider()
     st.markdown("### 📊 FOF Collection Summary")
 
-    summary_data = []
-    total_called_cum = 0.0
-    total_received_cum = 0.0
-    for c in lp_calls:
-        call_pct = c["call_pct"] / 100.0
-        total_called_amount = total_fund_commitment * call_pct
-
-        paid_commit = 0
-        for inv in investors:
-            payment = next((p for p in payments if p["lp_call_id"] == c["id"] and p["investor_id"] == inv["id"]), None)
-            if payment and payment["is_paid"]:
-                paid_commit += investor_commitment_value(inv)
-
-        total_paid_amount = paid_commit * call_pct
-        outstanding = total_called_amount - total_paid_amount
-        total_called_cum += total_called_amount
-        total_received_cum += total_paid_amount
-
-        summary_data.append({
-            "Call": f"{c['call_date']} ({c['call_pct']}%)",
-            "Total Required": format_currency(total_called_amount, currency_sym),
-            "Total Received": format_currency(total_paid_amount, currency_sym),
-            "Outstanding Balance": format_currency(outstanding, currency_sym)
-        })
-
-    total_outstanding_cum = total_called_cum - total_received_cum
-    called_pct_overall = (total_called_cum / total_fund_commitment * 100) if total_fund_commitment > 0 else 0.0
-    received_pct_overall = (total_received_cum / total_fund_commitment * 100) if total_fund_commitment > 0 else 0.0
-
-    col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
-    with col_sum1:
-        st.metric("Total LP Commitments", format_currency(total_fund_commitment, currency_sym))
-    with col_sum2:
-        st.metric("Total Called to Date", format_currency(total_called_cum, currency_sym), f"{called_pct_overall:.1f}% of commitments")
-    with col_sum3:
-        st.metric("Total Received to Date", format_currency(total_received_cum, currency_sym), f"{received_pct_overall:.1f}% of commitments")
-    with col_sum4:
-        st.metric("Outstanding", format_currency(total_outstanding_cum, currency_sym))
-
-    if lp_calls:
-        st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
-    else:
-        st.info("No active capital calls yet.")
+    render_fof_collection_summary(lp_calls, total_fund_commitment, currency_sym)
 
 
     st.divider()
@@ -3385,7 +3453,7 @@ def show_investors():
                         "call_pct": new_call_pct
                     }).execute()
                     st.success("✅ New LP Call added to the table!")
-                    clear_cache_and_rerun()
+                    clear_cache_and_rerun(fetch_all_lp_calls)
                 except Exception as e:
                     st.error(f"Error: {e}")
 
@@ -3400,13 +3468,11 @@ def show_investors():
                 with lc2:
                     st.write(f"{c['call_pct']}%")
                 with lc3:
-                    if st.button("✏️", key=f"edit_lpc_btn_{c['id']}"):
-                        st.session_state[f"editing_lpc_{c['id']}"] = True
+                    st.button("✏️", key=f"edit_lpc_btn_{c['id']}", on_click=set_ui_flag, args=("editing_lpc", c['id']))
                 with lc4:
-                    if st.button("🗑️", key=f"del_lpc_btn_{c['id']}"):
-                        st.session_state[f"confirm_del_lpc_{c['id']}"] = True
+                    st.button("🗑️", key=f"del_lpc_btn_{c['id']}", on_click=set_ui_flag, args=("confirm_del_lpc", c['id']))
                 
-                if st.session_state.get(f"confirm_del_lpc_{c['id']}"):
+                if ui_flags().get(("confirm_del_lpc", c['id'])):
                     st.warning("Delete this LP call?")
                     d_c1, d_c2 = st.columns(2)
                     with d_c1:
@@ -3414,21 +3480,16 @@ def show_investors():
                             try:
                                 log_action("DELETE", "lp_calls", f"Deleted LP capital call: {c['call_date']}", c)
                                 sb.table("lp_calls").delete().eq("id", c["id"]).execute()
-                                st.session_state.pop(f"confirm_del_lpc_{c['id']}", None)
-                                clear_cache_and_rerun()
+                                ui_flags().pop(("confirm_del_lpc", c['id']), None)
+                                clear_cache_and_rerun(fetch_all_lp_calls, fetch_all_lp_payments)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                     with d_c2:
-                        if st.button("❌ Cancel", key=f"no_del_lpc_{c['id']}"):
-                            st.session_state.pop(f"confirm_del_lpc_{c['id']}", None)
-                            st.rerun()
+                        st.button("❌ Cancel", key=f"no_del_lpc_{c['id']}", on_click=clear_ui_flag, args=("confirm_del_lpc", c['id']))
 
-                if st.session_state.get(f"editing_lpc_{c['id']}"):
+                if ui_flags().get(("editing_lpc", c['id'])):
                     with st.form(f"edit_lpc_form_{c['id']}"):
-                        try:
-                            def_date = datetime.fromisoformat(str(c['call_date'])).date()
-                        except:
-                            def_date = date.today()
+                        def_date = parse_iso_date(c.get('call_date')) or date.today()
                         edit_date = st.date_input("Date", value=def_date)
                         edit_pct = st.number_input("Percentage", value=float(c['call_pct']))
                         e_c1, e_c2 = st.columns(2)
@@ -3437,14 +3498,12 @@ def show_investors():
                                 try:
                                     log_action("UPDATE", "lp_calls", f"Updated LP capital call: {c['call_date']}", c)
                                     sb.table("lp_calls").update({"call_date": str(edit_date), "call_pct": edit_pct}).eq("id", c["id"]).execute()
-                                    st.session_state.pop(f"editing_lpc_{c['id']}", None)
-                                    clear_cache_and_rerun()
+                                    ui_flags().pop(("editing_lpc", c['id']), None)
+                                    clear_cache_and_rerun(fetch_all_lp_calls)
                                 except Exception as e:
                                     st.error(f"Error: {e}")
                         with e_c2:
-                            if st.form_submit_button("❌ Close"):
-                                st.session_state.pop(f"editing_lpc_{c['id']}", None)
-                                st.rerun()
+                            st.form_submit_button("❌ Close", on_click=clear_ui_flag, args=("editing_lpc", c['id']))
                     st.divider()
 
 def render_quarterly_report_ai_confirm_form(fund_options, selected_fund_upload, ai_result, form_key="ai_report_confirm"):
@@ -3523,7 +3582,7 @@ def render_quarterly_report_ai_confirm_form(fund_options, selected_fund_upload,
                 st.success("✅ Report saved!")
                 st.session_state.pop("report_ai_result", None)
                 st.session_state.pop("report_ai_selected_fund", None)
-                clear_cache_and_rerun()
+                clear_cache_and_rerun(fetch_all_quarterly_reports)
             except Exception as e:
                 st.error(f"Error: {e}")
 
@@ -3554,6 +3613,35 @@ REPORT_META_KEYS = [
 ]
 
 
+REPORT_FORM_FLOAT_KEYS = (
+    "nav", "tvpi", "dpi", "rvpi", "irr",
+    "total_invested", "total_realized", "total_unrealized", "total_value",
+    "gross_moic", "gross_irr", "net_moic", "net_irr",
+)
+
+def quarterly_report_form_defaults(ai_rep: dict) -> dict:
+    """Typed add-report form defaults from an AI result; unparseable values fall back."""
+    defaults = {}
+    for key in REPORT_FORM_FLOAT_KEYS:
+        try:
+            defaults[key] = float(ai_rep.get(key) or 0.0)
+        except (TypeError, ValueError):
+            defaults[key] = 0.0
+    try:
+        year = int(ai_rep.get("year"))
+    except (TypeError, ValueError):
+        year = 2025
+    defaults["year"] = year if 2020 <= year <= 2030 else 2025
+    try:
+        quarter = int(ai_rep.get("quarter"))
+    except (TypeError, ValueError):
+        quarter = 1
+    defaults["quarter"] = quarter if quarter in (1, 2, 3, 4) else 1
+    defaults["report_date"] = parse_ai_date(ai_rep.get("report_date"))
+    defaults["investments_vs_expenses"] = str(ai_rep.get("investments_vs_expenses") or "")
+    defaults["special_reallocations"] = str(ai_rep.get("special_reallocations") or "")
+    return defaults
+
 def normalize_quarterly_report_payload(payload: dict) -> dict:
     normalized_payload = dict(payload or {})
     meta_data = normalized_payload.get("meta_data") or {}
@@ -3780,7 +3868,7 @@ def show_reports():
                                 response = get_supabase().table("quarterly_reports").insert(payload).execute()
                                 log_action("INSERT", "quarterly_reports", f"Added Q{quarter}/{year} report for {selected_fund}", {})
                                 st.success("✅ Report saved!")
-                                clear_cache_and_rerun()
+                                clear_cache_and_rerun(fetch_all_quarterly_reports)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                 
@@ -3792,19 +3880,7 @@ def show_reports():
                     if uploaded_file and st.button("🤖 Analyze with AI", type="primary"):
                         with st.spinner("Claude is analyzing..."):
                             try:
-                                file_bytes = uploaded_file.read()
-                                file_name = uploaded_file.name
-
-                                if file_name.lower().endswith('.pdf'):
-                                    rep_text = extract_pdf_text(file_bytes)
-                                else:
-                                    if file_name.lower().endswith('.csv'):
-                                        df = pd.read_csv(io.BytesIO(file_bytes))
-                                    else:
-                                        df = pd.read_excel(io.BytesIO(file_bytes))
-                                    rep_text = df.to_string(index=False)
-                                    if len(rep_text) > 12000:
-                                        rep_text = rep_text[:4000] + "\n[...]\n" + rep_text[-8000:]
+                                rep_text = extract_report_text(uploaded_file)
 
                                 st.session_state.report_ai_result = analyze_quarterly_report_with_ai(rep_text)
                                 st.session_state.report_ai_selected_fund = selected_fund_upload
@@ -3849,23 +3925,23 @@ def show_reports():
         return
     
     st.markdown("### 📋 All Quarterly Reports")
-    reports_data = []
+    funds_by_id = {f["id"]: f for f in funds}
+    reports_by_id = {r["id"]: r for r in all_reports}
+    reports_data = {col: [] for col in ["id", "Fund", "Quarter", "Report Date", "NAV", "TVPI", "DPI", "RVPI", "IRR"]}
     for r in all_reports:
-        fund = next((f for f in funds if f["id"] == r["fund_id"]), None)
+        fund = funds_by_id.get(r["fund_id"])
         if fund:
-            reports_data.append({
-                "id": r["id"],
-                "Fund": fund["name"],
-                "Quarter": f"Q{r['quarter']}/{r['year']}",
-                "Report Date": r.get("report_date", ""),
-                "NAV": format_report_currency(r.get("nav"), currency_sym="€" if fund.get("currency") == "EUR" else "$"),
-                "TVPI": format_report_multiple(r.get("tvpi")),
-                "DPI": format_report_multiple(r.get("dpi")),
-                "RVPI": format_report_multiple(r.get("rvpi")),
-                "IRR": format_report_percent(r.get("irr"))
-            })
+            reports_data["id"].append(r["id"])
+            reports_data["Fund"].append(fund["name"])
+            reports_data["Quarter"].append(f"Q{r['quarter']}/{r['year']}")
+            reports_data["Report Date"].append(r.get("report_date", ""))
+            reports_data["NAV"].append(format_report_currency(r.get("nav"), currency_sym="€" if fund.get("currency") == "EUR" else "$"))
+            reports_data["TVPI"].append(format_report_multiple(r.get("tvpi")))
+            reports_data["DPI"].append(format_report_multiple(r.get("dpi")))
+            reports_data["RVPI"].append(format_report_multiple(r.get("rvpi")))
+            reports_data["IRR"].append(format_report_percent(r.get("irr")))
     
-    if reports_data:
+    if reports_data["id"]:
         df = pd.DataFrame(reports_data)
         col_export, col_space = st.columns([1, 5])
         with col_export:
@@ -3880,11 +3956,11 @@ def show_reports():
         st.dataframe(df.drop(columns=["id"]), use_container_width=True, hide_index=True)
         
         st.markdown("#### ⚙️ Manage Reports")
-        for idx, row in df.iterrows():
+        for row in df.to_dict("records"):
             report_id = row["id"]
             with st.expander(f"{row['Fund']} - {row['Quarter']}", expanded=False):
-                rep = next((r for r in all_reports if r["id"] == report_id), {})
-                fund_for_report = next((f for f in funds if f["id"] == rep.get("fund_id")), {})
+                rep = reports_by_id.get(report_id, {})
+                fund_for_report = funds_by_id.get(rep.get("fund_id"), {})
                 report_currency_sym = "€" if fund_for_report.get("currency") == "EUR" else "$"
 
                 base_cols = st.columns(4)
@@ -3897,26 +3973,23 @@ def show_reports():
                 st.divider()
                 col_edit, col_del = st.columns([5, 1])
                 with col_del:
-                    if st.button("🗑️ Delete", key=f"del_rep_{report_id}"):
-                        st.session_state[f"confirm_del_report_{report_id}"] = True
+                    st.button("🗑️ Delete", key=f"del_rep_{report_id}", on_click=set_ui_flag, args=("confirm_del_report", report_id))
                 
-                if st.session_state.get(f"confirm_del_report_{report_id}"):
+                if ui_flags().get(("confirm_del_report", report_id)):
                     st.warning("Delete this report?")
                     c1, c2 = st.columns(2)
                     with c1:
                         if st.button("✅ Yes", key=f"yes_rep_{report_id}"):
                             try:
-                                rep = next(r for r in all_reports if r["id"] == report_id)
+                                rep = reports_by_id[report_id]
                                 log_action("DELETE", "quarterly_reports", f"Deleted {row['Quarter']} report for {row['Fund']}", rep)
                                 sb.table("quarterly_reports").delete().eq("id", report_id).execute()
-                                st.session_state.pop(f"confirm_del_report_{report_id}", None)
-                                clear_cache_and_rerun()
+                                ui_flags().pop(("confirm_del_report", report_id), None)
+                                clear_cache_and_rerun(fetch_all_quarterly_reports)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                     with c2:
-                        if st.button("❌ Cancel", key=f"no_rep_{report_id}"):
-                            st.session_state.pop(f"confirm_del_report_{report_id}", None)
-                            st.rerun()
+                        st.button("❌ Cancel", key=f"no_rep_{report_id}", on_click=clear_ui_flag, args=("confirm_del_report", report_id))
     
     st.divider()
     st.markdown("### 📈 Performance Trends")
@@ -3935,7 +4008,7 @@ def show_reports():
         tabs = st.tabs(fund_names)
         for i, f in enumerate([fund for fund in funds if fund["id"] in latest_reports]):
             with tabs[i]:
-                fund_reports = [r for r in all_reports if r["fund_id"] == f["id"]]
+                fund_reports = get_quarterly_reports(f["id"])
                 fund_reports = sorted(fund_reports, key=lambda x: (x["year"], x["quarter"]))
                 
                 if len(fund_reports) > 1:
@@ -3983,7 +4056,7 @@ def show_pipeline():
             if st.button("🤖 Analyze with AI", type="primary"):
                 with st.spinner("Claude is analyzing the presentation... (30-60 seconds)"):
                     try:
-                        pdf_bytes = uploaded_pdf.read()
+                        pdf_bytes = uploaded_pdf.getvalue()
                         result = analyze_pdf_with_ai(pdf_bytes)
                         st.session_state.pdf_result = result
                         st.success("✅ Analysis complete!")
@@ -4009,11 +4082,10 @@ def show_pipeline():
                 with col2:
                     fund_size = r.get("fund_size_target") or 0
                     target_commitment = st.number_input("Our Target Commitment", min_value=0.0, value=0.0, step=500000.0)
-                    currency = st.selectbox("Currency", ["USD", "EUR"], index=0 if r.get("currency") == "USD" else 1)
+                    currency = st.selectbox("Currency", CURRENCY_OPTS, index=0 if r.get("currency") == "USD" else 1)
                     target_close = st.date_input("Target Close Date")
                     
-                    priority_opts = ["High", "Medium", "Low"]
-                    priority_ui = st.selectbox("Priority", priority_opts, index=1)
+                    priority_ui = st.selectbox("Priority", PRIORITY_OPTS, index=1)
                     
                 st.divider()
                 st.markdown("**📊 Fund Metrics (For Documentation)**")
@@ -4035,9 +4107,10 @@ def show_pipeline():
                     st.metric("Mgmt Fee", f"{mgmt}%" if mgmt else "—")
                     st.metric("Carry / Hurdle", f"{carry}% / {hurdle}%" if carry and hurdle else "—")
                 
-                aum_str = f" | Manager AUM: ${r.get('aum_manager')}B" if r.get("aum_manager") else ""
-                irr_str = f" | IRR: {r.get('target_irr_gross')}%" if r.get("target_irr_gross") else ""
-                moic_str = f" | MOIC: {r.get('target_return_moic_low')}x-{r.get('target_return_moic_high')}x" if r.get("target_return_moic_low") else ""
+                aum = r.get("aum_manager")
+                aum_str = f" | Manager AUM: ${aum}B" if aum else ""
+                irr_str = f" | IRR: {irr}%" if irr else ""
+                moic_str = f" | MOIC: {moic_low}x-{moic_high}x" if moic_low and moic_high else ""
                 notes_default = f"Fund Size: ${fund_size:,.0f}M{moic_str}{irr_str}{aum_str}" if fund_size else ""
                 notes = st.text_area("Notes", value=notes_default)
                 
@@ -4058,7 +4131,7 @@ def show_pipeline():
                         st.success(f"✅ Fund '{fund_name}' created!")
                         st.session_state.pdf_result = None
                         st.session_state.show_pdf_upload = False
-                        clear_cache_and_rerun()
+                        clear_cache_and_rerun(fetch_all_pipeline_funds, fetch_all_gantt_tasks)
                     except Exception as e:
                         st.error(f"Error: {e}")
 
@@ -4070,14 +4143,13 @@ def show_pipeline():
             with col1:
                 name = st.text_input("Fund Name")
                 manager = st.text_input("Manager")
-                strategy = st.selectbox("Strategy", ["Growth", "VC", "Tech", "Niche", "Special Situations", "Mid-Market Buyout"])
+                strategy = st.selectbox("Strategy", STRATEGY_OPTS)
             with col2:
                 target_commitment_input = st.number_input("Target Commitment", min_value=0.0, value=0.0, step=500000.0)
-                currency = st.selectbox("Currency", ["USD", "EUR"])
+                currency = st.selectbox("Currency", CURRENCY_OPTS)
                 target_close = st.date_input("Closing Date")
                 
-                priority_opts = ["High", "Medium", "Low"]
-                priority_ui = st.selectbox("Priority", priority_opts, index=1)
+                priority_ui = st.selectbox("Priority", PRIORITY_OPTS, index=1)
                 
             notes = st.text_area("Notes")
             if st.form_submit_button("Create Fund + Gantt", type="primary"):
@@ -4095,7 +4167,7 @@ def show_pipeline():
                         pass
                     st.success(f"✅ Fund '{name}' created!")
                     st.session_state.show_add_pipeline = False
-                    clear_cache_and_rerun()
+                    clear_cache_and_rerun(fetch_all_pipeline_funds, fetch_all_gantt_tasks)
                 except Exception as e:
                     st.error(f"Error: {e}")
 
@@ -4111,13 +4183,11 @@ def show_pipeline():
         with st.expander(f"{priority_emoji} {fund['name']} | {fund.get('strategy','')} | Close: {fund.get('target_close_date','')}", expanded=False):
             col_a, col_b, col_c = st.columns([1, 1, 4])
             with col_a:
-                if st.button("✏️ Edit", key=f"edit_btn_{fid}"):
-                    st.session_state[f"editing_{fid}"] = True
+                st.button("✏️ Edit", key=f"edit_btn_{fid}", on_click=set_ui_flag, args=("editing", fid))
             with col_b:
-                if st.button("🗑️ Delete", key=f"del_btn_{fid}"):
-                    st.session_state[f"confirm_delete_{fid}"] = True
+                st.button("🗑️ Delete", key=f"del_btn_{fid}", on_click=set_ui_flag, args=("confirm_delete", fid))
 
-            if st.session_state.get(f"confirm_delete_{fid}"):
+            if ui_flags().get(("confirm_delete", fid)):
                 st.warning(f"⚠️ Delete '{fund['name']}'? This action will also delete all associated Gantt tasks.")
                 col_yes, col_no = st.columns(2)
                 with col_yes:
@@ -4125,29 +4195,24 @@ def show_pipeline():
                         try:
                             sb = get_supabase()
                             log_action("DELETE", "pipeline_funds", f"Deleted pipeline fund: {fund['name']}", fund)
-                            sb.table("gantt_tasks").delete().eq("pipeline_fund_id", fid).execute()
-                            sb.table("pipeline_funds").delete().eq("id", fid).execute()
+                            sb.rpc("delete_pipeline_cascade", {"p_fund_id": fid}).execute()
                             st.success("Deleted!")
-                            st.session_state.pop(f"confirm_delete_{fid}", None)
-                            clear_cache_and_rerun()
+                            ui_flags().pop(("confirm_delete", fid), None)
+                            clear_cache_and_rerun(fetch_all_pipeline_funds, fetch_all_gantt_tasks)
                         except Exception as e:
                             st.error(f"Error: {e}")
                 with col_no:
-                    if st.button("❌ Cancel", key=f"no_btn_{fid}"):
-                        st.session_state.pop(f"confirm_delete_{fid}", None)
-                        st.rerun()
+                    st.button("❌ Cancel", key=f"no_btn_{fid}", on_click=clear_ui_flag, args=("confirm_delete", fid))
 
-            if st.session_state.get(f"editing_{fid}"):
+            if ui_flags().get(("editing", fid)):
                 with st.form(f"edit_form_{fid}"):
                     st.markdown("**✏️ Edit Fund Details**")
                     col1, col2 = st.columns(2)
                     with col1:
                         new_name = st.text_input("Fund Name", value=fund.get("name",""))
                         new_manager = st.text_input("Manager", value=fund.get("manager",""))
-                        strategy_opts = ["Growth", "VC", "Tech", "Niche", "Special Situations", "Mid-Market Buyout"]
-                        cur_strat = fund.get("strategy","Growth")
-                        new_strategy = st.selectbox("Strategy", strategy_opts,
-                            index=strategy_opts.index(cur_strat) if cur_strat in strategy_opts else 0)
+                        new_strategy = st.selectbox("Strategy", STRATEGY_OPTS,
+                            index=STRATEGY_IDX.get(fund.get("strategy","Growth"), 0))
                         new_geo = st.text_input("Geographic Focus", value=fund.get("geographic_focus","") or "")
                     with col2:
                         cur_commit = float(fund.get("target_commitment") or 0)
@@ -4156,18 +4221,12 @@ def show_pipeline():
                         new_commitment_input = st.number_input("Target Commitment", value=cur_commit, step=500000.0)
                         
                         cur_currency = fund.get("currency","USD")
-                        new_currency = st.selectbox("Currency", ["USD","EUR"], index=0 if cur_currency=="USD" else 1)
+                        new_currency = st.selectbox("Currency", CURRENCY_OPTS, index=0 if cur_currency=="USD" else 1)
                         
-                        priority_opts = ["High", "Medium", "Low"]
-                        cur_priority = fund.get("priority","medium").capitalize()
-                        new_priority_ui = st.selectbox("Priority", priority_opts,
-                            index=priority_opts.index(cur_priority) if cur_priority in priority_opts else 1)
+                        new_priority_ui = st.selectbox("Priority", PRIORITY_OPTS,
+                            index=PRIORITY_IDX.get(fund.get("priority","medium").capitalize(), 1))
                         
-                        cur_date = fund.get("target_close_date")
-                        try:
-                            default_date = datetime.fromisoformat(str(cur_date)).date() if cur_date else date.today()
-                        except:
-                            default_date = date.today()
+                        default_date = parse_iso_date(fund.get("target_close_date")) or date.today()
                         new_close = st.date_input("Closing Date", value=default_date)
                     new_notes = st.text_area("Notes", value=fund.get("notes","") or "")
                     col_save, col_cancel = st.columns(2)
@@ -4182,14 +4241,12 @@ def show_pipeline():
                                     "target_close_date": str(new_close), "notes": new_notes
                                 }).eq("id", fid).execute()
                                 st.success("✅ Updated!")
-                                st.session_state.pop(f"editing_{fid}", None)
-                                clear_cache_and_rerun()
+                                ui_flags().pop(("editing", fid), None)
+                                clear_cache_and_rerun(fetch_all_pipeline_funds)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                     with col_cancel:
-                        if st.form_submit_button("❌ Cancel"):
-                            st.session_state.pop(f"editing_{fid}", None)
-                            st.rerun()
+                        st.form_submit_button("❌ Cancel", on_click=clear_ui_flag, args=("editing", fid))
             else:
                 col1, col2, col3 = st.columns(3)
                 currency_sym = "€" if fund.get("currency") == "EUR" else "$"
@@ -4202,45 +4259,52 @@ def show_pipeline():
                     st.metric("Priority", fund.get("priority", "").upper())
                 
                 notes_text = fund.get("notes") or ""
-                notes_text = notes_text.replace("NoneB", "").replace("None", "").replace("x-x", "") 
                 if notes_text.strip():
                     st.caption(f"📝 {notes_text}")
                 
-                tasks = get_gantt_tasks(fund["id"])
-                if tasks is not None:
-                    show_gantt(tasks, fund)
-def show_gantt(tasks, fund):
-    import plotly.graph_objects as go
-    from datetime import timedelta
-
-    CAT_CONFIG = {
-        "Analysis": {"icon": "🟢", "color": "#16a34a", "bg": "#052e16"},
-        "Legal":    {"icon": "🔵", "color": "#2563eb", "bg": "#0c1a4b"},
-        "Tax":      {"icon": "🔴", "color": "#dc2626", "bg": "#3b0a0a"},
-        "Admin":    {"icon": "🟡", "color": "#ca8a04", "bg": "#2d2000"},
-        "IC":       {"icon": "🟣", "color": "#9333ea", "bg": "#2d0a4b"},
-        "DD":       {"icon": "🟠", "color": "#ea580c", "bg": "#3b1a00"},
-    }
-    STATUS_CONFIG = {
-        "todo":        {"icon": "⬜", "label": "To Do",       "color": "#64748b"},
-        "in_progress": {"icon": "🔄", "label": "In Progress", "color": "#3b82f6"},
-        "done":        {"icon": "✅", "label": "Done",        "color": "#22c55e"},
-        "blocked":     {"icon": "🚫", "label": "Blocked",     "color": "#ef4444"},
-    }
-    
-    STATUS_LIST = ["todo", "in_progress", "done", "blocked"]
-    UI_STATUS_LIST = [STATUS_CONFIG[s]["label"] for s in STATUS_LIST]
-
-    sb = get_supabase()
-    fid = fund["id"]
-
-    total = len(tasks)
-    done_n = sum(1 for t in tasks if t.get("status") == "done")
-    in_prog = sum(1 for t in tasks if t.get("status") == "in_progress")
-    blocked_n = sum(1 for t in tasks if t.get("status") == "blocked")
-    pct = int(done_n / total * 100) if total else 0
+                show_gantt(fund)
+
+GANTT_CAT_CONFIG = {
+    "Analysis": {"icon": "🟢", "color": "#16a34a", "bg": "#052e16"},
+    "Legal":    {"icon": "🔵", "color": "#2563eb", "bg": "#0c1a4b"},
+    "Tax":      {"icon": "🔴", "color": "#dc2626", "bg": "#3b0a0a"},
+    "Admin":    {"icon": "🟡", "color": "#ca8a04", "bg": "#2d2000"},
+    "IC":       {"icon": "🟣", "color": "#9333ea", "bg": "#2d0a4b"},
+    "DD":       {"icon": "🟠", "color": "#ea580c", "bg": "#3b1a00"},
+}
+GANTT_STATUS_CONFIG = {
+    "todo":        {"icon": "⬜", "label": "To Do",       "color": "#64748b"},
+    "in_progress": {"icon": "🔄", "label": "In Progress", "color": "#3b82f6"},
+    "done":        {"icon": "✅", "label": "Done",        "color": "#22c55e"},
+    "blocked":     {"icon": "🚫", "label": "Blocked",     "color": "#ef4444"},
+}
+
+GANTT_STATUS_LIST = ["todo", "in_progress", "done", "blocked"]
+GANTT_UI_STATUS_LIST = [GANTT_STATUS_CONFIG[status]["label"] for status in GANTT_STATUS_LIST]
+GANTT_STATUS_BY_LABEL = {GANTT_STATUS_CONFIG[status]["label"]: status for status in GANTT_STATUS_LIST}
+
+GANTT_BAR_COLORS = {"done": "#22c55e", "blocked": "#ef4444", "in_progress": "#3b82f6", "todo": "#475569"}
+# Shared by every fund's chart; show_gantt only adds the height and the data.
+GANTT_LAYOUT = dict(
+    barmode="overlay",
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="#0f172a",
+    font=dict(color="#e2e8f0", size=14, family="Inter"),
+    margin=dict(l=10, r=20, t=40, b=40),
+    xaxis=dict(type="date", gridcolor="#1e293b", tickformat="%d/%m/%y", tickfont=dict(size=13)),
+    yaxis=dict(gridcolor="#1e293b", tickfont=dict(size=14), automargin=True),
+)
+GANTT_CATEGORY_HEADER_TMPL = (
+    '<div style="background:{bg};border-left:3px solid {color};border-radius:8px;padding:10px 14px;'
+    'margin:8px 0 4px 0;display:flex;justify-content:space-between;align-items:center;">'
+    '<span style="color:{color};font-weight:600;">{icon} {cat}</span>'
+    '<span style="color:#94a3b8;font-size:12px;">{done}/{total} · {pct}%</span>'
+    '</div>'
+)
 
-    st.markdown(f"""
+@lru_cache(maxsize=64)
+def gantt_progress_html(pct: int, done_n: int, in_prog: int, blocked_n: int, todo_n: int) -> str:
+    return f"""
     <div style="background:linear-gradient(135deg,#1a1a2e,#16213e);border-radius:12px;padding:16px 20px;margin:12px 0;">
         <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:10px;">
             <span style="color:#94a3b8;font-size:13px;">Overall Progress</span>
@@ -4253,10 +4317,61 @@ def show_gantt(tasks, fund):
             <span style="color:#4ade80;font-size:12px;">✅ Done: {done_n}</span>
             <span style="color:#3b82f6;font-size:12px;">🔄 In Progress: {in_prog}</span>
             <span style="color:#ef4444;font-size:12px;">🚫 Blocked: {blocked_n}</span>
-            <span style="color:#64748b;font-size:12px;">⬜ To Do: {total - done_n - in_prog - blocked_n}</span>
+            <span style="color:#64748b;font-size:12px;">⬜ To Do: {todo_n}</span>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+def render_add_gantt_task_form(sb, fid, today_dt):
+    with st.expander("➕ Add New Task to Gantt"):
+        with st.form(f"add_new_task_{fid}"):
+            c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
+            with c1:
+                new_t_name = st.text_input("Task Name")
+            with c2:
+                new_t_cat = st.selectbox("Category", ["Analysis", "IC", "DD", "Legal", "Tax", "Admin"])
+            with c3:
+                new_t_start = st.date_input("Start Date", value=today_dt)
+            with c4:
+                new_t_due = st.date_input("Due Date", value=today_dt)
+            
+            if st.form_submit_button("Save Task", type="primary"):
+                if new_t_name:
+                    try:
+                        sb.table("gantt_tasks").insert({
+                            "pipeline_fund_id": fid,
+                            "task_name": new_t_name,
+                            "category": new_t_cat,
+                            "start_date": str(new_t_start),
+                            "due_date": str(new_t_due),
+                            "status": "todo"
+                        }).execute()
+                        st.success("Task successfully added!")
+                        clear_cache_and_rerun(fetch_all_gantt_tasks, scope="fragment")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+                else:
+                    st.error("Please enter a task name")
+
+@st.fragment
+def show_gantt(fund):
+    # Tasks are loaded here, not passed in, so a fragment rerun after a save sees fresh rows.
+    sb = get_supabase()
+    fid = fund["id"]
+    tasks = get_gantt_tasks(fid)
+    today_dt = date.today()
+
+    if not tasks:
+        st.info("No Gantt tasks for this fund yet.")
+        render_add_gantt_task_form(sb, fid, today_dt)
+        return
+
+    status_counts = Counter(t.get("status") for t in tasks)
+    total = len(tasks)
+    done_n, in_prog, blocked_n = status_counts["done"], status_counts["in_progress"], status_counts["blocked"]
+    pct = int(done_n / total * 100) if total else 0
+
+    st.markdown(gantt_progress_html(pct, done_n, in_prog, blocked_n, total - done_n - in_prog - blocked_n), unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
     col_hdr1, col_hdr2 = st.columns([3, 1])
@@ -4267,28 +4382,22 @@ def show_gantt(tasks, fund):
 
     visible_tasks = tasks if show_done else [t for t in tasks if t.get("status") != "done"]
 
+    task_dates = {t["id"]: (parse_iso_date(t.get("start_date")), parse_iso_date(t.get("due_date"))) for t in tasks}
+
     gantt_tasks_data = []
-    today_dt = date.today()
+    today_iso = today_dt.isoformat()
     for t in visible_tasks:
-        if t.get("start_date") and t.get("due_date"):
+        start_d, due_d = task_dates[t["id"]]
+        if start_d and due_d:
             cat = t.get("category", "Admin")
-            cfg = CAT_CONFIG.get(cat, CAT_CONFIG["Admin"])
+            cfg = GANTT_CAT_CONFIG.get(cat, GANTT_CAT_CONFIG["Admin"])
             status = t.get("status", "todo")
             
+            bar_color = GANTT_BAR_COLORS.get(status, "#475569")
             if status == "done":
-                bar_color = "#22c55e" 
                 icon = "✅"
                 task_display = f"<s>{t['task_name']}</s>"
-            elif status == "blocked":
-                bar_color = "#ef4444" 
-                icon = cfg['icon']
-                task_display = t['task_name']
-            elif status == "in_progress":
-                bar_color = "#3b82f6" 
-                icon = cfg['icon']
-                task_display = t['task_name']
             else:
-                bar_color = "#475569" 
                 icon = cfg['icon']
                 task_display = t['task_name']
 
@@ -4297,57 +4406,56 @@ def show_gantt(tasks, fund):
                 "RawName": t["task_name"],
                 "Start": t["start_date"],
                 "Finish": t["due_date"],
+                "StartDate": start_d,
+                "DueDate": due_d,
                 "Color": bar_color,
                 "Category": cat,
-                "Status": STATUS_CONFIG.get(status, {}).get("label", status),
+                "Status": GANTT_STATUS_CONFIG.get(status, {}).get("label", status),
             })
 
     if gantt_tasks_data:
-        fig = go.Figure()
-        sorted_tasks = sorted(gantt_tasks_data, key=lambda x: x["Start"], reverse=True)
-
-        for i, t in enumerate(sorted_tasks):
-            start_dt_val = datetime.fromisoformat(t["Start"])
-            finish_dt_val = datetime.fromisoformat(t["Finish"]) + timedelta(days=1)
-            duration_ms = (finish_dt_val - start_dt_val).total_seconds() * 1000
-
-            fig.add_trace(go.Bar(
-                x=[duration_ms],
-                y=[t["Task"]],
-                base=[t["Start"]],
-                orientation="h",
-                marker=dict(color=t["Color"], opacity=0.95, line=dict(width=1, color="#0f172a")),
-                text=[f" {t['Status']}"],
-                textposition="inside",
-                insidetextanchor="middle",
-                textfont=dict(color="white", size=13, family="Inter"),
-                hovertemplate=f"<b>{t['RawName']}</b><br>{t['Start']} → {t['Finish']}<br>Status: {t['Status']}<extra></extra>",
-                showlegend=False,
-            ))
+        sorted_tasks = sorted(gantt_tasks_data, key=itemgetter("Start"), reverse=True)
+        fig = go.Figure(layout={**GANTT_LAYOUT, "height": max(350, len(sorted_tasks) * 45 + 100)})
+
+        starts = np.array([t["StartDate"] for t in sorted_tasks], dtype="datetime64[D]")
+        dues = np.array([t["DueDate"] for t in sorted_tasks], dtype="datetime64[D]")
+        durations_ms = ((dues - starts).astype(np.int64) + 1) * 86_400_000
+
+        task_labels, bases, colors, texts, hovertexts = [], [], [], [], []
+        for t in sorted_tasks:
+            task_labels.append(t["Task"])
+            bases.append(t["Start"])
+            colors.append(t["Color"])
+            texts.append(f" {t['Status']}")
+            hovertexts.append(f"<b>{t['RawName']}</b><br>{t['Start']} → {t['Finish']}<br>Status: {t['Status']}")
+
+        fig.add_trace(go.Bar(
+            x=durations_ms,
+            y=task_labels,
+            base=bases,
+            orientation="h",
+            marker=dict(color=colors, opacity=0.95, line=dict(width=1, color="#0f172a")),
+            text=texts,
+            textposition="inside",
+            insidetextanchor="middle",
+            textfont=dict(color="white", size=13, family="Inter"),
+            hovertext=hovertexts,
+            hovertemplate="%{hovertext}<extra></extra>",
+            showlegend=False,
+        ))
             
         fig.add_shape(
             type="line",
-            x0=str(today_dt), x1=str(today_dt),
+            x0=today_iso, x1=today_iso,
             y0=0, y1=1, yref="paper",
             line=dict(color="#f59e0b", width=2, dash="dash"),
         )
         fig.add_annotation(
-            x=str(today_dt), y=1, yref="paper",
+            x=today_iso, y=1, yref="paper",
             text="Today", showarrow=False,
             font=dict(color="#f59e0b", size=13, family="Inter"),
             yanchor="bottom"
         )
-        
-        fig.update_layout(
-            height=max(350, len(sorted_tasks) * 45 + 100),
-            barmode="overlay",
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="#0f172a",
-            font=dict(color="#e2e8f0", size=14, family="Inter"),
-            margin=dict(l=10, r=20, t=40, b=40),
-            xaxis=dict(type="date", gridcolor="#1e293b", tickformat="%d/%m/%y", tickfont=dict(size=13)),
-            yaxis=dict(gridcolor="#1e293b", tickfont=dict(size=14), automargin=True),
-        )
         st.plotly_chart(fig, use_container_width=True, key=f"gantt_chart_{fid}")
     else:
         st.info("No tasks to display in this chart currently.")
@@ -4355,107 +4463,96 @@ def show_gantt(tasks, fund):
     st.markdown("##### 📋 Edit Tasks")
     
     cats_order = ["Analysis", "IC", "DD", "Legal", "Tax", "Admin"]
-    for cat in cats_order:
-        cat_tasks = [t for t in visible_tasks if t.get("category","") == cat]
-        if not cat_tasks:
-            continue
+    tasks_by_cat = defaultdict(list)
+    done_by_cat = Counter()
+    for t in tasks:
+        cat = t.get("category","")
+        tasks_by_cat[cat].append(t)
+        if t.get("status") == "done":
+            done_by_cat[cat] += 1
+
+    pending_changes = []
+    pending_deletes = []
+    with st.form(f"tasks_form_{fid}", border=False):
+        for cat in cats_order:
+            all_cat_tasks = tasks_by_cat[cat]
+            cat_tasks = all_cat_tasks if show_done else [t for t in all_cat_tasks if t.get("status") != "done"]
+            if not cat_tasks:
+                continue
 
-        cfg = CAT_CONFIG.get(cat, CAT_CONFIG["Admin"])
-        all_cat_tasks = [t for t in tasks if t.get("category","") == cat]
-        done_c = sum(1 for t in all_cat_tasks if t.get("status") == "done")
-        cat_pct = int(done_c / len(all_cat_tasks) * 100)
-
-        st.markdown(f"""
-        <div style="background:{cfg['bg']};border-left:3px solid {cfg['color']};
-                    border-radius:8px;padding:10px 14px;margin:8px 0 4px 0;
-                    display:flex;justify-content:space-between;align-items:center;">
-            <span style="color:{cfg['color']};font-weight:600;">{cfg['icon']} {cat}</span>
-            <span style="color:#94a3b8;font-size:12px;">{done_c}/{len(all_cat_tasks)} · {cat_pct}%</span>
-        </div>
-        """, unsafe_allow_html=True)
+            cfg = GANTT_CAT_CONFIG.get(cat, GANTT_CAT_CONFIG["Admin"])
+            done_c = done_by_cat[cat]
+            cat_pct = int(done_c / len(all_cat_tasks) * 100)
+
+            st.markdown(GANTT_CATEGORY_HEADER_TMPL.format(
+                bg=cfg['bg'], color=cfg['color'], icon=cfg['icon'], cat=cat,
+                done=done_c, total=len(all_cat_tasks), pct=cat_pct
+            ), unsafe_allow_html=True)
+
+            cat_df = pd.DataFrame({
+                "id": [t["id"] for t in cat_tasks],
+                "Icon": [GANTT_STATUS_CONFIG.get(t.get("status", "todo"), GANTT_STATUS_CONFIG["todo"])["icon"] for t in cat_tasks],
+                "Task Name": [t["task_name"] for t in cat_tasks],
+                "Start": [task_dates[t["id"]][0] or today_dt for t in cat_tasks],
+                "End": [task_dates[t["id"]][1] or today_dt for t in cat_tasks],
+                "Status": [GANTT_STATUS_CONFIG.get(t.get("status", "todo"), GANTT_STATUS_CONFIG["todo"])["label"] for t in cat_tasks],
+                "Delete": [False] * len(cat_tasks),
+            })
+            edited_cat_df = st.data_editor(
+                cat_df,
+                key=f"tasks_editor_{fid}_{cat}",
+                hide_index=True,
+                use_container_width=True,
+                disabled=["Icon"],
+                column_config={
+                    "id": None,
+                    "Icon": st.column_config.TextColumn("", width="small"),
+                    "Task Name": st.column_config.TextColumn(required=True, width="large"),
+                    "Start": st.column_config.DateColumn(format="DD/MM/YY", required=True),
+                    "End": st.column_config.DateColumn(format="DD/MM/YY", required=True),
+                    "Status": st.column_config.SelectboxColumn(options=GANTT_UI_STATUS_LIST, required=True),
+                    "Delete": st.column_config.CheckboxColumn("🗑️", help="Delete task on save", width="small"),
+                },
+            )
 
-        for t in cat_tasks:
-            current_status = t.get("status", "todo")
-            scfg = STATUS_CONFIG.get(current_status, STATUS_CONFIG["todo"])
-            current_ui_label = scfg["label"]
-            
-            try:
-                current_start = datetime.fromisoformat(t["start_date"]).date() if t.get("start_date") else date.today()
-                current_due = datetime.fromisoformat(t["due_date"]).date() if t.get("due_date") else date.today()
-            except:
-                current_start, current_due = date.today(), date.today()
-
-            col_icon, col_name, col_start, col_due, col_status, col_del = st.columns([0.5, 3, 2, 2, 2, 0.5])
-            with col_icon:
-                st.markdown(f"<div style='margin-top:5px; font-size:18px;'>{scfg['icon']}</div>", unsafe_allow_html=True)
-            with col_name:
-                new_name = st.text_input("Task Name", value=t["task_name"], key=f"name_{fid}_{t['id']}", label_visibility="collapsed")
-            with col_start:
-                new_start = st.date_input("Start", value=current_start, key=f"start_{fid}_{t['id']}", label_visibility="collapsed")
-            with col_due:
-                new_due = st.date_input("End", value=current_due, key=f"due_{fid}_{t['id']}", label_visibility="collapsed")
-            with col_status:
-                new_ui_label = st.selectbox(
-                    "Status",
-                    UI_STATUS_LIST,
-                    index=UI_STATUS_LIST.index(current_ui_label) if current_ui_label in UI_STATUS_LIST else 0,
-                    key=f"status_{fid}_{t['id']}",
-                    label_visibility="collapsed"
-                )
-            
-            new_status_mapped = [k for k, v in STATUS_CONFIG.items() if v["label"] == new_ui_label][0]
+            for t, row in zip(cat_tasks, edited_cat_df.to_dict("records")):
+                if row["Delete"]:
+                    pending_deletes.append(t)
+                    continue
 
-            with col_del:
-                if st.button("🗑️", key=f"del_{fid}_{t['id']}", help="Delete Task"):
-                    try:
-                        log_action("DELETE", "gantt_tasks", f"Deleted Gantt task: {t['task_name']}", t)
-                        sb.table("gantt_tasks").delete().eq("id", t["id"]).execute()
-                        clear_cache_and_rerun()
-                    except Exception as e:
-                        st.error(f"Delete Error: {e}")
-                
-            if new_status_mapped != current_status or str(new_start) != t.get("start_date") or str(new_due) != t.get("due_date") or new_name != t["task_name"]:
-                try:
-                    sb.table("gantt_tasks").update({
+                start_d, due_d = task_dates[t["id"]]
+                new_name = row["Task Name"]
+                new_start = pd.Timestamp(row["Start"]).date()
+                new_due = pd.Timestamp(row["End"]).date()
+                new_status_mapped = GANTT_STATUS_BY_LABEL[row["Status"]]
+
+                if new_status_mapped != t.get("status", "todo") or new_start != start_d or new_due != due_d or new_name != t["task_name"]:
+                    pending_changes.append({
+                        "id": t["id"],
+                        "pipeline_fund_id": fid,
                         "task_name": new_name,
                         "status": new_status_mapped,
                         "start_date": str(new_start),
                         "due_date": str(new_due)
-                    }).eq("id", t["id"]).execute()
-                    clear_cache_and_rerun()
-                except Exception as e:
-                    st.error(f"Update Task Error: {e}")
+                    })
+
+        submitted = st.form_submit_button("💾 Save Task Changes", type="primary")
+
+    if submitted and (pending_changes or pending_deletes):
+        try:
+            if pending_deletes:
+                for t in pending_deletes:
+                    log_action("DELETE", "gantt_tasks", f"Deleted Gantt task: {t['task_name']}", t)
+                sb.table("gantt_tasks").delete().in_("id", [t["id"] for t in pending_deletes]).execute()
+            if pending_changes:
+                sb.table("gantt_tasks").upsert(pending_changes, on_conflict="id").execute()
+            clear_cache_and_rerun(fetch_all_gantt_tasks, scope="fragment")
+        except Exception as e:
+            st.error(f"Update Task Error: {e}")
 
     st.markdown("<br>", unsafe_allow_html=True)
-    with st.expander("➕ Add New Task to Gantt"):
-        with st.form(f"add_new_task_{fid}"):
-            c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
-            with c1:
-                new_t_name = st.text_input("Task Name")
-            with c2:
-                new_t_cat = st.selectbox("Category", ["Analysis", "IC", "DD", "Legal", "Tax", "Admin"])
-            with c3:
-                new_t_start = st.date_input("Start Date", value=date.today())
-            with c4:
-                new_t_due = st.date_input("Due Date", value=date.today())
-            
-            if st.form_submit_button("Save Task", type="primary"):
-                if new_t_name:
-                    try:
-                        sb.table("gantt_tasks").insert({
-                            "pipeline_fund_id": fid,
-                            "task_name": new_t_name,
-                            "category": new_t_cat,
-                            "start_date": str(new_t_start),
-                            "due_date": str(new_t_due),
-                            "status": "todo"
-                        }).execute()
-                        st.success("Task successfully added!")
-                        clear_cache_and_rerun()
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-                else:
-                    st.error("Please enter a task name")
+    render_add_gantt_task_form(sb, fid, today_dt)
+
 def show_reports():
     st.title("📈 Reports & Analytics")
     
@@ -4554,7 +4651,7 @@ def show_reports():
                                 response = get_supabase().table("quarterly_reports").insert(payload).execute()
                                 log_action("INSERT", "quarterly_reports", f"Added Q{quarter}/{year} report for {selected_fund}", {})
                                 st.success("✅ Report saved!")
-                                clear_cache_and_rerun()
+                                clear_cache_and_rerun(fetch_all_quarterly_reports)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                 
@@ -4566,19 +4663,7 @@ def show_reports():
                     if uploaded_file and st.button("🤖 Analyze with AI", type="primary"):
                         with st.spinner("Claude is analyzing..."):
                             try:
-                                file_bytes = uploaded_file.read()
-                                file_name = uploaded_file.name
-
-                                if file_name.lower().endswith('.pdf'):
-                                    rep_text = extract_pdf_text(file_bytes)
-                                else:
-                                    if file_name.lower().endswith('.csv'):
-                                        df = pd.read_csv(io.BytesIO(file_bytes))
-                                    else:
-                                        df = pd.read_excel(io.BytesIO(file_bytes))
-                                    rep_text = df.to_string(index=False)
-                                    if len(rep_text) > 12000:
-                                        rep_text = rep_text[:4000] + "\n[...]\n" + rep_text[-8000:]
+                                rep_text = extract_report_text(uploaded_file)
 
                                 st.session_state.report_ai_result = analyze_quarterly_report_with_ai(rep_text)
                                 st.session_state.report_ai_selected_fund = selected_fund_upload
@@ -4626,46 +4711,45 @@ def show_reports():
     st.markdown("### 📋 All Quarterly Reports")
     
     # Build reports table
-    reports_data = []
+    funds_by_id = {f["id"]: f for f in funds}
+    reports_by_id = {r["id"]: r for r in all_reports}
+    reports_data = {col: [] for col in ["id", "Fund", "Quarter", "Report Date", "NAV", "TVPI", "DPI", "RVPI", "IRR"]}
     for r in all_reports:
-        fund = next((f for f in funds if f["id"] == r["fund_id"]), None)
+        fund = funds_by_id.get(r["fund_id"])
         if fund:
-            reports_data.append({
-                "id": r["id"],
-                "Fund": fund["name"],
-                "Quarter": f"Q{r['quarter']}/{r['year']}",
-                "Report Date": r.get("report_date", ""),
-                "NAV": format_report_currency(r.get("nav"), currency_sym="€" if fund.get("currency") == "EUR" else "$"),
-                "TVPI": format_report_multiple(r.get("tvpi")),
-                "DPI": format_report_multiple(r.get("dpi")),
-                "RVPI": format_report_multiple(r.get("rvpi")),
-                "IRR": format_report_percent(r.get("irr"))
-            })
+            reports_data["id"].append(r["id"])
+            reports_data["Fund"].append(fund["name"])
+            reports_data["Quarter"].append(f"Q{r['quarter']}/{r['year']}")
+            reports_data["Report Date"].append(r.get("report_date", ""))
+            reports_data["NAV"].append(format_report_currency(r.get("nav"), currency_sym="€" if fund.get("currency") == "EUR" else "$"))
+            reports_data["TVPI"].append(format_report_multiple(r.get("tvpi")))
+            reports_data["DPI"].append(format_report_multiple(r.get("dpi")))
+            reports_data["RVPI"].append(format_report_multiple(r.get("rvpi")))
+            reports_data["IRR"].append(format_report_percent(r.get("irr")))
     
-    if reports_data:
-        df = pd.DataFrame(reports_data)
+    if reports_data["id"]:
+        display_columns = {col: values for col, values in reports_data.items() if col != "id"}
         
-        # Export button
+        # Export button (the workbook is only built when the button is clicked)
         col_export, col_space = st.columns([1, 5])
         with col_export:
-            excel_data = convert_df_to_excel(df.drop(columns=["id"], errors="ignore"))
             st.download_button(
                 label="📥 Export Excel",
-                data=excel_data,
+                data=lambda: convert_df_to_excel(pd.DataFrame(display_columns)),
                 file_name=f"Portfolio_Reports_{date.today()}.xlsx",
                 use_container_width=True
             )
         
         # Display table
-        st.dataframe(df.drop(columns=["id"]), use_container_width=True, hide_index=True)
+        st.dataframe(pa.table(display_columns), use_container_width=True, hide_index=True)
         
         # Edit/Delete for each report
         st.markdown("#### ⚙️ Manage Reports")
-        for idx, row in df.iterrows():
-            report_id = row["id"]
+        for idx, report_id in enumerate(reports_data["id"]):
+            row = {col: values[idx] for col, values in reports_data.items()}
             with st.expander(f"{row['Fund']} - {row['Quarter']}", expanded=False):
-                rep = next((r for r in all_reports if r["id"] == report_id), {})
-                fund_for_report = next((f for f in funds if f["id"] == rep.get("fund_id")), {})
+                rep = reports_by_id.get(report_id, {})
+                fund_for_report = funds_by_id.get(rep.get("fund_id"), {})
                 report_currency_sym = "€" if fund_for_report.get("currency") == "EUR" else "$"
 
                 base_cols = st.columns(4)
@@ -4678,26 +4762,23 @@ def show_reports():
                 st.divider()
                 col_edit, col_del = st.columns([5, 1])
                 with col_del:
-                    if st.button("🗑️ Delete", key=f"del_rep_{report_id}"):
-                        st.session_state[f"confirm_del_report_{report_id}"] = True
+                    st.button("🗑️ Delete", key=f"del_rep_{report_id}", on_click=set_ui_flag, args=("confirm_del_report", report_id))
                 
-                if st.session_state.get(f"confirm_del_report_{report_id}"):
+                if ui_flags().get(("confirm_del_report", report_id)):
                     st.warning("Delete this report?")
                     c1, c2 = st.columns(2)
                     with c1:
                         if st.button("✅ Yes", key=f"yes_rep_{report_id}"):
                             try:
-                                rep = next(r for r in all_reports if r["id"] == report_id)
+                                rep = reports_by_id[report_id]
                                 log_action("DELETE", "quarterly_reports", f"Deleted {row['Quarter']} report for {row['Fund']}", rep)
                                 sb.table("quarterly_reports").delete().eq("id", report_id).execute()
-                                st.session_state.pop(f"confirm_del_report_{report_id}", None)
-                                clear_cache_and_rerun()
+                                ui_flags().pop(("confirm_del_report", report_id), None)
+                                clear_cache_and_rerun(fetch_all_quarterly_reports)
                             except Exception as e:
                                 st.error(f"Error: {e}")
                     with c2:
-                        if st.button("❌ Cancel", key=f"no_rep_{report_id}"):
-                            st.session_state.pop(f"confirm_del_report_{report_id}", None)
-                            st.rerun()
+                        st.button("❌ Cancel", key=f"no_rep_{report_id}", on_click=clear_ui_flag, args=("confirm_del_report", report_id))
     
     st.divider()
     
@@ -4720,7 +4801,7 @@ def show_reports():
         
         for i, f in enumerate([fund for fund in funds if fund["id"] in latest_reports]):
             with tabs[i]:
-                fund_reports = [r for r in all_reports if r["fund_id"] == f["id"]]
+                fund_reports = get_quarterly_reports(f["id"])
                 fund_reports = sorted(fund_reports, key=lambda x: (x["year"], x["quarter"]))
                 
                 if len(fund_reports) > 1:
@@ -0,0 +1,85 @@
+from collections import deque
+
+
+def head_tail_pages_text(pages, text_of=str):
+    """Join page texts as "--- Page N ---" blocks, truncated to the first 4000
+    and last 8000 characters when the whole text is longer than 12000.
+
+    Pages are read from both ends and the middle of a long document is never
+    touched, so `pages` can be a lazy sequence (e.g. a PyMuPDF document with
+    text_of=lambda page: page.get_text()).
+    """
+    page_count = len(pages)
+
+    def page_text(i):
+        text = text_of(pages[i]).strip()
+        return f"--- Page {i+1} ---\n{text}" if text else None
+
+    # Lengths include the "\n" that joins each page to its neighbour.
+    head, head_len, i = [], 0, 0
+    while i < page_count and head_len < 4000:
+        piece = page_text(i)
+        if piece:
+            head.append(piece)
+            head_len += len(piece) + 1
+        i += 1
+    tail, tail_len, j = deque(), 0, page_count - 1
+    while j >= i and tail_len < 8000:
+        piece = page_text(j)
+        if piece:
+            tail.appendleft(piece)
+            tail_len += len(piece) + 1
+        j -= 1
+    # Both ends are full, but the whole text can still fit in 12000 characters
+    # when the unread middle pages are blank, so read them before deciding.
+    if j >= i and head_len + tail_len - 1 <= 12000:
+        while i <= j:
+            piece = page_text(i)
+            if piece:
+                head.append(piece)
+            i += 1
+
+    if j < i:
+        full_text = "\n".join(head + list(tail))
+        if len(full_text) <= 12000:
+            return full_text
+        return full_text[:4000] + "\n\n[...]\n\n" + full_text[-8000:]
+    return ("\n".join(head) + "\n")[:4000] + "\n\n[...]\n\n" + ("\n" + "\n".join(tail))[-8000:]
+
+
+REPORT_SAMPLE_ROWS = 50
+
+
+def frame_report_text(df):
+    """Format a report sheet as text, truncated to the first 4000 and last 8000
+    characters when the full to_string() is longer than 12000.
+
+    to_string() pads every row to the widest value in each column, so a
+    sample's row width is a lower bound for the full frame's. When even that
+    bound is over 12000 characters, only rows from each end are formatted.
+    """
+    if len(df) > REPORT_SAMPLE_ROWS:
+        trimmed = df.dropna(axis=1, how="all")
+        sample = trimmed.head(REPORT_SAMPLE_ROWS).to_string(index=False)
+        row_width = len(sample.rsplit("\n", 1)[-1]) + 1
+        head_rows = 4000 // row_width + 2
+        tail_rows = 8000 // row_width + 2
+        if row_width * len(df) > 12000 and head_rows + tail_rows < len(df):
+            head = _edge_rows_text(trimmed.head, head_rows, 4000, len(df))
+            tail = _edge_rows_text(trimmed.tail, tail_rows, 8000, len(df))
+            return head[:4000] + "\n[...]\n" + tail[-8000:]
+
+    rep_text = df.to_string(index=False)
+    if len(rep_text) > 12000:
+        rep_text = rep_text[:4000] + "\n[...]\n" + rep_text[-8000:]
+    return rep_text
+
+
+def _edge_rows_text(take, rows, min_chars, total_rows):
+    # Rows at either end can be narrower than the sample, so keep adding rows
+    # until the text fills its window.
+    text = take(rows).to_string(index=False)
+    while len(text) < min_chars and rows < total_rows:
+        rows *= 2
+        text = take(rows).to_string(index=False)
+    return text
@@ -0,0 +1,112 @@
+-- ============================================
+-- RPC FUNCTIONS - called from app.py via sb.rpc(...)
+-- ============================================
+
+-- The old check-then-insert save could leave duplicate rows per pair, which would
+-- make the unique index below fail. Keep one row per pair, preferring a paid one.
+DELETE FROM lp_payments a
+USING lp_payments b
+WHERE a.lp_call_id = b.lp_call_id
+  AND a.investor_id = b.investor_id
+  AND (COALESCE(a.is_paid, false)::int, a.ctid) < (COALESCE(b.is_paid, false)::int, b.ctid);
+
+CREATE UNIQUE INDEX IF NOT EXISTS lp_payments_call_investor_key
+    ON lp_payments (lp_call_id, investor_id);
+
+-- Bulk save of LP payment statuses from the investors page.
+-- payload: [{"lp_call_id": ..., "investor_id": ..., "is_paid": true}, ...]
+CREATE OR REPLACE FUNCTION save_lp_payments(payload JSONB)
+RETURNS void
+SECURITY INVOKER
+AS $$
+    INSERT INTO lp_payments (lp_call_id, investor_id, is_paid)
+    SELECT p.lp_call_id, p.investor_id, p.is_paid
+    FROM jsonb_to_recordset(payload) AS p(lp_call_id UUID, investor_id UUID, is_paid BOOLEAN)
+    ON CONFLICT (lp_call_id, investor_id) DO UPDATE SET is_paid = EXCLUDED.is_paid;
+$$ LANGUAGE sql;
+
+-- Delete a portfolio fund together with its calls, distributions and reports
+-- in one transaction.
+CREATE OR REPLACE FUNCTION delete_fund_cascade(p_fund_id UUID)
+RETURNS void
+SECURITY INVOKER
+AS $$
+BEGIN
+    DELETE FROM capital_calls WHERE fund_id = p_fund_id;
+    DELETE FROM distributions WHERE fund_id = p_fund_id;
+    DELETE FROM quarterly_reports WHERE fund_id = p_fund_id;
+    DELETE FROM funds WHERE id = p_fund_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Delete a pipeline fund together with its Gantt tasks in one transaction.
+CREATE OR REPLACE FUNCTION delete_pipeline_cascade(p_fund_id UUID)
+RETURNS void
+SECURITY INVOKER
+AS $$
+BEGIN
+    DELETE FROM gantt_tasks WHERE pipeline_fund_id = p_fund_id;
+    DELETE FROM pipeline_funds WHERE id = p_fund_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Every dated deadline the alert banners care about, in one shape.
+-- source: capital_call / lp_call / gantt_task; owner_id is the fund or pipeline fund.
+-- transaction_type is passed through as-is: a NULL is not counted as a call, as in app.py.
+CREATE OR REPLACE VIEW upcoming_deadlines WITH (security_invoker = true) AS
+    SELECT 'capital_call' AS source, cc.id AS ref_id, cc.fund_id AS owner_id,
+           f.name AS owner_name, f.currency, cc.payment_date AS deadline,
+           cc.transaction_type,
+           cc.amount, cc.equalisation_interest, NULL::NUMERIC AS call_pct, NULL::TEXT AS task_name
+    FROM capital_calls cc
+    LEFT JOIN funds f ON f.id = cc.fund_id
+    UNION ALL
+    SELECT 'lp_call', lpc.id, NULL::UUID, NULL::TEXT, NULL::TEXT, lpc.call_date,
+           NULL::TEXT, NULL::NUMERIC, NULL::NUMERIC, lpc.call_pct, NULL::TEXT
+    FROM lp_calls lpc
+    UNION ALL
+    SELECT 'gantt_task', t.id, t.pipeline_fund_id, p.name, NULL::TEXT, t.due_date,
+           NULL::TEXT, NULL::NUMERIC, NULL::NUMERIC, NULL::NUMERIC, t.task_name
+    FROM gantt_tasks t
+    LEFT JOIN pipeline_funds p ON p.id = t.pipeline_fund_id
+    WHERE t.status IS DISTINCT FROM 'done';
+
+-- Deadlines between p_today and p_today + horizon_days, for check_and_show_alerts().
+-- p_today comes from the app so the window matches the dates shown in the UI.
+CREATE OR REPLACE FUNCTION get_upcoming_deadlines(p_today DATE, horizon_days INTEGER DEFAULT 14)
+RETURNS SETOF upcoming_deadlines
+SECURITY INVOKER
+AS $$
+    SELECT * FROM upcoming_deadlines
+    WHERE deadline BETWEEN p_today AND p_today + horizon_days
+    ORDER BY deadline;
+$$ LANGUAGE sql STABLE;
+
+-- Per LP call collection totals for the FOF Collection Summary.
+-- Commitments of 1000 or less were entered in millions; normalize them the
+-- same way investor_commitment_value() does in app.py.
+CREATE OR REPLACE VIEW lp_call_summary WITH (security_invoker = true) AS
+    WITH inv AS (
+        SELECT id,
+               CASE WHEN commitment > 0 AND commitment <= 1000 THEN commitment * 1000000
+                    ELSE COALESCE(commitment, 0) END AS commitment
+        FROM investors
+    )
+    SELECT c.id AS lp_call_id,
+           (SELECT COALESCE(SUM(commitment), 0) FROM inv) * c.call_pct / 100 AS total_called,
+           COALESCE(SUM(inv.commitment) FILTER (WHERE p.is_paid), 0) * c.call_pct / 100 AS total_paid
+    FROM lp_calls c
+    LEFT JOIN lp_payments p ON p.lp_call_id = c.id
+    LEFT JOIN inv ON inv.id = p.investor_id
+    GROUP BY c.id, c.call_pct;
+
+-- One-time cleanup of pipeline notes saved by the old pitch-deck notes
+-- builder, which wrote missing values as "None". Only those exact fragments
+-- are removed, so re-running this is harmless.
+UPDATE pipeline_funds
+SET notes = replace(replace(replace(replace(notes,
+        ' | Manager AUM: $NoneB', ''),
+        ' | MOIC: Nonex-Nonex', ''),
+        'x-Nonex', 'x'),
+        ' | IRR: None%', '')
+WHERE notes LIKE '%None%';
@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from report_text import REPORT_SAMPLE_ROWS, frame_report_text, head_tail_pages_text
+
+
+def full_join_pages_text(pages):
+    """The original extraction: join every page, then truncate."""
+    parts = [f"--- Page {i+1} ---\n{text.strip()}" for i, text in enumerate(pages) if text.strip()]
+    full_text = "\n".join(parts)
+    if len(full_text) <= 12000:
+        return full_text
+    return full_text[:4000] + "\n\n[...]\n\n" + full_text[-8000:]
+
+
+class CountingPages(list):
+    """Page list that records which pages were read."""
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.read = set()
+
+    def __getitem__(self, i):
+        self.read.add(i)
+        return super().__getitem__(i)
+
+
+class HeadTailPagesTextTests(unittest.TestCase):
+    def test_short_document_is_joined_whole(self):
+        pages = ["Fund overview", "   ", "Terms\n"]
+        self.assertEqual(head_tail_pages_text(pages), "--- Page 1 ---\nFund overview\n--- Page 3 ---\nTerms")
+        self.assertEqual(head_tail_pages_text(pages), full_join_pages_text(pages))
+        self.assertEqual(head_tail_pages_text([]), "")
+
+    def test_long_document_matches_full_join_and_skips_middle_pages(self):
+        pages = CountingPages([f"page {n} " + "x" * 1500 for n in range(40)])
+        result = head_tail_pages_text(pages)
+
+        self.assertEqual(result, full_join_pages_text(pages))
+        self.assertIn("[...]", result)
+        self.assertNotIn(20, pages.read)
+
+    def test_blank_middle_pages_at_the_12000_boundary_keep_full_text(self):
+        # "--- Page N ---\n" is 15 characters, so these pieces fill the head to
+        # exactly 4000 and the tail to exactly 8000 characters with their "\n".
+        pages = ["a" * 3984, "", "  ", "b" * 7984]
+        result = head_tail_pages_text(pages)
+
+        self.assertEqual(result, full_join_pages_text(pages))
+        self.assertNotIn("[...]", result)
+        self.assertEqual(len(result), 11999)
+
+    def test_text_of_extracts_from_page_objects(self):
+        pages = [{"text": "first"}, {"text": "second"}]
+        result = head_tail_pages_text(pages, text_of=lambda page: page["text"])
+        self.assertEqual(result, "--- Page 1 ---\nfirst\n--- Page 2 ---\nsecond")
+
+
+def full_frame_text(df):
+    """The original sheet formatting: render everything, then truncate."""
+    rep_text = df.to_string(index=False)
+    if len(rep_text) > 12000:
+        rep_text = rep_text[:4000] + "\n[...]\n" + rep_text[-8000:]
+    return rep_text
+
+
+class FrameReportTextTests(unittest.TestCase):
+    def test_narrow_sheet_that_fits_matches_full_to_string(self):
+        df = pd.DataFrame({"quarter": np.arange(700) % 4 + 1, "empty": np.nan})
+        self.assertGreater(len(df), REPORT_SAMPLE_ROWS)
+        self.assertLessEqual(len(df.to_string(index=False)), 12000)
+
+        self.assertEqual(frame_report_text(df), df.to_string(index=False))
+
+    def test_wide_sheet_keeps_exact_head_and_tail_windows(self):
+        # Fixed-width values, so formatting a slice lines up with the full frame.
+        df = pd.DataFrame({f"col{n}": [f"value{n:02d}-{i % 10}" for i in range(3000)] for n in range(8)})
+        result = frame_report_text(df)
+
+        head, tail = result.split("\n[...]\n")
+        self.assertEqual(len(head), 4000)
+        self.assertEqual(len(tail), 8000)
+        self.assertEqual(result, full_frame_text(df))
+
+    def test_narrow_tail_rows_still_fill_the_tail_window(self):
+        # The sample rows are far wider than the rows at the end of the sheet.
+        df = pd.DataFrame({"label": ["x" * 60] * REPORT_SAMPLE_ROWS + ["y"] * 5000})
+        head, tail = frame_report_text(df).split("\n[...]\n")
+        self.assertEqual(len(head), 4000)
+        self.assertEqual(len(tail), 8000)
+
+
+if __name__ == "__main__":
+    unittest.main()